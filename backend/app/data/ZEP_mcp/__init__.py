@@ -1,5 +1,6 @@
 from .client import (
     get_zep_client,
+    get_async_zep_client,
     ensure_zep_user,
     ensure_zep_thread,
     add_message_to_thread,
@@ -11,6 +12,7 @@ from .pinterest_sync import (
 
 __all__ = [
     "get_zep_client",
+    "get_async_zep_client",
     "ensure_zep_user",
     "ensure_zep_thread",
     "add_message_to_thread",
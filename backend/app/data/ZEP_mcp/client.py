@@ -1,19 +1,38 @@
 import logging
 import os
 import uuid
-from typing import Optional
+from typing import Optional, Tuple
 
-from zep_cloud.client import Zep
+from zep_cloud.client import AsyncZep, Zep
 from zep_cloud.types import Message
 
 logger = logging.getLogger(__name__)
 
 
+_client: Optional[Tuple[str, Zep]] = None
+_async_client: Optional[Tuple[str, AsyncZep]] = None
+
+
 def get_zep_client() -> Optional[Zep]:
+    # Shared client (and its connection pool) for as long as the API key stays the same.
+    global _client
+    api_key = os.environ.get("ZEP_API_KEY")
+    if not api_key:
+        return None
+    if _client is None or _client[0] != api_key:
+        _client = (api_key, Zep(api_key=api_key))
+    return _client[1]
+
+
+def get_async_zep_client() -> Optional[AsyncZep]:
+    # Async counterpart of get_zep_client for request handlers that must not block the event loop.
+    global _async_client
     api_key = os.environ.get("ZEP_API_KEY")
     if not api_key:
         return None
-    return Zep(api_key=api_key)
+    if _async_client is None or _async_client[0] != api_key:
+        _async_client = (api_key, AsyncZep(api_key=api_key))
+    return _async_client[1]
 
 
 def ensure_zep_user(
@@ -0,0 +1,180 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def _slugify(value: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", value.lower()).strip("-")
+    return slug or "item"
+
+
+def _to_cents(value: Any) -> int:
+    try:
+        return int(round(float(value or 0.0) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def make_item_id(name: str, retailer: str, link: Optional[str] = None) -> str:
+    """Stable id: same product from the same retailer keeps its id across refreshes."""
+    identity = f"{retailer}|{link or ''}|{name}".lower()
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:8]
+    return f"{_slugify(name)[:48]}-{digest}"
+
+
+class CartState:
+    """
+    Server-side cart. Totals and per-retailer subtotals are kept in integer cents and
+    adjusted on every add/update/remove instead of being recomputed from the item list.
+
+    Items come in two layers: the search results, swapped wholesale by replace(), and the
+    user's own edits (items added, fields patched, items removed), which are replayed on
+    top of every new result set so a fresh search or persona change never drops them.
+    """
+
+    def __init__(self) -> None:
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # User layer: items added through add(), patches and removals of search items.
+        self._added: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._edits: Dict[str, Dict[str, Any]] = {}
+        self._removed: set[str] = set()
+        self._total_cents = 0
+        self._retailer_cents: Dict[str, int] = {}
+        self._version = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self.source_key: Optional[str] = None
+
+    # --- internal bookkeeping -------------------------------------------------
+
+    @staticmethod
+    def _line_cents(item: Dict[str, Any]) -> int:
+        return _to_cents(item.get("price")) * int(item.get("quantity") or 1)
+
+    def _account(self, item: Dict[str, Any], sign: int) -> None:
+        cents = sign * self._line_cents(item)
+        retailer = str(item.get("retailer") or "")
+        self._total_cents += cents
+        subtotal = self._retailer_cents.get(retailer, 0) + cents
+        if subtotal:
+            self._retailer_cents[retailer] = subtotal
+        else:
+            self._retailer_cents.pop(retailer, None)
+
+    def _touch(self) -> None:
+        self._version += 1
+        self._snapshot = None
+
+    def _unique_id(self, item_id: str) -> str:
+        if item_id not in self._items and item_id not in self._added:
+            return item_id
+        n = 2
+        while f"{item_id}-{n}" in self._items or f"{item_id}-{n}" in self._added:
+            n += 1
+        return f"{item_id}-{n}"
+
+    @staticmethod
+    def _apply(item: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        changes = dict(changes)
+        variant_changes = changes.pop("variant", None) or {}
+        if variant_changes:
+            item["variant"] = {**(item.get("variant") or {}), **variant_changes}
+        item.update(changes)
+
+    # --- public API -----------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def etag(self) -> str:
+        source = hashlib.sha1((self.source_key or "").encode("utf-8")).hexdigest()[:12]
+        return f'"{source}-{self._version}"'
+
+    def replace(self, items: list[Dict[str, Any]], source_key: Optional[str]) -> None:
+        """Swap in a new set of search items, then replay the user's edits on top."""
+        self._items.clear()
+        self._total_cents = 0
+        self._retailer_cents = {}
+        for item in items:
+            if item["id"] in self._added:
+                continue  # the user already added this product; their copy wins
+            item["id"] = self._unique_id(item["id"])
+            if item["id"] in self._removed:
+                continue
+            item.setdefault("quantity", 1)
+            if item["id"] in self._edits:
+                self._apply(item, self._edits[item["id"]])
+            self._items[item["id"]] = item
+            self._account(item, +1)
+        for item_id, item in self._added.items():
+            self._items[item_id] = item
+            self._account(item, +1)
+        self.source_key = source_key
+        self._touch()
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        return self._items.get(item_id)
+
+    def add(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        item.setdefault("quantity", 1)
+        item["id"] = self._unique_id(item.get("id") or make_item_id(item.get("title") or "", item.get("retailer") or "", item.get("link")))
+        self._items[item["id"]] = item
+        self._added[item["id"]] = item
+        self._account(item, +1)
+        self._touch()
+        return item
+
+    def update(self, item_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """User edit: applied now and replayed after every replace()."""
+        item = self.annotate(item_id, changes)
+        if item is not None and item_id not in self._added:
+            edits = self._edits.setdefault(item_id, {})
+            for key, value in changes.items():
+                if key == "variant":
+                    edits["variant"] = {**edits.get("variant", {}), **(value or {})}
+                else:
+                    edits[key] = value
+        return item
+
+    def annotate(self, item_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Server-side change (e.g. a late explanation) that lasts only until the next replace()."""
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+        self._account(item, -1)
+        self._apply(item, changes)
+        self._account(item, +1)
+        self._touch()
+        return item
+
+    def remove(self, item_id: str) -> Optional[Dict[str, Any]]:
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return None
+        if self._added.pop(item_id, None) is None:
+            self._removed.add(item_id)
+            self._edits.pop(item_id, None)
+        self._account(item, -1)
+        self._touch()
+        return item
+
+    def totals(self) -> Dict[str, Any]:
+        return {
+            "totalPrice": round(self._total_cents / 100, 2),
+            "retailerSubtotals": {k: round(v / 100, 2) for k, v in self._retailer_cents.items()},
+            "itemCount": len(self._items),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self._snapshot is None:
+            self._snapshot = {"items": list(self._items.values()), **self.totals()}
+        return self._snapshot
+
+
+_cart = CartState()
+
+
+def get_cart_state() -> CartState:
+    return _cart
@@ -0,0 +1,14 @@
+from .base import CatalogBackend, CatalogQuery, parse_delivery_days
+from .bm25 import BM25Index
+from .memory import MemoryCatalog
+from .sqlite_store import SQLiteCatalog, build_sqlite_catalog
+
+__all__ = [
+    "BM25Index",
+    "CatalogBackend",
+    "CatalogQuery",
+    "MemoryCatalog",
+    "SQLiteCatalog",
+    "build_sqlite_catalog",
+    "parse_delivery_days",
+]
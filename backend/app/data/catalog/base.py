@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+_DIGITS = re.compile(r"\d+")
+_TOKEN = re.compile(r"\w+")
+
+# Product fields covered by the full-text query, with their BM25 term-frequency weights
+# (a name hit counts more than a retailer hit). Filtering and ranking use the same fields
+# on every backend, so a word matches (or not) regardless of where the catalog lives.
+TEXT_FIELD_WEIGHTS = {"name": 2.0, "brand": 1.0, "category": 1.0, "retailer": 0.5, "color": 1.0, "style": 1.0}
+TEXT_FIELDS = tuple(TEXT_FIELD_WEIGHTS)
+
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    """Filters pushed down into a catalog backend; unset fields do not filter."""
+
+    text: str = ""
+    category: Optional[str] = None
+    retailer: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    max_delivery_days: Optional[float] = None
+    limit: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return not tokenize(self.text) and all(
+            v is None
+            for v in (self.category, self.retailer, self.min_price, self.max_price, self.max_delivery_days, self.limit)
+        )
+
+
+class CatalogBackend(Protocol):
+    def __len__(self) -> int: ...
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]: ...
+
+    def all(self) -> List[Dict[str, Any]]: ...
+
+    def categories(self) -> List[str]: ...
+
+    def search(self, query: CatalogQuery) -> List[Dict[str, Any]]:
+        """Products matching every filter and every query token, in catalog order."""
+        ...
+
+    def rank_text(self, query: CatalogQuery, limit: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Best `limit` (product id, relevance) pairs for any token of query.text among the
+        products passing the other filters, best first; None when the backend leaves text
+        ranking to the shared BM25 index.
+        """
+        ...
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+def parse_delivery_days(delivery: Any) -> float:
+    """Days from a delivery string ("Free · 4 days", "Standard · 5-7 days", "tomorrow")."""
+    if isinstance(delivery, (int, float)):
+        return float(delivery)
+    if not isinstance(delivery, str):
+        return 5.0
+    numbers = _DIGITS.findall(delivery)
+    if numbers:
+        return float(numbers[0])
+    if "tomorrow" in delivery.lower():
+        return 1.0
+    return 5.0
+
+
+def normalize_product(product: Dict[str, Any], position: int) -> Dict[str, Any]:
+    """Copy with a string id, a float price and parsed delivery_days, done once at load."""
+    normalized = dict(product)
+    normalized["id"] = str(product.get("id") or f"sku-{position}")
+    normalized["price"] = float(product.get("price") or 0.0)
+    if "delivery_days" not in normalized:
+        normalized["delivery_days"] = parse_delivery_days(product.get("delivery", "5 days"))
+    normalized.setdefault("category", "Other")
+    return normalized
+
+
+def search_text(product: Dict[str, Any]) -> str:
+    return " ".join(str(product.get(field) or "") for field in TEXT_FIELDS)
@@ -0,0 +1,222 @@
+import heapq
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .base import TEXT_FIELD_WEIGHTS, tokenize
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+# Indexed fields and their term-frequency weights: the full-text filter fields.
+FIELD_WEIGHTS = TEXT_FIELD_WEIGHTS
+K1 = 1.2
+B = 0.75
+
+
+def _weighted_terms(product: Dict[str, Any]) -> Dict[str, float]:
+    terms: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(str(product.get(field) or "")):
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+def _fingerprint(product: Dict[str, Any]) -> Tuple[str, ...]:
+    return tuple(str(product.get(field) or "") for field in FIELD_WEIGHTS)
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring over product text fields. sync() brings it in line
+    with a catalog by re-tokenizing only products whose indexed text changed, so catalog
+    updates cost as much as the changed products, not a rebuild.
+
+    Every product holds a slot; with NumPy each token's postings are also kept as
+    (slots, tf) arrays, rebuilt only for tokens that changed, and a query is a few
+    array operations per token instead of a Python loop over its postings.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._terms: Dict[int, Dict[str, float]] = {}
+        self._fingerprints: Dict[int, Tuple[str, ...]] = {}
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._lengths: List[float] = []
+        # Catalog position per slot: ties in score keep catalog order.
+        self._order: List[int] = []
+        self._total_length = 0.0
+        # Derived data, rebuilt lazily after changes.
+        self._norms: Optional[List[float]] = None
+        self._norm_array: Any = None
+        self._order_array: Any = None
+        self._arrays: Dict[str, Tuple[Any, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _remove(self, slot: int) -> None:
+        for token in self._terms.pop(slot, {}):
+            docs = self._postings[token]
+            docs.pop(slot, None)
+            self._arrays.pop(token, None)
+            if not docs:
+                del self._postings[token]
+        self._total_length -= self._lengths[slot]
+        self._lengths[slot] = 0.0
+        self._fingerprints.pop(slot, None)
+
+    def _add(self, slot: int, product: Dict[str, Any]) -> None:
+        terms = _weighted_terms(product)
+        self._terms[slot] = terms
+        for token, tf in terms.items():
+            self._postings.setdefault(token, {})[slot] = tf
+            self._arrays.pop(token, None)
+        length = sum(terms.values())
+        self._lengths[slot] = length
+        self._total_length += length
+        self._fingerprints[slot] = _fingerprint(product)
+
+    def _slot_for(self, product_id: str) -> int:
+        slot = self._slots.get(product_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = product_id
+            else:
+                slot = len(self._ids)
+                self._ids.append(product_id)
+                self._lengths.append(0.0)
+                self._order.append(0)
+            self._slots[product_id] = slot
+        return slot
+
+    def _drop(self, product_id: str) -> None:
+        slot = self._slots.pop(product_id)
+        self._remove(slot)
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def _put(self, product: Dict[str, Any], position: int) -> Optional[str]:
+        """Index one product; returns "added"/"updated", or None when its text is unchanged."""
+        product_id = str(product["id"])
+        known = product_id in self._slots
+        slot = self._slot_for(product_id)
+        if self._order[slot] != position or not known:
+            self._order[slot] = position
+            self._order_array = None
+        if self._fingerprints.get(slot) == _fingerprint(product):
+            return None
+        self._remove(slot)
+        self._add(slot, product)
+        self._norms = None
+        return "updated" if known else "added"
+
+    def upsert(self, product: Dict[str, Any], position: Optional[int] = None) -> None:
+        with self._lock:
+            slot = self._slots.get(str(product["id"]))
+            if position is None:
+                position = self._order[slot] if slot is not None else len(self._slots)
+            self._put(product, position)
+
+    def remove(self, product_id: str) -> None:
+        with self._lock:
+            if product_id in self._slots:
+                self._drop(product_id)
+                self._norms = None
+
+    def sync(self, products: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Make the index match products exactly; returns how many were added, updated, removed."""
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        with self._lock:
+            seen: Set[str] = set()
+            for position, product in enumerate(products):
+                seen.add(str(product["id"]))
+                change = self._put(product, position)
+                if change is not None:
+                    stats[change] += 1
+            for product_id in [pid for pid in self._slots if pid not in seen]:
+                self._drop(product_id)
+                stats["removed"] += 1
+            if stats["removed"]:
+                self._norms = None
+        return stats
+
+    def _doc_norms(self) -> List[float]:
+        if self._norms is None:
+            avg = self._total_length / len(self._slots) if self._slots else 1.0
+            self._norms = [K1 * (1 - B + B * length / avg) for length in self._lengths]
+            self._norm_array = np.asarray(self._norms) if HAS_NUMPY else None
+        return self._norms
+
+    def _token_arrays(self, token: str) -> Tuple[Any, Any]:
+        arrays = self._arrays.get(token)
+        if arrays is None:
+            docs = self._postings[token]
+            arrays = self._arrays[token] = (
+                np.fromiter(docs.keys(), dtype=np.intp, count=len(docs)),
+                np.fromiter(docs.values(), dtype=np.float64, count=len(docs)),
+            )
+        return arrays
+
+    def search(
+        self,
+        query: str,
+        limit: int = 200,
+        allowed: Optional[Set[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Best `limit` (product id, BM25 score) pairs for the query, optionally within `allowed` ids."""
+        with self._lock:
+            tokens = [t for t in set(tokenize(query)) if t in self._postings]
+            if not tokens or limit <= 0:
+                return []
+            n = len(self._slots)
+            norms = self._doc_norms()
+            idf = {t: math.log(1 + (n - len(self._postings[t]) + 0.5) / (len(self._postings[t]) + 0.5)) for t in tokens}
+            if HAS_NUMPY:
+                return self._search_arrays(tokens, idf, limit, allowed)
+
+            allowed_slots = None if allowed is None else {self._slots[p] for p in allowed if p in self._slots}
+            scores: Dict[int, float] = {}
+            for token in tokens:
+                for slot, tf in self._postings[token].items():
+                    if allowed_slots is not None and slot not in allowed_slots:
+                        continue
+                    scores[slot] = scores.get(slot, 0.0) + idf[token] * tf * (K1 + 1) / (tf + norms[slot])
+            order = self._order
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -order[item[0]]))
+            return [(self._ids[slot], score) for slot, score in best]
+
+    def _search_arrays(
+        self,
+        tokens: List[str],
+        idf: Dict[str, float],
+        limit: int,
+        allowed: Optional[Set[str]],
+    ) -> List[Tuple[str, float]]:
+        norms = self._norm_array
+        scores = np.zeros(len(self._ids))
+        for token in tokens:
+            slots, tf = self._token_arrays(token)
+            # Slots are unique within one token, so fancy += accumulates correctly.
+            scores[slots] += idf[token] * tf * (K1 + 1) / (tf + norms[slots])
+        if allowed is not None:
+            mask = np.zeros(len(self._ids), dtype=bool)
+            mask[[self._slots[p] for p in allowed if p in self._slots]] = True
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            cut = np.partition(scores[candidates], len(candidates) - limit)[len(candidates) - limit]
+            candidates = candidates[scores[candidates] >= cut]
+        if self._order_array is None:
+            self._order_array = np.asarray(self._order)
+        order = self._order_array[candidates]
+        best = candidates[np.lexsort((order, -scores[candidates]))][:limit]
+        return [(self._ids[slot], score) for slot, score in zip(best.tolist(), scores[best].tolist())]
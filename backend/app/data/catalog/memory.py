@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .base import CatalogQuery, normalize_product, search_text, tokenize
+
+
+class MemoryCatalog:
+    """
+    Catalog held in memory: id index, category and retailer buckets, a price-sorted
+    array for range filters and a token -> positions index for the full-text query.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]]) -> None:
+        self._products = [normalize_product(p, i) for i, p in enumerate(products)]
+        self._by_id: Dict[str, int] = {}
+        self._by_category: Dict[str, Set[int]] = {}
+        self._by_retailer: Dict[str, Set[int]] = {}
+        self._tokens: Dict[str, Set[int]] = {}
+        for i, p in enumerate(self._products):
+            self._by_id.setdefault(p["id"], i)
+            self._by_category.setdefault(str(p["category"]).lower(), set()).add(i)
+            self._by_retailer.setdefault(str(p.get("retailer") or "").lower(), set()).add(i)
+            for token in tokenize(search_text(p)):
+                self._tokens.setdefault(token, set()).add(i)
+        self._price_order = sorted(range(len(self._products)), key=lambda i: self._products[i]["price"])
+        self._prices = [self._products[i]["price"] for i in self._price_order]
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        i = self._by_id.get(product_id)
+        return None if i is None else self._products[i]
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._products)
+
+    def categories(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for p in self._products:
+            seen.setdefault(p["category"], None)
+        return list(seen)
+
+    def search(self, query: CatalogQuery) -> List[Dict[str, Any]]:
+        # Narrow with the indexes first (smallest sets decide), then check delivery on what is left.
+        candidates: Optional[Set[int]] = None
+        index_hits: List[Set[int]] = [self._tokens.get(token, set()) for token in tokenize(query.text)]
+        if query.category is not None:
+            index_hits.append(self._by_category.get(query.category.lower(), set()))
+        if query.retailer is not None:
+            index_hits.append(self._by_retailer.get(query.retailer.lower(), set()))
+        if query.min_price is not None or query.max_price is not None:
+            lo = 0 if query.min_price is None else bisect_left(self._prices, query.min_price)
+            hi = len(self._prices) if query.max_price is None else bisect_right(self._prices, query.max_price)
+            index_hits.append(set(self._price_order[lo:hi]))
+        for hits in sorted(index_hits, key=len):
+            candidates = set(hits) if candidates is None else candidates & hits
+            if not candidates:
+                return []
+
+        positions: Iterable[int] = range(len(self._products)) if candidates is None else sorted(candidates)
+        matched: List[Dict[str, Any]] = []
+        for i in positions:
+            product = self._products[i]
+            if query.max_delivery_days is not None and product["delivery_days"] > query.max_delivery_days:
+                continue
+            matched.append(product)
+            if query.limit is not None and len(matched) >= query.limit:
+                break
+        return matched
+
+    def rank_text(self, query: CatalogQuery, limit: int) -> Optional[List[Tuple[str, float]]]:
+        # The BM25 index in app.data.products ranks in-memory catalogs; it survives catalog
+        # swaps and re-indexes only changed products.
+        return None
@@ -0,0 +1,204 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import TEXT_FIELD_WEIGHTS, TEXT_FIELDS, CatalogQuery, normalize_product, search_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Pages are memory-mapped instead of read into SQLite's cache, so opening a large
+# catalog costs nothing up front and the OS shares the pages between workers.
+_MMAP_BYTES = 1 << 30
+
+# One FTS5 column per full-text field: filters match any of them, and bm25() weights
+# them like BM25Index does.
+_FTS_COLUMNS = TEXT_FIELDS
+_RANK_WEIGHTS = ", ".join(str(TEXT_FIELD_WEIGHTS[f]) for f in TEXT_FIELDS)
+
+
+def _has_fts5(db: sqlite3.Connection) -> bool:
+    try:
+        db.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        db.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def build_sqlite_catalog(path: str, products: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write products (e.g. a retailer feed) to a SQLite catalog file at path, replacing it.
+    Rows carry the filterable columns plus the full product as JSON; the text query uses
+    an FTS5 table (also used for BM25 ranking) when SQLite has it and a padded token
+    column otherwise.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).unlink(missing_ok=True)
+    db = sqlite3.connect(path)
+    try:
+        fts = _has_fts5(db)
+        db.executescript(
+            """
+            CREATE TABLE products (
+                pos INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                category TEXT NOT NULL,
+                category_key TEXT NOT NULL,
+                retailer_key TEXT NOT NULL,
+                price REAL NOT NULL,
+                delivery_days REAL NOT NULL,
+                tokens TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            """
+        )
+        if fts:
+            db.execute(
+                f"CREATE VIRTUAL TABLE products_fts USING fts5({', '.join(_FTS_COLUMNS)}, "
+                "content='', tokenize='unicode61 remove_diacritics 0')"
+            )
+        count = 0
+        for pos, product in enumerate(products):
+            p = normalize_product(product, pos)
+            text = search_text(p)
+            db.execute(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pos,
+                    p["id"],
+                    p["category"],
+                    str(p["category"]).lower(),
+                    str(p.get("retailer") or "").lower(),
+                    p["price"],
+                    p["delivery_days"],
+                    f" {' '.join(tokenize(text))} ",
+                    json.dumps(p, ensure_ascii=False, default=str),
+                ),
+            )
+            if fts:
+                values = [str(p.get(f) or "") for f in TEXT_FIELDS]
+                db.execute(
+                    f"INSERT INTO products_fts (rowid, {', '.join(_FTS_COLUMNS)}) VALUES (?{', ?' * len(values)})",
+                    (pos, *values),
+                )
+            count += 1
+        db.executescript(
+            """
+            CREATE INDEX idx_products_category ON products (category_key, pos);
+            CREATE INDEX idx_products_retailer ON products (retailer_key, pos);
+            CREATE INDEX idx_products_price ON products (price);
+            """
+        )
+        db.commit()
+    finally:
+        db.close()
+    logger.info("[Catalog] wrote %s products to %s (fts5=%s)", count, path, fts)
+    return count
+
+
+class SQLiteCatalog:
+    """Read-only, memory-mapped catalog file written by build_sqlite_catalog; filters run in SQL."""
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._db.execute(f"PRAGMA mmap_size = {_MMAP_BYTES}")
+        self._lock = threading.Lock()
+        columns = tuple(row[1] for row in self._db.execute("PRAGMA table_info(products_fts)"))
+        self._fts = bool(columns)
+        # Files written with another column layout (a single body column before FTS ranking)
+        # filter on any column and leave ranking to the BM25 index.
+        self._fts_ranked = columns == _FTS_COLUMNS
+        self._count = self._db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _rows(self, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(sql, tuple(params)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows("SELECT data FROM products WHERE id = ?", (product_id,))
+        return rows[0] if rows else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._rows("SELECT data FROM products ORDER BY pos")
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            rows = self._db.execute("SELECT category FROM products GROUP BY category ORDER BY MIN(pos)").fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _filters(query: CatalogQuery) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if query.category is not None:
+            where.append("category_key = ?")
+            params.append(query.category.lower())
+        if query.retailer is not None:
+            where.append("retailer_key = ?")
+            params.append(query.retailer.lower())
+        if query.min_price is not None:
+            where.append("price >= ?")
+            params.append(query.min_price)
+        if query.max_price is not None:
+            where.append("price <= ?")
+            params.append(query.max_price)
+        if query.max_delivery_days is not None:
+            where.append("delivery_days <= ?")
+            params.append(query.max_delivery_days)
+        return where, params
+
+    def search(self, query: CatalogQuery) -> List[Dict[str, Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        tokens = tokenize(query.text)
+        if tokens and self._fts:
+            where.append("pos IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            terms = " ".join(f'"{token}"' for token in tokens)
+            params.append(terms)
+        else:
+            for token in tokens:
+                where.append("tokens LIKE ?")
+                params.append(f"% {token} %")
+        filters, filter_params = self._filters(query)
+        where += filters
+        params += filter_params
+
+        sql = "SELECT data FROM products"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY pos"
+        if query.limit is not None:
+            sql += " LIMIT ?"
+            params.append(query.limit)
+        return self._rows(sql, params)
+
+    def rank_text(self, query: CatalogQuery, limit: int) -> Optional[List[Tuple[str, float]]]:
+        """FTS5 bm25() over the full-text fields, with the filters in the same statement."""
+        if not self._fts_ranked:
+            return None
+        tokens = sorted(set(tokenize(query.text)))
+        if not tokens or limit <= 0:
+            return []
+        where, params = self._filters(query)
+        terms = " OR ".join(f'"{token}"' for token in tokens)
+        sql = (
+            f"SELECT p.id, bm25(products_fts, {_RANK_WEIGHTS}) AS rank FROM products_fts "
+            "JOIN products AS p ON p.pos = products_fts.rowid WHERE products_fts MATCH ?"
+        )
+        sql += "".join(f" AND p.{clause}" for clause in where)
+        sql += " ORDER BY rank, p.pos LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, (terms, *params, limit)).fetchall()
+        # bm25() is lower-is-better.
+        return [(product_id, -rank) for product_id, rank in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,3 +1,17 @@
-from .extractor import extract_user_requirements
+from .batch import extract_batch
+from .extractor import (
+    ExtractionUpdate,
+    close_clients,
+    extract_user_requirements,
+    extract_user_requirements_async,
+    extract_user_requirements_stream,
+)
 
-__all__ = ["extract_user_requirements"]
+__all__ = [
+    "extract_user_requirements",
+    "extract_user_requirements_async",
+    "extract_user_requirements_stream",
+    "extract_batch",
+    "ExtractionUpdate",
+    "close_clients",
+]
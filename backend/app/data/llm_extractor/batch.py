@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .extractor import extract_prepared_async, extraction_key, prepare_extraction
+
+logger = logging.getLogger(__name__)
+
+# (input index, extracted data or None, error message or None)
+BatchResult = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def extract_batch(
+    requests: List[Tuple[str, List[str]]],
+    concurrency: int = 8,
+    ordered: bool = True,
+) -> AsyncIterator[BatchResult]:
+    """
+    Extract many (prompt, preferences) pairs.
+
+    Identical inputs (same cache key) are extracted once. Each input's cache lookup and
+    rules pass run in a worker thread, so SQLite reads never block the event loop; cache
+    hits and rule fast-path answers are emitted without waiting for a slot, the rest go to
+    Groq with at most `concurrency` calls in flight. A failing item only yields an error
+    for that item.
+    With ordered=True results come back in input order, otherwise as they complete.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, (prompt, preferences) in enumerate(requests):
+        groups.setdefault(extraction_key(prompt, preferences or []), []).append(index)
+
+    done: "asyncio.Queue[Tuple[List[int], Optional[Dict[str, Any]], Optional[str]]]" = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks: List[asyncio.Task] = []
+
+    async def _run(indices: List[int], prompt: str, preferences: List[str]) -> None:
+        try:
+            cache_key, answer, known = await asyncio.to_thread(prepare_extraction, prompt, preferences)
+            if answer is None:
+                async with semaphore:
+                    answer = await extract_prepared_async(prompt, preferences, cache_key, known)
+            done.put_nowait((indices, answer, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("[LLM Extract] batch item failed: %s", exc)
+            done.put_nowait((indices, None, str(exc) or type(exc).__name__))
+
+    for indices in groups.values():
+        prompt, preferences = requests[indices[0]]
+        tasks.append(asyncio.create_task(_run(indices, prompt, preferences or [])))
+
+    pending: Dict[int, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+    next_index = 0
+    remaining = len(groups)
+    try:
+        while remaining:
+            indices, data, error = await done.get()
+            remaining -= 1
+            for index in indices:
+                if not ordered:
+                    yield index, data, error
+                    continue
+                pending[index] = (data, error)
+                while next_index in pending:
+                    item_data, item_error = pending.pop(next_index)
+                    yield next_index, item_data, item_error
+                    next_index += 1
+    finally:
+        # Client went away or the consumer stopped early: drop outstanding calls.
+        for task in tasks:
+            task.cancel()
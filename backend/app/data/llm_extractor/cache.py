@@ -0,0 +1,139 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever SYSTEM_PROMPT or _normalize_data in extractor.py, or the fields rules.py
+# merges into LLM answers, change: entries written under another version are never read
+# again and are purged when the store is opened.
+EXTRACTOR_VERSION = 4
+
+_DEFAULT_DB_PATH = Path(__file__).resolve().parents[3] / ".cache" / "llm_extract.sqlite3"
+
+_PUNCT_RE = re.compile(r"[^\w\s$€£%.,]+")
+_SOFT_PUNCT_RE = re.compile(r"(?<!\d)[.,]|[.,](?!\d)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Case, whitespace and punctuation-insensitive form of a prompt ('$29.99' is kept intact)."""
+    lowered = (text or "").lower().replace("’", "'")
+    lowered = _PUNCT_RE.sub(" ", lowered)
+    lowered = _SOFT_PUNCT_RE.sub(" ", lowered)
+    return _SPACES_RE.sub(" ", lowered).strip()
+
+
+def extraction_cache_key(prompt: str, preferences: Optional[List[str]], model: str) -> str:
+    prefs = sorted({p.strip().lower() for p in preferences or [] if p and p.strip()})
+    raw = json.dumps([EXTRACTOR_VERSION, model, normalize_prompt(prompt), prefs], ensure_ascii=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """In-memory LRU in front of a SQLite store that survives restarts."""
+
+    def __init__(self, max_entries: int = 2048, db_path: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        if db_path:
+            self._open(db_path)
+
+    def _open(self, db_path: str) -> None:
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "key TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM extractions WHERE version != ?", (EXTRACTOR_VERSION,))
+            db.commit()
+            self._db = db
+        except Exception as exc:
+            logger.warning("[LLM Extract] persistent cache disabled (%s): %s", db_path, exc)
+            self._db = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT data FROM extractions WHERE key = ? AND version = ?",
+                    (key, EXTRACTOR_VERSION),
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.persistent_hits += 1
+                    return copy.deepcopy(value)
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO extractions (key, version, data, created_at) VALUES (?, ?, ?, ?)",
+                        (key, EXTRACTOR_VERSION, json.dumps(value, ensure_ascii=False), time.time()),
+                    )
+                    self._db.commit()
+                except Exception as exc:
+                    logger.warning("[LLM Extract] persistent cache write failed: %s", exc)
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM extractions")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": EXTRACTOR_VERSION,
+            "memory_entries": len(self._memory),
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+        }
+
+
+_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    global _cache
+    if _cache is None:
+        # LLM_EXTRACT_CACHE_PATH="" keeps the cache in memory only.
+        db_path = os.environ.get("LLM_EXTRACT_CACHE_PATH", str(_DEFAULT_DB_PATH))
+        max_entries = int(os.environ.get("LLM_EXTRACT_CACHE_SIZE", 2048))
+        _cache = ExtractionCache(max_entries=max_entries, db_path=db_path or None)
+    return _cache
@@ -1,71 +1,440 @@
+import asyncio
 import json
 import logging
 import os
-import re
-from typing import Any, Dict, List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
 
-from groq import Groq
+from groq import AsyncGroq, Groq
 
+from .cache import extraction_cache_key, get_extraction_cache
+from .metrics import get_extraction_metrics
+from .partial_json import PartialJSONObject
+from .routing import get_model_router
+from .rules import REQUIRED_FIELDS, rule_extract
 
-MODEL_NAME = "openai/gpt-oss-120b"
+
+# Changing this prompt (or _normalize_data) requires bumping EXTRACTOR_VERSION in cache.py.
+# Fields that shape the search query come first so a streamed completion yields them early.
+SYSTEM_PROMPT = (
+    "You are a strict information extractor. Return ONLY valid JSON with keys in this order. "
+    "Schema: {item:string, target:string, colors:[string], size:string, "
+    "style:[string], budget:string, deadline:string, constraints:[string]}. "
+    "Infer budget/deadline if present. Infer style keywords and colors. "
+    "Infer target audience (women/men/kids) and size if present. "
+    "Use empty string/array when missing."
+)
+
+_SCHEMA_FIELDS = {
+    "item": "string",
+    "target": "string",
+    "colors": "[string]",
+    "size": "string",
+    "style": "[string]",
+    "budget": "string",
+    "deadline": "string",
+    "constraints": "[string]",
+}
+
+EXTRACT_TIMEOUT_S = float(os.environ.get("LLM_EXTRACT_TIMEOUT", 20))
+# Skip the LLM when every required field is found by the rules with at least this confidence.
+RULES_FAST_PATH = os.environ.get("LLM_RULES_FAST_PATH", "1").lower() not in {"0", "false", "no"}
+RULES_MIN_CONFIDENCE = float(os.environ.get("LLM_RULES_MIN_CONFIDENCE", 0.8))
 
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class ExtractionUpdate:
+    """One step of a streamed extraction: normalized data plus the fields actually extracted so far."""
 
-def _get_client() -> Groq:
+    data: Dict[str, Any]
+    fields: FrozenSet[str] = field(default_factory=frozenset)
+    final: bool = False
+
+
+_client: Optional[Groq] = None
+_async_client: Optional[Tuple[asyncio.AbstractEventLoop, AsyncGroq]] = None
+
+
+def _api_key() -> str:
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY is not set")
-    return Groq(api_key=api_key)
+    return api_key
 
 
-def extract_user_requirements(user_prompt: str, preferences: Optional[List[str]] = None) -> Dict[str, Any]:
-    client = _get_client()
-    preferences = preferences or []
+def _get_client() -> Groq:
+    global _client
+    if _client is None:
+        _client = Groq(api_key=_api_key(), timeout=EXTRACT_TIMEOUT_S, max_retries=1)
+    return _client
 
+
+def _get_async_client() -> AsyncGroq:
+    # One pooled client per event loop; connections are reused across requests.
+    global _async_client
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client[0] is not loop:
+        if _async_client is not None:
+            _retire_async_client(*_async_client)
+        _async_client = (loop, AsyncGroq(api_key=_api_key(), timeout=EXTRACT_TIMEOUT_S, max_retries=1))
+    return _async_client[1]
+
+
+_retiring: Set["asyncio.Future[Any]"] = set()
+
+
+def _retire_async_client(owner: asyncio.AbstractEventLoop, client: AsyncGroq) -> None:
+    """Close a client replaced because the event loop changed, so its connection pool is released."""
+    if owner.is_running():
+        # Its connections belong to that loop; close them there.
+        future = asyncio.run_coroutine_threadsafe(client.close(), owner)
+    else:
+        # The owning loop has stopped; release the pool from here, ignoring dead transports.
+        future = asyncio.ensure_future(_close_quietly(client))
+    _retiring.add(future)
+    future.add_done_callback(_retiring.discard)
+
+
+async def _close_quietly(client: AsyncGroq) -> None:
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a strict information extractor. Return ONLY valid JSON. "
-                        "Schema: {budget:string, style:[string], deadline:string, colors:[string], "
-                        "item:string, constraints:[string], target:string, size:string}. "
-                        "Infer budget/deadline if present. Infer style keywords and colors. "
-                        "Infer target audience (women/men/kids) and size if present. "
-                        "Use empty string/array when missing."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"User input: {user_prompt}\n"
-                        f"Preferences tickets: {', '.join(preferences) if preferences else 'none'}"
-                    ),
-                },
-            ],
-            max_completion_tokens=300,
-            temperature=0,
-            top_p=1,
-        )
+        await client.close()
     except Exception as exc:
-        logger.exception("[LLM Extract] Groq call failed: %s", exc)
-        raise
+        logger.debug("[LLM Extract] closing a stale AsyncGroq client failed: %s", exc)
+
 
-    message = response.choices[0].message
-    content = message.content or "{}"
+async def close_clients() -> None:
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client[1].close()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def _build_messages(user_prompt: str, preferences: List[str], known: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    system_prompt = SYSTEM_PROMPT
+    if known:
+        # Only ask for what the rule pass could not settle; fewer output tokens to wait for.
+        missing = [f"{k}:{t}" for k, t in _SCHEMA_FIELDS.items() if k not in known]
+        system_prompt = (
+            "You are a strict information extractor. Return ONLY valid JSON with keys in this order. "
+            f"Schema: {{{', '.join(missing)}}}. "
+            f"Already known (do not repeat): {json.dumps(known, ensure_ascii=False)}. "
+            "Use empty string/array when missing."
+        )
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": (
+                f"User input: {user_prompt}\n"
+                f"Preferences tickets: {', '.join(preferences) if preferences else 'none'}"
+            ),
+        },
+    ]
+
+
+def extraction_key(user_prompt: str, preferences: List[str]) -> str:
+    """Cache key of a (prompt, preferences) pair; identical inputs share it."""
+    # Routing depends only on the prompt, so an answer is keyed by the models of its route
+    # (small+large or large): it came from one of them, and changing either invalidates it.
+    route = get_model_router("extract").route(_is_simple_prompt(user_prompt))
+    return extraction_cache_key(user_prompt, preferences, "+".join(model for _tier, model in route))
+
+
+def prepare_extraction(user_prompt: str, preferences: List[str]) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Cache lookup and rule-based fast path. Blocking (the cache may read SQLite), so async
+    callers run it in a thread.
+    Returns (cache_key, answer or None, confidently known fields for a shrunk LLM prompt).
+    """
+    metrics = get_extraction_metrics()
+    cache_key = extraction_key(user_prompt, preferences)
+    cached = get_extraction_cache().get(cache_key)
+    if cached is not None:
+        logger.info("[LLM Extract] cache hit")
+        metrics.record_cache_hit()
+        return cache_key, cached, {}
+
+    if not RULES_FAST_PATH:
+        return cache_key, None, {}
+
+    start = time.perf_counter()
+    rules = rule_extract(user_prompt)
+    if rules.is_complete(RULES_MIN_CONFIDENCE):
+        data = _normalize_data(rules.data, user_prompt, preferences)
+        metrics.record_rule_skip((time.perf_counter() - start) * 1000)
+        logger.info("[LLM Extract] rules fast path %s confidence=%s", data, rules.confidence)
+        return cache_key, data, {}
+    return cache_key, None, rules.confident_fields(RULES_MIN_CONFIDENCE)
+
+
+def _decode_completion(content: str, partial: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
     try:
         data = json.loads(content)
+        parsed = isinstance(data, dict)
     except Exception:
-        data = {}
+        parsed = False
+    if not parsed:
+        # Keep whatever fields the streaming parser managed to read, but do not cache them.
+        data = dict(partial or {})
+    return data, parsed
+
 
-    data = _normalize_data(data, user_prompt, preferences)
+def _finish_extract(
+    data: Dict[str, Any],
+    parsed: bool,
+    user_prompt: str,
+    preferences: List[str],
+    cache_key: str,
+    known: Dict[str, Any],
+) -> Dict[str, Any]:
+    # Writes the cache (possibly SQLite); async callers run it in a thread.
+    data = _normalize_data({**data, **known}, user_prompt, preferences)
     logger.info("[LLM Extract] %s", data)
+    if parsed:
+        get_extraction_cache().set(cache_key, data)
     return data
 
 
+def _is_simple_prompt(user_prompt: str) -> bool:
+    """Short prompts made of words the rules understand are routed to the small model first."""
+    max_words = get_model_router("extract").max_words
+    return len(user_prompt.split()) <= max_words and len(rule_extract(user_prompt).leftover) <= 2
+
+
+def _small_answer_ok(data: Dict[str, Any], parsed: bool, user_prompt: str, known: Dict[str, Any]) -> bool:
+    """Schema validation plus field coverage; a rejected small-model answer is escalated."""
+    if not parsed:
+        return False
+    for key, kind in _SCHEMA_FIELDS.items():
+        if key in known:
+            continue
+        value = data.get(key)
+        if kind == "string" and not isinstance(value, str):
+            return False
+        if kind == "[string]" and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            return False
+    # Fields the prompt visibly mentions (any rule signal) should come back filled.
+    rules = rule_extract(user_prompt)
+    expected = {"item"} | {f for f in REQUIRED_FIELDS if rules.confidence.get(f, 0.0) > 0}
+    merged = {**data, **known}
+    return sum(1 for f in expected if merged.get(f)) / len(expected) >= get_model_router("extract").min_coverage
+
+
+def _completion_kwargs(model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": messages,
+        "max_completion_tokens": 300,
+        "temperature": 0,
+        "top_p": 1,
+    }
+
+
+async def extract_user_requirements_async(user_prompt: str, preferences: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Non-blocking extraction; raises asyncio.TimeoutError after EXTRACT_TIMEOUT_S."""
+    preferences = preferences or []
+    cache_key, answer, known = await asyncio.to_thread(prepare_extraction, user_prompt, preferences)
+    if answer is not None:
+        return answer
+    return await extract_prepared_async(user_prompt, preferences, cache_key, known)
+
+
+async def extract_prepared_async(
+    user_prompt: str,
+    preferences: List[str],
+    cache_key: str,
+    known: Dict[str, Any],
+) -> Dict[str, Any]:
+    """LLM step for an input prepare_extraction did not answer, with its cache_key and known fields."""
+    client = _get_async_client()
+
+    def call(kwargs: Dict[str, Any]) -> Awaitable[Any]:
+        return asyncio.wait_for(client.chat.completions.create(**kwargs), timeout=EXTRACT_TIMEOUT_S)
+
+    return await _extract_with_tiers(call, user_prompt, preferences, cache_key, known)
+
+
+async def _extract_with_tiers(
+    call: Callable[[Dict[str, Any]], Awaitable[Any]],
+    user_prompt: str,
+    preferences: List[str],
+    cache_key: str,
+    known: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Tier loop shared by the async and blocking paths, which differ only in `call`
+    (completion kwargs -> awaitable response): small model first when the prompt is
+    simple, escalating to the large model on a failed call or a rejected answer.
+    """
+    router = get_model_router("extract")
+    messages = _build_messages(user_prompt, preferences, known)
+    tiers = router.tiers(_is_simple_prompt(user_prompt))
+    request_start = time.perf_counter()
+    for tier, model in tiers:
+        start = time.perf_counter()
+        try:
+            response = await call(_completion_kwargs(model, messages))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("[LLM Extract] Groq call failed (%s): %s", model, exc)
+            if tier != tiers[-1][0]:
+                router.record_escalation()
+                continue
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        get_extraction_metrics().record_llm_call()
+        router.record_call(tier, latency_ms, getattr(response, "usage", None))
+
+        data, parsed = _decode_completion(response.choices[0].message.content or "{}")
+        if tier == tiers[-1][0] or _small_answer_ok(data, parsed, user_prompt, known):
+            break
+        logger.info("[LLM Extract] %s answer rejected; escalating", model)
+        router.record_escalation()
+
+    get_extraction_metrics().record_llm_request((time.perf_counter() - request_start) * 1000, partial=bool(known))
+    return await asyncio.to_thread(_finish_extract, data, parsed, user_prompt, preferences, cache_key, known)
+
+
+def _chunk_usage(chunk: Any) -> Any:
+    # Token usage arrives on the final chunk: as `usage` when stream_options asks for it,
+    # and in Groq's own x_groq block either way.
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+async def extract_user_requirements_stream(
+    user_prompt: str, preferences: Optional[List[str]] = None
+) -> AsyncIterator[ExtractionUpdate]:
+    """
+    Streaming extraction. Yields an update each time the Groq token stream completes a
+    field, then a final update with the same data extract_user_requirements_async returns.
+    Cache hits and the rules fast path yield the final update only. If the streamed
+    small-model answer is rejected, the final update comes from the large model.
+    """
+    preferences = preferences or []
+    cache_key, answer, known = await asyncio.to_thread(prepare_extraction, user_prompt, preferences)
+    if answer is not None:
+        yield ExtractionUpdate(answer, frozenset(_SCHEMA_FIELDS), final=True)
+        return
+
+    client = _get_async_client()
+    router = get_model_router("extract")
+    messages = _build_messages(user_prompt, preferences, known)
+    tiers = router.tiers(_is_simple_prompt(user_prompt))
+    tier, model = tiers[0]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EXTRACT_TIMEOUT_S
+    start = time.perf_counter()
+    first_fields_ms: Optional[float] = None
+    parser = PartialJSONObject()
+    content: List[str] = []
+    usage: Any = None
+    reported = len(known)
+    try:
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                **_completion_kwargs(model, messages),
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}},
+            ),
+            timeout=EXTRACT_TIMEOUT_S,
+        )
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                usage = _chunk_usage(chunk) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                content.append(delta)
+                if not parser.feed(delta):
+                    continue
+                merged = {**parser.fields, **known}
+                if len(merged) == reported:
+                    # Only re-sent a field the rules already settled.
+                    continue
+                reported = len(merged)
+                if first_fields_ms is None:
+                    first_fields_ms = (time.perf_counter() - start) * 1000
+                yield ExtractionUpdate(_normalize_data(merged, user_prompt, preferences), frozenset(merged))
+        finally:
+            await stream.close()
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.exception("[LLM Extract] Groq stream failed: %s", exc)
+        raise
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    metrics = get_extraction_metrics()
+    metrics.record_llm_call()
+    router.record_call(tier, latency_ms, usage)
+    if first_fields_ms is not None:
+        metrics.record_first_fields(first_fields_ms)
+
+    data, parsed = _decode_completion("".join(content), parser.fields)
+    if len(tiers) > 1 and not _small_answer_ok(data, parsed, user_prompt, known):
+        logger.info("[LLM Extract] streamed %s answer rejected; escalating", model)
+        router.record_escalation()
+        escalated = await _llm_extract_large_async(user_prompt, preferences, cache_key, known)
+        metrics.record_llm_request((time.perf_counter() - start) * 1000, partial=bool(known))
+        yield ExtractionUpdate(escalated, frozenset(_SCHEMA_FIELDS), final=True)
+        return
+    metrics.record_llm_request(latency_ms, partial=bool(known))
+    data = await asyncio.to_thread(_finish_extract, data, parsed, user_prompt, preferences, cache_key, known)
+    yield ExtractionUpdate(data, frozenset(_SCHEMA_FIELDS), final=True)
+
+
+async def _llm_extract_large_async(
+    user_prompt: str,
+    preferences: List[str],
+    cache_key: str,
+    known: Dict[str, Any],
+) -> Dict[str, Any]:
+    router = get_model_router("extract")
+    start = time.perf_counter()
+    response = await asyncio.wait_for(
+        _get_async_client().chat.completions.create(
+            **_completion_kwargs(router.models["large"], _build_messages(user_prompt, preferences, known))
+        ),
+        timeout=EXTRACT_TIMEOUT_S,
+    )
+    latency_ms = (time.perf_counter() - start) * 1000
+    get_extraction_metrics().record_llm_call()
+    router.record_call("large", latency_ms, getattr(response, "usage", None))
+    data, parsed = _decode_completion(response.choices[0].message.content or "{}")
+    return await asyncio.to_thread(_finish_extract, data, parsed, user_prompt, preferences, cache_key, known)
+
+
+def extract_user_requirements(user_prompt: str, preferences: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Blocking variant for sync callers (no running event loop). A thin wrapper: the tier
+    loop of the async path runs on a private loop with the pooled sync client.
+    """
+    preferences = preferences or []
+    cache_key, answer, known = prepare_extraction(user_prompt, preferences)
+    if answer is not None:
+        return answer
+
+    client = _get_client()
+
+    async def call(kwargs: Dict[str, Any]) -> Any:
+        return client.chat.completions.create(**kwargs)
+
+    return asyncio.run(_extract_with_tiers(call, user_prompt, preferences, cache_key, known))
+
+
 def _normalize_data(data: Dict[str, Any], user_prompt: str, preferences: List[str]) -> Dict[str, Any]:
     normalized = {
         "budget": str(data.get("budget") or ""),
@@ -105,77 +474,5 @@ def _normalize_data(data: Dict[str, Any], user_prompt: str, preferences: List[st
 
 
 def _fallback_extract(text: str) -> Dict[str, Any]:
-    lower = text.lower()
-
-    budget = ""
-    dollar_match = re.search(r"\$\s*(\d+(?:\.\d+)?)", text)
-    if dollar_match:
-        budget = f"${dollar_match.group(1)}"
-    else:
-        trailing_dollar = re.search(r"(\d+(?:\.\d+)?)\s*\$", text)
-        if trailing_dollar:
-            budget = f"${trailing_dollar.group(1)}"
-        else:
-            budget_match = re.search(r"budget\s*(?:of|:)?\s*(\d+(?:\.\d+)?)", lower)
-            if budget_match:
-                budget = f"${budget_match.group(1)}"
-
-    deadline = ""
-    deadline_match = re.search(r"\bby\s+([a-zA-Z]+)\b", lower)
-    if deadline_match:
-        deadline = f"by {deadline_match.group(1)}"
-    else:
-        in_days = re.search(r"\b(?:in|within)\s+(\d+)\s+days?\b", lower)
-        if in_days:
-            deadline = f"{in_days.group(1)} days"
-
-    color_list = [
-        "white",
-        "black",
-        "gray",
-        "grey",
-        "red",
-        "blue",
-        "green",
-        "yellow",
-        "pink",
-        "purple",
-        "orange",
-        "brown",
-        "beige",
-    ]
-    colors = [c for c in color_list if re.search(rf"\b{re.escape(c)}\b", lower)]
-
-    style_keywords = ["sporty", "sport", "chic", "trendy", "casual", "formal", "streetwear"]
-    styles = [s for s in style_keywords if re.search(rf"\b{re.escape(s)}\b", lower)]
-
-    target = ""
-    for t in ["women", "women's", "men", "men's", "kids", "kid", "girl", "boy"]:
-        if re.search(rf"\b{re.escape(t)}\b", lower):
-            if "women" in t or "girl" in t:
-                target = "women"
-            elif "men" in t or "boy" in t:
-                target = "men"
-            else:
-                target = "kids"
-            break
-
-    size = ""
-    size_match = re.search(r"\bsize\s*([a-z0-9]{1,4})\b", lower)
-    if size_match:
-        size = size_match.group(1).upper()
-    else:
-        simple_sizes = ["xs", "s", "m", "l", "xl", "xxl"]
-        for s in simple_sizes:
-            if re.search(rf"\b{re.escape(s)}\b", lower):
-                size = s.upper()
-                break
-
-    return {
-        "budget": budget,
-        "deadline": deadline,
-        "colors": colors,
-        "style": styles,
-        "target": target,
-        "size": size,
-    }
+    data = rule_extract(text).data
+    return {k: data[k] for k in ("budget", "deadline", "colors", "style", "target", "size")}
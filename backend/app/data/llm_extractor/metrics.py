@@ -0,0 +1,82 @@
+import threading
+from typing import Any, Dict
+
+
+class ExtractionMetrics:
+    """Process-wide counters for how extraction requests were answered."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.cache_hits = 0
+            self.rule_skips = 0
+            self.llm_requests = 0
+            self.llm_calls = 0
+            self.llm_partial_requests = 0
+            self.llm_latency_ms = 0.0
+            self.stream_calls = 0
+            self.first_fields_ms = 0.0
+            self.rule_latency_ms = 0.0
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.cache_hits += 1
+
+    def record_rule_skip(self, latency_ms: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.rule_skips += 1
+            self.rule_latency_ms += latency_ms
+
+    def record_llm_call(self) -> None:
+        """One Groq completion; an escalated extraction makes one per tier tried."""
+        with self._lock:
+            self.llm_calls += 1
+
+    def record_llm_request(self, latency_ms: float, partial: bool) -> None:
+        """One extraction answered by the LLM, with its latency across every tier tried."""
+        with self._lock:
+            self.requests += 1
+            self.llm_requests += 1
+            self.llm_partial_requests += int(partial)
+            self.llm_latency_ms += latency_ms
+
+    def record_first_fields(self, latency_ms: float) -> None:
+        """Time until a streamed completion produced its first usable field."""
+        with self._lock:
+            self.stream_calls += 1
+            self.first_fields_ms += latency_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg_llm = self.llm_latency_ms / self.llm_requests if self.llm_requests else 0.0
+            avg_rule = self.rule_latency_ms / self.rule_skips if self.rule_skips else 0.0
+            avg_first = self.first_fields_ms / self.stream_calls if self.stream_calls else 0.0
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "rule_skips": self.rule_skips,
+                "llm_requests": self.llm_requests,
+                "llm_calls": self.llm_calls,
+                "llm_partial_requests": self.llm_partial_requests,
+                "llm_skip_rate": round((self.rule_skips + self.cache_hits) / self.requests, 3) if self.requests else 0.0,
+                "rule_skip_rate": round(self.rule_skips / self.requests, 3) if self.requests else 0.0,
+                "avg_llm_latency_ms": round(avg_llm, 1),
+                "avg_rule_latency_ms": round(avg_rule, 3),
+                "stream_calls": self.stream_calls,
+                "avg_first_fields_ms": round(avg_first, 1),
+                # Estimated from the running LLM average; 0 until at least one LLM call was observed.
+                "estimated_latency_saved_ms": round(self.rule_skips * max(avg_llm - avg_rule, 0.0), 1),
+            }
+
+
+_metrics = ExtractionMetrics()
+
+
+def get_extraction_metrics() -> ExtractionMetrics:
+    return _metrics
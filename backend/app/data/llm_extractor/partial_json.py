@@ -0,0 +1,87 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+
+
+def _skip(buffer: str, pos: int, chars: str) -> int:
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+class PartialJSONObject:
+    """
+    Incremental parser for a streamed top-level JSON object.
+
+    Text is fed chunk by chunk; a key/value pair is reported as soon as its value is
+    complete, so the first fields of a completion are usable before the closing brace.
+    Anything before the first '{' (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Append text; returns the fields completed by this chunk."""
+        self._buffer += chunk
+        completed: Dict[str, Any] = {}
+        while not self.closed:
+            pair = self._next_pair()
+            if pair is None:
+                break
+            key, value = pair
+            self.fields[key] = value
+            completed[key] = value
+        return completed
+
+    def _next_pair(self) -> Optional[Tuple[str, Any]]:
+        buffer = self._buffer
+        pos = self._pos
+        if not self._started:
+            start = buffer.find("{", pos)
+            if start < 0:
+                self._pos = len(buffer)
+                return None
+            self._started = True
+            self._pos = pos = start + 1
+
+        pos = _skip(buffer, pos, _WS + ",")
+        if pos >= len(buffer):
+            return None
+        if buffer[pos] == "}":
+            self.closed = True
+            self._pos = pos + 1
+            return None
+        if buffer[pos] != '"':
+            # Not an object we understand; stop reporting fields.
+            self.closed = True
+            return None
+        try:
+            key, pos = _decoder.raw_decode(buffer, pos)
+        except ValueError:
+            return None
+
+        pos = _skip(buffer, pos, _WS)
+        if pos >= len(buffer):
+            return None
+        if buffer[pos] != ":":
+            self.closed = True
+            return None
+        pos = _skip(buffer, pos + 1, _WS)
+        if pos >= len(buffer):
+            return None
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except ValueError:
+            return None
+        if end >= len(buffer):
+            # A number or literal at the very end may still be growing ("12" -> "120").
+            return None
+        self._pos = end
+        return key, value
@@ -0,0 +1,141 @@
+"""
+Tiered Groq model routing.
+
+Simple inputs go to a small, fast model first and are escalated to the large model
+only when the caller rejects the small model's output (schema or coverage check).
+Per-tier latency, token usage and escalation rate are kept for /api/llm/metrics.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+EXTRACT_LARGE_MODEL = "openai/gpt-oss-120b"
+DEFAULT_SMALL_MODEL = "llama-3.1-8b-instant"
+DEFAULT_EXPLAIN_LARGE_MODEL = "llama-3.3-70b-versatile"
+
+
+class ModelRouter:
+    """Picks the model tiers to try for one task and records how each tier performed."""
+
+    def __init__(
+        self,
+        task: str,
+        small_model: str,
+        large_model: str,
+        default_tier: str,
+        enabled: bool = True,
+        max_words: int = 20,
+        min_coverage: float = 0.75,
+    ) -> None:
+        self.task = task
+        self.models = {"small": small_model, "large": large_model}
+        # Tier used when routing is switched off (the pre-routing behaviour).
+        self.default_tier = default_tier
+        self.enabled = enabled
+        # Prompts up to max_words words (and with few unknown words) count as simple.
+        self.max_words = max_words
+        # Share of expected fields the small model must fill before its answer is accepted.
+        self.min_coverage = min_coverage
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats: Dict[str, Dict[str, float]] = {}
+            self.requests = 0
+            self.escalations = 0
+
+    def route(self, simple: bool) -> List[Tuple[str, str]]:
+        """(tier, model) pairs an input would be tried with, without counting a request."""
+        if not self.enabled:
+            return [(self.default_tier, self.models[self.default_tier])]
+        if simple and self.models["small"] != self.models["large"]:
+            return [("small", self.models["small"]), ("large", self.models["large"])]
+        return [("large", self.models["large"])]
+
+    def tiers(self, simple: bool) -> List[Tuple[str, str]]:
+        """(tier, model) pairs to try in order; later tiers are escalations."""
+        if self.enabled:
+            with self._lock:
+                self.requests += 1
+        return self.route(simple)
+
+    def record_call(self, tier: str, latency_ms: float, usage: Optional[Any] = None) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                tier, {"calls": 0, "latency_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            stats["calls"] += 1
+            stats["latency_ms"] += latency_ms
+            if usage is not None:
+                stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    def record_escalation(self) -> None:
+        with self._lock:
+            self.escalations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {}
+            for tier, stats in self._stats.items():
+                calls = stats["calls"]
+                tiers[tier] = {
+                    "model": self.models.get(tier),
+                    "calls": calls,
+                    "avg_latency_ms": round(stats["latency_ms"] / calls, 1) if calls else 0.0,
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                }
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": round(self.escalations / self.requests, 3) if self.requests else 0.0,
+                "tiers": tiers,
+            }
+
+
+def _build_routers() -> Dict[str, ModelRouter]:
+    # Read when the routers are first used, after the entry point has loaded the environment.
+    enabled = os.environ.get("LLM_ROUTING", "1").lower() not in {"0", "false", "no"}
+    return {
+        "extract": ModelRouter(
+            "extract",
+            os.environ.get("LLM_EXTRACT_SMALL_MODEL", DEFAULT_SMALL_MODEL),
+            EXTRACT_LARGE_MODEL,
+            default_tier="large",
+            enabled=enabled,
+            max_words=int(os.environ.get("LLM_ROUTER_MAX_WORDS", 20)),
+            min_coverage=float(os.environ.get("LLM_ROUTER_MIN_COVERAGE", 0.75)),
+        ),
+        "explain": ModelRouter(
+            "explain",
+            os.environ.get("GROQ_MODEL", DEFAULT_SMALL_MODEL),
+            os.environ.get("GROQ_LARGE_MODEL", DEFAULT_EXPLAIN_LARGE_MODEL),
+            default_tier="small",
+            enabled=enabled,
+        ),
+    }
+
+
+_routers: Optional[Dict[str, ModelRouter]] = None
+_routers_lock = threading.Lock()
+
+
+def _get_routers() -> Dict[str, ModelRouter]:
+    global _routers
+    if _routers is None:
+        with _routers_lock:
+            if _routers is None:
+                _routers = _build_routers()
+    return _routers
+
+
+def get_model_router(task: str) -> ModelRouter:
+    return _get_routers()[task]
+
+
+def routing_snapshot() -> Dict[str, Any]:
+    return {task: router.snapshot() for task, router in _get_routers().items()}
@@ -0,0 +1,133 @@
+"""
+Rule-based first pass over a shopping prompt.
+
+Every field comes with a confidence in [0, 1]; when all REQUIRED_FIELDS are at or
+above the threshold the extractor can answer without calling the LLM.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from app.data.query_understanding import parse_prompt, unmatched_words
+
+REQUIRED_FIELDS = ("item", "budget", "deadline", "target", "size")
+
+_CURRENCY_BEFORE_RE = re.compile(r"([$€£])\s*(\d+(?:\.\d+)?)")
+_CURRENCY_AFTER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([$€£]|dollars?\b|usd\b|eur\b|euros?\b|dt\b|tnd\b)", re.IGNORECASE)
+_BUDGET_WORD_RE = re.compile(r"budget\s*(?:of|:|is)?\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+_UNDER_RE = re.compile(r"\b(?:under|below|less than|max(?:imum)?|up to)\s+(\d+(?:\.\d+)?)\b", re.IGNORECASE)
+_IN_DAYS_RE = re.compile(r"\b(?:in|within|under|en|sous)\s+(\d+)\s+(days?|weeks?|jours?|semaines?)\b", re.IGNORECASE)
+_DAYS_BARE_RE = re.compile(r"\b(\d+)\s+(days?|weeks?|jours?|semaines?)\b", re.IGNORECASE)
+_UNITS = {"day": "days", "days": "days", "jour": "days", "jours": "days",
+          "week": "weeks", "weeks": "weeks", "semaine": "weeks", "semaines": "weeks"}
+_BY_RE = re.compile(r"\bby\s+([a-z]+)\b", re.IGNORECASE)
+_WEEKDAYS = {"monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", "tomorrow", "tonight", "weekend"}
+
+# Words that carry no extraction signal on their own.
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "for", "with", "of", "to", "in", "on", "at", "by", "from", "within",
+    "i", "im", "i'm", "me", "my", "we", "our", "want", "need", "would", "like", "looking", "look", "find",
+    "get", "buy", "show", "some", "any", "please", "pair", "new", "size", "taille", "under", "below",
+    "less", "than", "max", "maximum", "up", "budget", "is", "days", "day", "weeks", "week", "dollars",
+    "dollar", "usd", "eur", "euro", "euros", "pour", "une", "un", "de", "en", "moins", "jours", "jour",
+    "semaine", "semaines", "sous",
+    "deliver", "delivered", "delivery", "shipping", "ship", "arrive", "next",
+}
+
+
+@dataclass
+class RuleExtraction:
+    data: Dict[str, Any]
+    confidence: Dict[str, float]
+    leftover: List[str] = field(default_factory=list)
+
+    def confident_fields(self, threshold: float) -> Dict[str, Any]:
+        return {k: self.data[k] for k, c in self.confidence.items() if c >= threshold and self.data.get(k)}
+
+    def missing_fields(self, threshold: float) -> List[str]:
+        return [k for k in REQUIRED_FIELDS if self.confidence.get(k, 0.0) < threshold]
+
+    def is_complete(self, threshold: float) -> bool:
+        return not self.missing_fields(threshold)
+
+
+def _budget(text: str) -> tuple[str, float]:
+    # Keep the currency as written ("£40", "50€", "100 EUR"); only bare amounts get "$".
+    match = _CURRENCY_BEFORE_RE.search(text)
+    if match:
+        return f"{match.group(1)}{match.group(2)}", 1.0
+    match = _CURRENCY_AFTER_RE.search(text)
+    if match:
+        unit = match.group(2)
+        return (f"{match.group(1)}{unit}" if len(unit) == 1 else f"{match.group(1)} {unit}"), 1.0
+    match = _BUDGET_WORD_RE.search(text)
+    if match:
+        return f"${match.group(1)}", 0.95
+    match = _UNDER_RE.search(text)
+    if match:
+        # "under 30" without a currency could also be a size or a delivery window.
+        return f"${match.group(1)}", 0.6
+    return "", 0.0
+
+
+def _duration(count: str, unit: str) -> str:
+    unit = _UNITS[unit.lower()]
+    return f"{count} {unit[:-1] if int(count) == 1 else unit}"
+
+
+def _deadline(text: str) -> tuple[str, float]:
+    match = _IN_DAYS_RE.search(text)
+    if match:
+        return _duration(match.group(1), match.group(2)), 1.0
+    match = _BY_RE.search(text)
+    if match:
+        word = match.group(1).lower()
+        return f"by {word}", 0.9 if word in _WEEKDAYS else 0.4
+    match = _DAYS_BARE_RE.search(text)
+    if match:
+        return _duration(match.group(1), match.group(2)), 0.7
+    return "", 0.0
+
+
+def _size(text: str) -> tuple[str, float]:
+    size = parse_prompt(text).size
+    if not size:
+        return "", 0.0
+    if re.search(r"\b(?:size|taille)\b", text, re.IGNORECASE):
+        return size, 1.0
+    # Bare "s"/"m"/"l" are easy to misread; longer labels (XL, XXS) are not.
+    return size, 0.9 if len(size) > 1 else 0.7
+
+
+def rule_extract(text: str) -> RuleExtraction:
+    parsed = parse_prompt(text)
+    budget, budget_conf = _budget(text)
+    deadline, deadline_conf = _deadline(text)
+    size, size_conf = _size(text)
+    leftover = [w for w in unmatched_words(text) if w not in _STOPWORDS and w not in _WEEKDAYS]
+
+    item = " and ".join(parsed.items)
+    # Unknown words ("waterproof", "linen") are qualifiers the LLM would keep.
+    item_conf = 0.0 if not item else (1.0 if not leftover else 0.5)
+
+    data = {
+        "budget": budget,
+        "style": list(parsed.styles),
+        "deadline": deadline,
+        "colors": list(parsed.colors),
+        "item": item,
+        "constraints": [],
+        "target": parsed.target,
+        "size": size,
+    }
+    confidence = {
+        "budget": budget_conf,
+        "deadline": deadline_conf,
+        "item": item_conf,
+        "target": 1.0 if parsed.target else 0.0,
+        "size": size_conf,
+        "colors": 1.0 if parsed.colors else 0.0,
+        "style": 1.0 if parsed.styles else 0.0,
+    }
+    return RuleExtraction(data=data, confidence=confidence, leftover=leftover)
@@ -1,11 +1,14 @@
 from .config import PinterestConfig
 from .oauth import PinterestOAuthService
+from .persona_cache import get_cached_persona, set_cached_persona, invalidate_persona
 from .store import (
     get_connection_status,
     get_access_token,
     get_profile,
     get_zep_user_id,
     get_zep_thread_id,
+    get_persona_version,
+    bump_persona_version,
     set_connected,
     set_disconnected,
     set_access_token,
@@ -22,6 +25,11 @@ __all__ = [
     "get_profile",
     "get_zep_user_id",
     "get_zep_thread_id",
+    "get_persona_version",
+    "bump_persona_version",
+    "get_cached_persona",
+    "set_cached_persona",
+    "invalidate_persona",
     "set_connected",
     "set_disconnected",
     "set_access_token",
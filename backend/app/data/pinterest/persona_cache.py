@@ -0,0 +1,44 @@
+import copy
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .store import bump_persona_version, get_persona_version
+
+# Zep persona per thread id. Entries expire after ZEP_PERSONA_TTL seconds (default 300) and
+# are dropped as soon as the persona version moves (new summaries synced, thread changed, disconnect).
+_lock = threading.Lock()
+# thread id -> (expires_at, persona_version, persona)
+_personas: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+
+
+def get_cached_persona(thread_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        entry = _personas.get(thread_id)
+        if entry is None:
+            return None
+        expires_at, version, persona = entry
+        if expires_at < time.monotonic() or version != get_persona_version():
+            _personas.pop(thread_id, None)
+            return None
+        return copy.deepcopy(persona)
+
+
+def set_cached_persona(thread_id: str, persona: Dict[str, Any], version: int) -> None:
+    """Store a persona read while the persona version was `version` (a later bump makes it stale)."""
+    with _lock:
+        if version != get_persona_version():
+            return
+        ttl = float(os.environ.get("ZEP_PERSONA_TTL", 300))
+        _personas[thread_id] = (time.monotonic() + ttl, version, copy.deepcopy(persona))
+
+
+def invalidate_persona(thread_id: Optional[str] = None) -> int:
+    """Drop the cached persona (all threads when thread_id is None) and bump the persona version."""
+    with _lock:
+        if thread_id is None:
+            _personas.clear()
+        else:
+            _personas.pop(thread_id, None)
+    return bump_persona_version()
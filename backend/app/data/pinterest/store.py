@@ -9,6 +9,8 @@ _connection_state: Dict[str, Any] = {
     "profile": None,
     "zep_user_id": None,
     "zep_thread_id": None,
+    # Bumped whenever the persona source changes (new thread, new summaries written).
+    "persona_version": 0,
 }
 
 
@@ -24,6 +26,7 @@ def set_disconnected() -> None:
     _connection_state["profile"] = None
     _connection_state["zep_user_id"] = None
     _connection_state["zep_thread_id"] = None
+    bump_persona_version()
 
 
 def set_access_token(token: str) -> None:
@@ -39,9 +42,16 @@ def set_zep_user(user_id: str) -> None:
 
 
 def set_zep_thread(thread_id: str) -> None:
+    if _connection_state["zep_thread_id"] != thread_id:
+        bump_persona_version()
     _connection_state["zep_thread_id"] = thread_id
 
 
+def bump_persona_version() -> int:
+    _connection_state["persona_version"] += 1
+    return _connection_state["persona_version"]
+
+
 def get_connection_status() -> Dict[str, Optional[str]]:
     return {
         "connected": bool(_connection_state["connected"]),
@@ -65,3 +75,7 @@ def get_zep_user_id() -> Optional[str]:
 
 def get_zep_thread_id() -> Optional[str]:
     return _connection_state["zep_thread_id"]
+
+
+def get_persona_version() -> int:
+    return _connection_state["persona_version"]
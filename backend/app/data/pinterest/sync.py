@@ -3,6 +3,7 @@ from typing import Any, Dict, List, Optional
 from app.data.ZEP_mcp import update_user_persona_with_outfit_summaries
 from app.data.pinterest.api import PinterestAPIService, extract_pin_image_url
 from app.data.pinterest.filter import filter_pinterest_pins, summarize_outfit
+from app.data.pinterest.persona_cache import invalidate_persona
 import logging
 
 logger = logging.getLogger(__name__)
@@ -78,6 +79,9 @@ def sync_pinterest_to_zep(
         user_email=user_email,
         thread_id=thread_id,
     )
+    if success:
+        # New summaries change the Zep context; refetch the persona on the next ranking.
+        invalidate_persona(thread_id)
 
     return {
         "success": bool(success),
@@ -1,3 +1,13 @@
+import dataclasses
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from app.data.catalog import BM25Index, CatalogBackend, CatalogQuery, MemoryCatalog, SQLiteCatalog
+
+logger = logging.getLogger(__name__)
+
 # Product image: full URL. Product url: link to retailer site (Zara, Stradivarius).
 PRODUCTS = [
      {
@@ -60,5 +70,78 @@ PRODUCTS = [
     },
 ]
 
+# The products above are the built-in demo catalog. Set CATALOG_PATH to a SQLite catalog
+# file (app.data.catalog.build_sqlite_catalog) to serve a retailer feed instead.
+_catalog: Optional[CatalogBackend] = None
+# Bumped whenever the catalog is replaced, so anything derived from it (precomputed
+# ranking views) can tell it is stale.
+_catalog_version = 0
+
+
+def get_catalog() -> CatalogBackend:
+    global _catalog
+    if _catalog is None:
+        path = os.environ.get("CATALOG_PATH")
+        if path:
+            _catalog = SQLiteCatalog(path)
+            logger.info("[Catalog] loaded %s products from %s", len(_catalog), path)
+        else:
+            _catalog = MemoryCatalog(PRODUCTS)
+    return _catalog
+
+
 def get_products():
-    return PRODUCTS
+    return get_catalog().all()
+
+
+_search_index = BM25Index()
+_search_index_version: Optional[int] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> BM25Index:
+    """BM25 index over the current catalog; after a catalog change only changed products are re-indexed."""
+    global _search_index_version
+    with _search_index_lock:
+        if _search_index_version != _catalog_version:
+            version = _catalog_version
+            stats = _search_index.sync(get_catalog().all())
+            _search_index_version = version
+            logger.info("[Catalog] search index synced to version %s: %s", version, stats)
+    return _search_index
+
+
+def rank_candidates(query: CatalogQuery, limit: int) -> List[Tuple[str, float]]:
+    """
+    Best `limit` (product id, relevance) pairs for query.text among the products passing
+    its filters. A catalog that ranks text itself (SQLite FTS5) answers in one query
+    without loading its rows; otherwise the BM25 index ranks within the filtered ids.
+    """
+    catalog = get_catalog()
+    hits = catalog.rank_text(query, limit)
+    if hits is not None:
+        return hits
+    filters = dataclasses.replace(query, text="")
+    allowed = None if filters.is_empty() else {p["id"] for p in catalog.search(filters)}
+    return get_search_index().search(query.text, limit, allowed)
+
+
+def warm_search_index() -> None:
+    """Build the BM25 index at startup, unless the catalog ranks text itself."""
+    if get_catalog().rank_text(CatalogQuery(), 0) is None:
+        get_search_index()
+
+
+def get_catalog_version() -> int:
+    return _catalog_version
+
+
+def set_catalog(catalog: CatalogBackend) -> int:
+    global _catalog, _catalog_version
+    _catalog = catalog
+    _catalog_version += 1
+    return _catalog_version
+
+
+def set_products(products: list[dict]) -> int:
+    return set_catalog(MemoryCatalog(products))
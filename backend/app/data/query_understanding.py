@@ -0,0 +1,278 @@
+"""
+Prompt understanding shared by the agent and cart routers.
+
+Vocabularies (items, colors, styles, targets, sizes) are compiled once into
+alternation regexes; synonym and French/English variants map to one canonical
+term (noir -> black, tee -> t-shirt). Parsed prompts are memoized.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+from app.schemas.agent import SearchItem
+
+
+# --- Vocabularies (surface form -> canonical) ---------------------------------
+
+ITEM_SYNONYMS: dict[str, str] = {
+    "t-shirt": "t-shirt",
+    "t shirt": "t-shirt",
+    "tshirt": "t-shirt",
+    "tee": "t-shirt",
+    "tee-shirt": "t-shirt",
+    "tee shirt": "t-shirt",
+    "shirt": "shirt",
+    "chemise": "shirt",
+    "blouse": "shirt",
+    "pants": "pants",
+    "trousers": "pants",
+    "pantalon": "pants",
+    "jeans": "jeans",
+    "jean": "jeans",
+    "shorts": "shorts",
+    "sweatpants": "pants",
+    "joggers": "pants",
+    "hoodie": "hoodie",
+    "sweatshirt": "hoodie",
+    "sweater": "sweater",
+    "jumper": "sweater",
+    "pullover": "sweater",
+    "jacket": "jacket",
+    "veste": "jacket",
+    "blouson": "jacket",
+    "dress": "dress",
+    "robe": "dress",
+    "skirt": "skirt",
+    "jupe": "skirt",
+    "shoes": "shoes",
+    "chaussures": "shoes",
+    "sneakers": "sneakers",
+    "baskets": "sneakers",
+    "trainers": "sneakers",
+    "boots": "boots",
+    "bottes": "boots",
+    "bag": "bag",
+    "handbag": "bag",
+    "sac": "bag",
+}
+
+# Canonical color -> English and French names for it. Shades fold into their base color
+# (navy -> blue) so a prompt, a persona and a retailer's variant name all agree;
+# COLOR_SYNONYMS is the surface form -> canonical direction used for matching.
+COLOR_FAMILIES: dict[str, tuple[str, ...]] = {
+    "black": ("noir", "noire", "onyx", "ebony"),
+    "white": ("blanc", "blanche", "ivory", "ivoire", "cream", "creme", "crème", "ecru", "off-white"),
+    "grey": ("gray", "gris", "grise", "charcoal", "anthracite", "silver", "argent"),
+    "blue": ("bleu", "bleue", "navy", "marine", "cobalt", "azure", "indigo"),
+    "red": ("rouge", "burgundy", "bordeaux", "crimson", "scarlet", "wine"),
+    "green": ("vert", "verte", "olive", "khaki", "kaki", "sage", "emerald"),
+    "beige": ("camel", "sand", "sable", "taupe", "nude", "tan"),
+    "brown": ("marron", "brun", "brune", "chocolate", "chocolat", "cognac", "caramel"),
+    "pink": ("rose", "fuchsia", "blush"),
+    "yellow": ("jaune", "mustard", "moutarde", "gold", "doré"),
+    "orange": ("rust", "rouille", "coral", "corail"),
+    "purple": ("violet", "violette", "lilac", "lilas", "mauve", "plum", "prune"),
+}
+
+COLOR_SYNONYMS: dict[str, str] = {
+    name: canonical for canonical, names in COLOR_FAMILIES.items() for name in (canonical, *names)
+}
+
+STYLE_SYNONYMS: dict[str, str] = {
+    "sporty": "sporty",
+    "sport": "sporty",
+    "athletic": "sporty",
+    "chic": "chic",
+    "elegant": "chic",
+    "trendy": "trendy",
+    "casual": "casual",
+    "decontracte": "casual",
+    "décontracté": "casual",
+    "formal": "formal",
+    "streetwear": "streetwear",
+    "minimalist": "minimalist",
+    "minimaliste": "minimalist",
+}
+
+TARGET_SYNONYMS: dict[str, str] = {
+    "women": "women",
+    "women's": "women",
+    "womens": "women",
+    "woman": "women",
+    "ladies": "women",
+    "femme": "women",
+    "femmes": "women",
+    "girl": "women",
+    "girls": "women",
+    "men": "men",
+    "men's": "men",
+    "mens": "men",
+    "man": "men",
+    "homme": "men",
+    "hommes": "men",
+    "boy": "men",
+    "boys": "men",
+    "kids": "kids",
+    "kid": "kids",
+    "children": "kids",
+    "enfant": "kids",
+    "enfants": "kids",
+}
+
+SIZE_TERMS = ["xxs", "xs", "s", "m", "l", "xl", "xxl", "xxxl"]
+
+
+def _alternation(terms: Iterable[str], suffix: str = "") -> re.Pattern:
+    # Longest first so "t-shirt" wins over "shirt" at the same position.
+    ordered = sorted({t.lower() for t in terms}, key=len, reverse=True)
+    body = "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in ordered)
+    return re.compile(rf"(?<![\w'’])(?:{body}){suffix}(?![\w'’])", re.IGNORECASE)
+
+
+_ITEM_RE = _alternation(ITEM_SYNONYMS, suffix=r"(?:e?s)?")
+_COLOR_RE = _alternation(COLOR_SYNONYMS, suffix=r"s?")
+_STYLE_RE = _alternation(STYLE_SYNONYMS)
+_TARGET_RE = _alternation(TARGET_SYNONYMS)
+_SIZE_LABELLED_RE = re.compile(r"\b(?:size|taille)\s*:?\s*([a-z0-9]{1,4})\b", re.IGNORECASE)
+_SIZE_BARE_RE = _alternation(SIZE_TERMS)
+_FILLER_RE = re.compile(r"\bunder\b|\bby\b|\bin\b|\bwithin\b")
+_PRICE_RE = re.compile(r"\$\s*\d+(?:\.\d+)?|\d+\s*\$")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _canonical(surface: str, table: dict[str, str]) -> str | None:
+    key = _SPACES_RE.sub(" ", surface.lower().replace("’", "'"))
+    if key in table:
+        return table[key]
+    for plural in ("es", "s"):
+        if key.endswith(plural) and key[: -len(plural)] in table:
+            return table[key[: -len(plural)]]
+    return None
+
+
+def _collect(pattern: re.Pattern, table: dict[str, str], text: str) -> tuple[str, ...]:
+    found: list[str] = []
+    for match in pattern.finditer(text):
+        canonical = _canonical(match.group(0), table)
+        if canonical and canonical not in found:
+            found.append(canonical)
+    return tuple(found)
+
+
+# --- Parsed prompt ------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    items: tuple[str, ...]
+    colors: tuple[str, ...]
+    styles: tuple[str, ...]
+    target: str
+    size: str
+
+
+@lru_cache(maxsize=4096)
+def parse_prompt(text: str) -> ParsedQuery:
+    targets = _collect(_TARGET_RE, TARGET_SYNONYMS, text)
+    size = ""
+    labelled = _SIZE_LABELLED_RE.search(text)
+    if labelled:
+        size = labelled.group(1).upper()
+    else:
+        bare = _SIZE_BARE_RE.search(text)
+        if bare:
+            size = bare.group(0).upper()
+    return ParsedQuery(
+        items=_collect(_ITEM_RE, ITEM_SYNONYMS, text),
+        colors=_collect(_COLOR_RE, COLOR_SYNONYMS, text),
+        styles=_collect(_STYLE_RE, STYLE_SYNONYMS, text),
+        target=targets[0] if targets else "",
+        size=size,
+    )
+
+
+_WORD_RE = re.compile(r"[a-zà-ÿ][a-zà-ÿ'’-]*", re.IGNORECASE)
+
+
+def unmatched_words(text: str) -> list[str]:
+    """Words left after removing every item/color/style/target/size vocabulary match."""
+    stripped = text
+    for pattern in (_ITEM_RE, _COLOR_RE, _STYLE_RE, _TARGET_RE, _SIZE_LABELLED_RE, _SIZE_BARE_RE):
+        stripped = pattern.sub(" ", stripped)
+    return [w.lower() for w in _WORD_RE.findall(stripped)]
+
+
+def infer_items(text: str) -> list[str]:
+    """Canonical item names in prompt order (e.g. 'black tee and jeans' -> ['t-shirt', 'jeans'])."""
+    return list(parse_prompt(text).items)
+
+
+def infer_item(text: str) -> str:
+    items = parse_prompt(text).items
+    return items[0] if items else ""
+
+
+def canonical_target(value: str) -> str:
+    value = (value or "").strip().lower()
+    return TARGET_SYNONYMS.get(value, value)
+
+
+def detect_target(*texts: str) -> str:
+    for text in texts:
+        if text:
+            target = parse_prompt(text).target
+            if target:
+                return target
+    return ""
+
+
+@lru_cache(maxsize=1024)
+def _terms_pattern(terms: tuple[str, ...]) -> re.Pattern | None:
+    if not terms:
+        return None
+    body = "|".join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf"\b(?:{body})\b")
+
+
+def clean_item_text(item: str, colors: list[str], style_list: list[str], target: str) -> str:
+    """Strip target, colors, styles, filler words and prices from an item phrase."""
+    return _clean_item_text(item, tuple(t.lower() for t in [target, *colors, *style_list] if t))
+
+
+@lru_cache(maxsize=4096)
+def _clean_item_text(item: str, terms: tuple[str, ...]) -> str:
+    text = _TARGET_RE.sub("", item.lower())
+    dynamic = _terms_pattern(terms)
+    if dynamic is not None:
+        text = dynamic.sub("", text)
+    text = _FILLER_RE.sub("", text)
+    text = _PRICE_RE.sub("", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def plan_search_items(
+    infer_text: str,
+    item_text: str,
+    colors: list[str],
+    style_list: list[str],
+    target: str,
+    size: str,
+    color: str,
+) -> tuple[list[SearchItem], str]:
+    """
+    Turn an extracted prompt into SearchItem specs.
+    Returns (specs, shared_color); specs is empty when nothing usable was found.
+    """
+    names = infer_items(infer_text)
+    if len(colors) > 1 and len(names) > 1:
+        color = ""
+    if names:
+        specs = [
+            SearchItem(name=name, color=colors[idx] if idx < len(colors) else "", size=size)
+            for idx, name in enumerate(names)
+        ]
+        return specs, color
+    final_item = clean_item_text(item_text, colors, style_list, target) or item_text
+    return ([SearchItem(name=final_item, color=color, size=size)] if final_item else []), color
@@ -0,0 +1,34 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any
+
+# Memoized cart rankings, keyed on (extract signature, results content hash, persona version).
+# Any change to one of those parts produces a new key, so stale entries simply stop being hit
+# and fall out of the LRU window.
+_MAX_ENTRIES = 32
+_ranking_cache: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def results_content_hash(results: list[dict[str, Any]]) -> str:
+    raw = json.dumps(results, sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def ranking_cache_key(extract_signature: str, results: list[dict[str, Any]], persona_version: int) -> str:
+    extract_hash = hashlib.sha1(extract_signature.encode("utf-8")).hexdigest()
+    return f"{extract_hash}:{results_content_hash(results)}:{persona_version}"
+
+
+def get_cached_ranking(key: str) -> Any | None:
+    value = _ranking_cache.get(key)
+    if value is not None:
+        _ranking_cache.move_to_end(key)
+    return value
+
+
+def set_cached_ranking(key: str, value: Any) -> None:
+    _ranking_cache[key] = value
+    _ranking_cache.move_to_end(key)
+    while len(_ranking_cache) > _MAX_ENTRIES:
+        _ranking_cache.popitem(last=False)
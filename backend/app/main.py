@@ -1,12 +1,21 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.data.llm_extractor import close_clients as close_llm_clients
+from app.data.products import warm_search_index
+from app.middleware import CompressionMiddleware, PrettyJSONMiddleware
+from app.responses import FastJSONResponse
 from app.routers import agent, budget, cart, checkout, llm, pinterest, products, tryon, ranking
+from app.services.catalog_views import warm_catalog_views
+from app.services.explanations import close_explanations
+from app.services.ranking_service import ensure_zep_context_template
 
 load_dotenv()  # load .env so SERPER_API_KEY and PORT are available
 
@@ -28,7 +37,24 @@ logging.getLogger("app.data.ZEP_mcp.pinterest_sync").setLevel(logging.WARNING)
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
-app = FastAPI(title="Agentic Cart API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Create the Zep context template once instead of on every persona lookup.
+    await asyncio.to_thread(ensure_zep_context_template)
+    # Build the catalog search index and precompute the ranking views in the background;
+    # requests never wait for it.
+    warming = asyncio.gather(
+        asyncio.to_thread(warm_search_index),
+        asyncio.to_thread(warm_catalog_views),
+        return_exceptions=True,
+    )
+    yield
+    await warming
+    await close_llm_clients()
+    await asyncio.to_thread(close_explanations)
+
+
+app = FastAPI(title="Agentic Cart API", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
@@ -38,6 +64,11 @@ async def validation_exception_handler(request, exc):
         content={"detail": exc.errors(), "body": exc.body},
     )
 
+app.add_middleware(PrettyJSONMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("COMPRESSION_MIN_BYTES", 1024)),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
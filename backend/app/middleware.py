@@ -0,0 +1,127 @@
+import gzip
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.responses import pretty_json
+
+try:
+    import brotli  # type: ignore
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+    brotli = None  # type: ignore
+
+_TRUTHY = {"1", "true", "yes"}
+# Streamed bodies (NDJSON, SSE) are passed through untouched so lines are not held back.
+_STREAMING_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+class PrettyJSONMiddleware:
+    """Turn on indented JSON for the current request when ?pretty=1 is passed."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or b"pretty" not in scope.get("query_string", b""):
+            await self.app(scope, receive, send)
+            return
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("pretty", [])
+        token = pretty_json.set(bool(values) and values[-1].lower() in _TRUTHY)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pretty_json.reset(token)
+
+
+def _negotiate_encoding(accept_encoding: str) -> str | None:
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    if HAS_BROTLI and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip for complete (non-streamed) responses of at least minimum_size bytes.
+    Brotli is used when the client accepts it and the brotli package is installed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Message | None = None
+        self.passthrough = False
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.middleware.brotli_quality)
+        return gzip.compress(body, compresslevel=self.middleware.gzip_level)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(_STREAMING_TYPES):
+                self.passthrough = True
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.middleware.minimum_size:
+            # Streaming or small body: send as-is.
+            self.passthrough = True
+            await self.downstream(self.start_message)
+            await self.downstream(message)
+            return
+
+        compressed = self._compress(body)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        # A strong ETag promises byte-identical bodies; the encoded body is not the one it was computed for.
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        await self.downstream(self.start_message)
+        await self.downstream({"type": "http.response.body", "body": compressed, "more_body": False})
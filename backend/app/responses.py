@@ -0,0 +1,36 @@
+import json
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # type: ignore
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None  # type: ignore
+
+# Set per request by PrettyJSONMiddleware when the caller passes ?pretty=1.
+pretty_json: ContextVar[bool] = ContextVar("pretty_json", default=False)
+
+
+def dumps_json(content: Any, pretty: bool = False) -> bytes:
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(content, option=option)
+        except TypeError:
+            pass
+    if pretty:
+        return json.dumps(content, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Compact orjson-backed JSON response; indented only when ?pretty=1 is set."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content, pretty=pretty_json.get())
@@ -1,90 +1,21 @@
-import json
 import os
-import re
+from functools import partial
 
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse, Response
 
 from app.data.agent import get_agent_logs
-from app.data.llm_extractor.extractor import extract_user_requirements
+from app.data.llm_extractor import extract_user_requirements_async
+from app.data.query_understanding import canonical_target, detect_target, plan_search_items
 from app.data.search_cache import set_last_search
 from app.schemas.agent import SearchItem, SearchRequest, SearchResultItem
 from app.services.RetailProduct import search_products
+from app.services.extract_search import search_while_extracting
 from app.services.RetailProduct.search import _serper_search, _serper_shopping, _tavily_search
 
 router = APIRouter(prefix="/api/agent", tags=["agent"])
 
-
-def _infer_item_from_prompt(prompt: str) -> str:
-    text = prompt.lower()
-    keywords = [
-        "t-shirt",
-        "tshirt",
-        "tee",
-        "shirt",
-        "pants",
-        "jeans",
-        "shorts",
-        "hoodie",
-        "sweater",
-        "jacket",
-        "dress",
-        "skirt",
-        "shoes",
-        "sneakers",
-        "boots",
-        "bag",
-    ]
-    for k in keywords:
-        if k in text:
-            return "t-shirt" if k in {"tshirt", "tee"} else k
-    return ""
-
-
-def _infer_items_from_prompt(prompt: str) -> list[str]:
-    text = prompt.lower()
-    keywords = [
-        "t-shirt",
-        "tshirt",
-        "tee",
-        "shirt",
-        "pants",
-        "jeans",
-        "shorts",
-        "hoodie",
-        "sweater",
-        "jacket",
-        "dress",
-        "skirt",
-        "shoes",
-        "sneakers",
-        "boots",
-        "bag",
-    ]
-    items: list[str] = []
-    for k in keywords:
-        if k in text:
-            normalized = "t-shirt" if k in {"tshirt", "tee"} else k
-            if normalized == "shirt" and "t-shirt" in items:
-                continue
-            if normalized not in items:
-                items.append(normalized)
-    return items
-
-
-def _clean_item_text(item: str, colors: list[str], style_list: list[str], target: str) -> str:
-    text = item.lower()
-    for t in [target, "women", "women's", "men", "men's", "kids", "kid", "girl", "boy"]:
-        if t:
-            text = re.sub(rf"\b{re.escape(t)}\b", "", text)
-    for c in colors:
-        text = re.sub(rf"\b{re.escape(c.lower())}\b", "", text)
-    for s in style_list:
-        text = re.sub(rf"\b{re.escape(s.lower())}\b", "", text)
-    text = re.sub(r"\bunder\b|\bby\b|\bin\b|\bwithin\b", "", text)
-    text = re.sub(r"\$\s*\d+(?:\.\d+)?|\d+\s*\$", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+# Stream the extraction and start searching as soon as item and target are known.
+STREAM_EXTRACTION = os.environ.get("LLM_EXTRACT_STREAM", "1").lower() not in {"0", "false", "no"}
 
 
 @router.get("/logs")
@@ -164,46 +95,46 @@ async def tavily_test(q: str = "blue t-shirt women"):
         }
 
 
-@router.post("/search", response_class=JSONResponse)
+def _query_from_extract(request: SearchRequest, extracted: dict) -> dict:
+    """search_products kwargs for an (possibly partial) extract, falling back to the request fields."""
+    style_list = extracted.get("style") or []
+    colors = extracted.get("colors") or []
+    item = (extracted.get("item") or "").strip()
+    constraints = " ".join(extracted.get("constraints") or []).lower()
+    target = canonical_target(extracted.get("target") or "") or detect_target(constraints, request.prompt)
+    color = colors[0] if colors else request.color
+    size = (extracted.get("size") or request.size).strip()
+
+    specs, color = plan_search_items(request.prompt, item, colors, style_list, target, size, color)
+    return {
+        "budget": extracted.get("budget") or request.budget,
+        "deadline": extracted.get("deadline") or request.deadline,
+        "size": size,
+        "style": " ".join(style_list) if style_list else request.style,
+        "target": target,
+        "color": color,
+        "items": specs or request.items,
+    }
+
+
+@router.post("/search")
 async def agent_search(request: SearchRequest):
     """
     Intelligent shopping agent: search for products matching budget, deadline,
     size, and style. Returns structured JSON: query echo, results grouped by item, totals.
     """
     if request.prompt:
-        extracted = extract_user_requirements(request.prompt, request.preferences)
-        style_list = extracted.get("style") or []
-        colors = extracted.get("colors") or []
-        item = (extracted.get("item") or "").strip()
-        constraints = " ".join(extracted.get("constraints") or []).lower()
-        target = (extracted.get("target") or "").strip().lower()
-        if not target:
-            for t in ["women", "men", "kids", "women's", "men's", "girl", "boy"]:
-                if t in constraints or t in request.prompt.lower():
-                    target = "women" if "women" in t or "girl" in t else "men" if "men" in t or "boy" in t else "kids"
-                    break
-
-        budget = extracted.get("budget") or request.budget
-        deadline = extracted.get("deadline") or request.deadline
-        style = " ".join(style_list) if style_list else request.style
-        inferred_items = _infer_items_from_prompt(request.prompt)
-        color = colors[0] if colors else request.color
-        if len(colors) > 1 and len(inferred_items) > 1:
-            color = ""
-        size = (extracted.get("size") or request.size).strip()
-
-        cleaned_item = _clean_item_text(item, colors, style_list, target)
-        inferred = _infer_item_from_prompt(request.prompt)
-        final_item = inferred or cleaned_item or item
-        if inferred_items:
-            specs: list[SearchItem] = []
-            for idx, name in enumerate(inferred_items):
-                item_color = colors[idx] if idx < len(colors) else ""
-                specs.append(SearchItem(name=name, color=item_color, size=size))
-            items = specs
+        build_query = partial(_query_from_extract, request)
+        if STREAM_EXTRACTION:
+            _extracted, query, results, _debug = await search_while_extracting(
+                request.prompt, request.preferences, build_query
+            )
         else:
-            final_item = inferred or cleaned_item or item
-            items = [SearchItem(name=final_item, color=color, size=size)] if final_item else request.items
+            extracted = await extract_user_requirements_async(request.prompt, request.preferences)
+            query = build_query(extracted)
+            results, _debug = await search_products(**query)
+        budget, deadline, size = query["budget"], query["deadline"], query["size"]
+        style, target, color, items = query["style"], query["target"], query["color"], query["items"]
     else:
         budget = request.budget
         deadline = request.deadline
@@ -216,15 +147,16 @@ async def agent_search(request: SearchRequest):
         else:
             items = [SearchItem(name=i, color=color, size=size) for i in request.items]
 
-    results, _debug = await search_products(
-        budget=budget,
-        deadline=deadline,
-        size=size,
-        style=style,
-        target=target,
-        color=color,
-        items=items,
-    )
+        results, _debug = await search_products(
+            budget=budget,
+            deadline=deadline,
+            size=size,
+            style=style,
+            target=target,
+            color=color,
+            items=items,
+        )
+
     # Build structured response: query, results_by_item, total_count, retailers
     query_echo = {
         "budget": budget,
@@ -250,8 +182,4 @@ async def agent_search(request: SearchRequest):
         "retailers": sorted(retailers_set),
     }
     set_last_search(payload)
-    # Pretty-print JSON (indent=2) for easier reading
-    return Response(
-        content=json.dumps(payload, indent=2),
-        media_type="application/json",
-    )
+    return payload
@@ -1,99 +1,73 @@
-import json
-import re
 from typing import Any
-from pathlib import Path
 
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Response
+from pydantic import BaseModel, Field, field_validator
 
-from app.data.search_cache import get_last_extract, get_last_search, set_last_search
+from app.data.cart_store import CartState, get_cart_state, make_item_id
+from app.data.pinterest import get_persona_version
+from app.data.ranking_cache import get_cached_ranking, ranking_cache_key, set_cached_ranking
+from app.data.search_cache import get_last_extract, get_last_search
 from app.schemas.agent import SearchItem
 from app.services.RetailProduct import search_products
-from app.services.ranking_service import process_from_extract_and_results
+from app.services.explanations import get_cached_explanation
+from app.services.extract_search import (
+    await_extract_search,
+    extract_signature,
+    load_default_payload,
+    run_extract_search,
+)
+from app.services.ranking_service import process_from_extract_and_results_async
 
 router = APIRouter(prefix="/api/cart", tags=["cart"])
 logger = logging.getLogger(__name__)
 
 
-def _slugify(value: str) -> str:
-    slug = re.sub(r"[^a-zA-Z0-9]+", "-", value.lower()).strip("-")
-    return slug or "item"
-
-
-def _infer_item_from_text(text: str) -> str:
-    lowered = text.lower()
-    keywords = [
-        "t-shirt",
-        "tshirt",
-        "tee",
-        "shirt",
-        "pants",
-        "jeans",
-        "shorts",
-        "hoodie",
-        "sweater",
-        "jacket",
-        "dress",
-        "skirt",
-        "shoes",
-        "sneakers",
-        "boots",
-        "bag",
-    ]
-    for keyword in keywords:
-        if keyword in lowered:
-            return "t-shirt" if keyword in {"tshirt", "tee"} else keyword
-    return ""
-
-
-def _infer_items_from_text(text: str) -> list[str]:
-    lowered = text.lower()
-    keywords = [
-        "t-shirt",
-        "tshirt",
-        "tee",
-        "shirt",
-        "pants",
-        "jeans",
-        "shorts",
-        "hoodie",
-        "sweater",
-        "jacket",
-        "dress",
-        "skirt",
-        "shoes",
-        "sneakers",
-        "boots",
-        "bag",
-    ]
-    items: list[str] = []
-    for keyword in keywords:
-        if keyword in lowered:
-            normalized = "t-shirt" if keyword in {"tshirt", "tee"} else keyword
-            if normalized == "shirt" and "t-shirt" in items:
-                continue
-            if normalized not in items:
-                items.append(normalized)
-    return items
-
-
-def _clean_item_text(item: str, colors: list[str], style_list: list[str], target: str) -> str:
-    text = item.lower()
-    for t in [target, "women", "women's", "men", "men's", "kids", "kid", "girl", "boy"]:
-        if t:
-            text = re.sub(rf"\b{re.escape(t)}\b", "", text)
-    for c in colors:
-        text = re.sub(rf"\b{re.escape(c.lower())}\b", "", text)
-    for s in style_list:
-        text = re.sub(rf"\b{re.escape(s.lower())}\b", "", text)
-    text = re.sub(r"\bunder\b|\bby\b|\bin\b|\bwithin\b", "", text)
-    text = re.sub(r"\$\s*\d+(?:\.\d+)?|\d+\s*\$", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def _extract_signature(payload: dict) -> str:
-    return json.dumps(payload, sort_keys=True, ensure_ascii=True)
+class CartVariant(BaseModel):
+    size: str = ""
+    color: str = ""
+    material: str = ""
+
+
+class CartVariantUpdate(BaseModel):
+    size: str | None = None
+    color: str | None = None
+    material: str | None = None
+
+
+class CartItemCreate(BaseModel):
+    title: str
+    price: float = Field(..., ge=0)
+    quantity: int = Field(1, ge=1)
+    currency: str = "USD"
+    retailer: str = ""
+    image: str | None = None
+    link: str | None = None
+    url: str | None = None
+    deliveryEstimate: str | None = None
+    shortDescription: str | None = None
+    variant: CartVariant = Field(default_factory=CartVariant)
+
+
+class CartItemUpdate(BaseModel):
+    quantity: int | None = Field(default=None, ge=1)
+    variant: CartVariantUpdate | None = None
+
+    @field_validator("quantity", "variant", mode="before")
+    @classmethod
+    def _not_null(cls, value: Any) -> Any:
+        # Omit a field to leave it unchanged; an explicit null is not a valid value.
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+
+def _variant_colors(result: dict) -> list[str]:
+    # Search results list every variant color; cart-shaped items carry the chosen one.
+    colors = (result.get("variants") or {}).get("colors") or []
+    if not colors and (result.get("variant") or {}).get("color"):
+        colors = [result["variant"]["color"]]
+    return list(colors)
 
 
 def _to_ranking_item(result: Any) -> dict:
@@ -104,6 +78,8 @@ def _to_ranking_item(result: Any) -> dict:
             "delivery_estimate": result.get("delivery_estimate") or result.get("deliveryEstimate") or result.get("delivery") or "",
             "retailer": result.get("retailer") or "",
             "item": result.get("item") or "",
+            "short_description": result.get("short_description") or result.get("shortDescription") or "",
+            "variants": {"colors": _variant_colors(result)},
         }
     return {
         "name": getattr(result, "name", ""),
@@ -111,33 +87,14 @@ def _to_ranking_item(result: Any) -> dict:
         "delivery_estimate": getattr(result, "delivery_estimate", ""),
         "retailer": getattr(result, "retailer", ""),
         "item": getattr(result, "item", ""),
+        "short_description": getattr(result, "short_description", None) or "",
+        "variants": {"colors": list(getattr(getattr(result, "variants", None), "colors", None) or [])},
     }
 
 
-def _load_default_payload() -> dict:
-    defaults = {
-        "budget": "$70",
-        "deadline": "30 days",
-        "size": "M",
-        "style": "casual",
-        "target": "women",
-        "color": "",
-        "items": ["t-shirt"],
-    }
-    try:
-        base_dir = Path(__file__).resolve().parents[3]
-        payload_path = base_dir / "test-search.json"
-        if payload_path.exists():
-            raw = json.loads(payload_path.read_text(encoding="utf-8"))
-            if isinstance(raw, dict):
-                defaults.update(raw)
-    except Exception:
-        pass
-    return defaults
-
-
 @router.get("")
 async def get_cart(
+    response: Response,
     budget: str | None = None,
     deadline: str | None = None,
     size: str | None = None,
@@ -145,93 +102,22 @@ async def get_cart(
     target: str | None = None,
     color: str | None = None,
     items: str | None = None,
+    if_none_match: str | None = Header(default=None),
 ):
     has_query_params = any([budget, deadline, size, style, target, color, items])
     last_extract = get_last_extract()
     last = get_last_search()
     if not has_query_params and last_extract:
-        extract_signature = _extract_signature(last_extract)
-        if last and last.get("source") == "llm-extract" and last.get("extract_signature") == extract_signature:
-            results_by_item = last.get("results_by_item") or {}
-            results = []
-            for item_key, items_list in results_by_item.items():
-                for r in items_list:
-                    r["item"] = item_key
-                    results.append(r)
-        else:
-            defaults = _load_default_payload()
-            data = last_extract.get("data") or {}
-            prompt_text = str(last_extract.get("query") or "").strip()
-            style_list = data.get("style") or []
-            colors = data.get("colors") or []
-            item_text = str(data.get("item") or "").strip()
-            constraints = " ".join(data.get("constraints") or []).lower()
-            target = str(data.get("target") or "").strip().lower()
-            if not target:
-                prompt_lower = f"{prompt_text} {item_text}".lower()
-                for t in ["women", "men", "kids", "women's", "men's", "girl", "boy"]:
-                    if t in constraints or t in prompt_lower:
-                        target = "women" if "women" in t or "girl" in t else "men" if "men" in t or "boy" in t else "kids"
-                        break
-            budget = data.get("budget") or defaults["budget"]
-            deadline = data.get("deadline") or defaults["deadline"]
-            size = str(data.get("size") or defaults["size"]).strip()
-            style = " ".join(style_list) if style_list else defaults["style"]
-            color = colors[0] if colors else defaults["color"]
-
-            inferred_items = _infer_items_from_text(item_text or prompt_text)
-            if len(colors) > 1 and len(inferred_items) > 1:
-                color = ""
-
-            cleaned_item = _clean_item_text(item_text or prompt_text, colors, style_list, target)
-            inferred = _infer_item_from_text(prompt_text or item_text)
-            final_item = inferred or cleaned_item or item_text or prompt_text
-
-            if inferred_items:
-                item_specs = [
-                    SearchItem(name=name, color=colors[idx] if idx < len(colors) else "", size=size)
-                    for idx, name in enumerate(inferred_items)
-                ]
-            elif final_item:
-                item_specs = [SearchItem(name=final_item, color=color, size=size)]
-            else:
-                item_specs = [SearchItem(name=name, color=color, size=size) for name in defaults["items"]]
-
-            results, _debug = await search_products(
-                budget=budget,
-                deadline=deadline,
-                size=size,
-                style=style,
-                target=target or defaults["target"],
-                color=color,
-                items=item_specs,
-            )
-
-            results_by_item: dict[str, list] = {}
-            retailers_set: set[str] = set()
-            for r in results:
-                item_key = r.item or "other"
-                results_by_item.setdefault(item_key, []).append(r.model_dump())
-                retailers_set.add(r.retailer)
-
-            set_last_search(
-                {
-                    "source": "llm-extract",
-                    "extract_signature": extract_signature,
-                    "query": {
-                        "budget": budget,
-                        "deadline": deadline,
-                        "size": size,
-                        "style": style,
-                        "target": target or defaults["target"],
-                        "color": color,
-                        "items": [spec.model_dump() for spec in item_specs],
-                    },
-                    "results_by_item": results_by_item,
-                    "total_count": len(results),
-                    "retailers": sorted(retailers_set),
-                }
-            )
+        signature = extract_signature(last_extract)
+        if not (last and last.get("source") == "llm-extract" and last.get("extract_signature") == signature):
+            # Pick up the prefetch started by /api/llm/extract, or search now.
+            last = await await_extract_search(signature) or await run_extract_search(last_extract, signature)
+        results_by_item = last.get("results_by_item") or {}
+        results = []
+        for item_key, items_list in results_by_item.items():
+            for r in items_list:
+                r["item"] = item_key
+                results.append(r)
     elif last and not has_query_params:
         results_by_item = last.get("results_by_item") or {}
         results = []
@@ -240,7 +126,7 @@ async def get_cart(
                 r["item"] = item_key
                 results.append(r)
     else:
-        defaults = _load_default_payload()
+        defaults = load_default_payload()
         budget = budget or defaults["budget"]
         deadline = deadline or defaults["deadline"]
         size = size or defaults["size"]
@@ -262,61 +148,98 @@ async def get_cart(
         )
 
     last_extract = get_last_extract() or {}
+    result_dicts = [r if isinstance(r, dict) else r.model_dump() for r in results]
+    source_key = ranking_cache_key(
+        extract_signature(last_extract) if last_extract else "",
+        result_dicts,
+        get_persona_version(),
+    )
+    cart = get_cart_state()
+    if cart.source_key != source_key:
+        ranking_lookup = await _build_ranking_lookup(last_extract, results)
+        cart.replace(_build_cart_items(result_dicts, ranking_lookup), source_key)
+    _fill_pending_explanations(cart)
+
+    if if_none_match and _etag_matches(if_none_match, cart.etag):
+        return Response(status_code=304, headers={"ETag": cart.etag})
+    response.headers["ETag"] = cart.etag
+    return cart.snapshot()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110): compressed responses carry the ETag as W/"...".
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def _build_ranking_lookup(last_extract: dict, results: list) -> dict[tuple[str, str], dict]:
     ranking_lookup: dict[tuple[str, str], dict] = {}
-    if last_extract and results:
-        try:
-            extract_data = last_extract.get("data") or {}
-            ranking_results = [_to_ranking_item(r) for r in results]
-            logger.info("[RankingWorkflow] running from cart results (%s items)", len(ranking_results))
-            ranking_payload = process_from_extract_and_results(extract_data, ranking_results)
-            ranked_by_category = ranking_payload.get("results") or {}
-            for _category, ranked_items in ranked_by_category.items():
-                # ranked_items is a list of {product, score, decomposition, why_local, llm_explanation?}
-                for idx, entry in enumerate(ranked_items, start=1):
-                    product = entry.get("product") or {}
-                    key = (str(product.get("name") or ""), str(product.get("retailer") or ""))
-                    if not key[0]:
-                        continue
-                    ranking_lookup[key] = {
-                        "rank": idx,
-                        "score": entry.get("score"),
-                        "llm_explanation": entry.get("llm_explanation") if idx == 1 else "",
-                        "why_local": entry.get("why_local") or "",
-                    }
-        except Exception as exc:
-            logger.exception("[RankingWorkflow] failed: %s", exc)
+    if not last_extract or not results:
+        return ranking_lookup
+    try:
+        extract_data = last_extract.get("data") or {}
+        ranking_results = [_to_ranking_item(r) for r in results]
+        cache_key = ranking_cache_key(
+            extract_signature(last_extract),
+            ranking_results,
+            get_persona_version(),
+        )
+        cached_lookup = get_cached_ranking(cache_key)
+        if cached_lookup is not None:
+            logger.info("[RankingWorkflow] cache hit (%s items)", len(ranking_results))
+            return cached_lookup
+
+        logger.info("[RankingWorkflow] running from cart results (%s items)", len(ranking_results))
+        ranking_payload = await process_from_extract_and_results_async(extract_data, ranking_results)
+        ranked_by_category = ranking_payload.get("results") or {}
+        for _category, ranked_items in ranked_by_category.items():
+            # ranked_items is a list of {product, score, decomposition, why_local, llm_explanation?}
+            for idx, entry in enumerate(ranked_items, start=1):
+                product = entry.get("product") or {}
+                key = (str(product.get("name") or ""), str(product.get("retailer") or ""))
+                if not key[0]:
+                    continue
+                ranking_lookup[key] = {
+                    "rank": idx,
+                    "score": entry.get("score"),
+                    "llm_explanation": entry.get("llm_explanation") if idx == 1 else "",
+                    "why_local": entry.get("why_local") or "",
+                    "llm_explanation_pending": bool(entry.get("llm_explanation_pending")) if idx == 1 else False,
+                    "explanation_key": entry.get("explanation_key") if idx == 1 else None,
+                }
+        set_cached_ranking(cache_key, ranking_lookup)
+    except Exception as exc:
+        logger.exception("[RankingWorkflow] failed: %s", exc)
+    return ranking_lookup
+
 
+def _build_cart_items(results: list[dict], ranking_lookup: dict[tuple[str, str], dict]) -> list[dict]:
     cart_items = []
-    for idx, r in enumerate(results):
-        variants = r.get("variants") if isinstance(r, dict) else r.variants
-        sizes = variants.get("sizes") if isinstance(variants, dict) else variants.sizes
-        colors = variants.get("colors") if isinstance(variants, dict) else variants.colors
-        material = variants.get("material") if isinstance(variants, dict) else variants.material
-        size_value = sizes[0] if sizes else ""
-        color_value = colors[0] if colors else ""
-        material_value = material[0] if material else ""
-        name = r.get("name") if isinstance(r, dict) else r.name
-        price = r.get("price") if isinstance(r, dict) else r.price
-        image_url = r.get("image_url") if isinstance(r, dict) else r.image_url
-        retailer = r.get("retailer") if isinstance(r, dict) else r.retailer
-        delivery_estimate = r.get("delivery_estimate") if isinstance(r, dict) else r.delivery_estimate
-        short_description = r.get("short_description") if isinstance(r, dict) else r.short_description
-        link = r.get("link") if isinstance(r, dict) else r.link
+    for r in results:
+        variants = r.get("variants") or {}
+        sizes = variants.get("sizes") or []
+        colors = variants.get("colors") or []
+        material = variants.get("material") or []
+        name = r.get("name") or ""
+        retailer = r.get("retailer") or ""
+        link = r.get("link")
         ranking_meta = ranking_lookup.get((str(name), str(retailer)), {})
         cart_items.append(
             {
-                "id": f"{_slugify(name)}-{idx}",
+                "id": make_item_id(name, retailer, link),
                 "title": name,
-                "price": price,
+                "price": r.get("price"),
+                "quantity": 1,
                 "currency": "USD",
-                "image": image_url,
+                "image": r.get("image_url"),
                 "retailer": retailer,
-                "deliveryEstimate": delivery_estimate,
-                "shortDescription": short_description,
+                "deliveryEstimate": r.get("delivery_estimate"),
+                "shortDescription": r.get("short_description"),
                 "variant": {
-                    "size": size_value,
-                    "color": color_value,
-                    "material": material_value,
+                    "size": sizes[0] if sizes else "",
+                    "color": colors[0] if colors else "",
+                    "material": material[0] if material else "",
                 },
                 "link": link,
                 "url": link,
@@ -324,9 +247,79 @@ async def get_cart(
                 "rankingScore": ranking_meta.get("score"),
                 "rankingRank": ranking_meta.get("rank"),
                 "llmExplanation": ranking_meta.get("llm_explanation"),
+                "llmExplanationPending": ranking_meta.get("llm_explanation_pending", False),
+                "explanationKey": ranking_meta.get("explanation_key"),
                 "whyLocal": ranking_meta.get("why_local"),
             }
         )
+    return cart_items
+
+
+def _fill_pending_explanations(cart: CartState) -> None:
+    # Explanations that missed the ranking's latency budget were shipped as fallback text;
+    # swap in the LLM text once it is cached. The update bumps the ETag so clients refetch.
+    for item in cart.snapshot()["items"]:
+        if not item.get("llmExplanationPending"):
+            continue
+        text = get_cached_explanation(item.get("explanationKey") or "")
+        if text is not None:
+            cart.annotate(item["id"], {"llmExplanation": text, "llmExplanationPending": False})
+
+
+def _mutation_response(cart: CartState, response: Response, item: dict | None = None) -> dict:
+    response.headers["ETag"] = cart.etag
+    payload = cart.totals()
+    if item is not None:
+        payload["item"] = item
+    return payload
+
+
+@router.post("/items", status_code=201)
+def add_cart_item(payload: CartItemCreate, response: Response):
+    cart = get_cart_state()
+    link = payload.link or payload.url
+    item = cart.add(
+        {
+            "id": make_item_id(payload.title, payload.retailer, link),
+            "title": payload.title,
+            "price": payload.price,
+            "quantity": payload.quantity,
+            "currency": payload.currency,
+            "image": payload.image,
+            "retailer": payload.retailer,
+            "deliveryEstimate": payload.deliveryEstimate,
+            "shortDescription": payload.shortDescription,
+            "variant": payload.variant.model_dump(),
+            "link": link,
+            "url": link,
+            "verified": False,
+            "rankingScore": None,
+            "rankingRank": None,
+            "llmExplanation": None,
+            "llmExplanationPending": False,
+            "explanationKey": None,
+            "whyLocal": None,
+        }
+    )
+    return _mutation_response(cart, response, item)
+
+
+@router.patch("/items/{item_id}")
+def update_cart_item(item_id: str, payload: CartItemUpdate, response: Response):
+    cart = get_cart_state()
+    changes = payload.model_dump(exclude_unset=True)
+    if "variant" in changes:
+        changes["variant"] = {k: v for k, v in changes["variant"].items() if v is not None}
+    item = cart.update(item_id, changes)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return _mutation_response(cart, response, item)
+
 
-    total_price = round(sum(item["price"] for item in cart_items), 2)
-    return {"items": cart_items, "totalPrice": total_price}
+@router.delete("/items/{item_id}")
+def remove_cart_item(item_id: str, response: Response):
+    cart = get_cart_state()
+    item = cart.remove(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return _mutation_response(cart, response)
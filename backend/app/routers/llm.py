@@ -1,10 +1,21 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, Literal
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.data.llm_extractor import extract_user_requirements
+from app.data.llm_extractor import (
+    extract_batch,
+    extract_user_requirements_async,
+    extract_user_requirements_stream,
+)
+from app.data.llm_extractor.cache import get_extraction_cache
+from app.data.llm_extractor.metrics import get_extraction_metrics
+from app.data.llm_extractor.routing import routing_snapshot
 from app.data.search_cache import set_last_extract
+from app.responses import dumps_json
+from app.services.extract_search import schedule_extract_search
 
 router = APIRouter(prefix="/api/llm", tags=["llm"])
 
@@ -18,15 +29,89 @@ class LlmExtractResponse(BaseModel):
     data: Dict[str, Any]
 
 
+class LlmExtractBatchRequest(BaseModel):
+    items: list[LlmExtractRequest] = Field(..., max_length=10000)
+    # "input": lines follow the request order; "completed": lines are sent as soon as ready.
+    order: Literal["input", "completed"] = "input"
+    concurrency: int = Field(8, ge=1, le=32)
+
+
 @router.post("/extract", response_model=LlmExtractResponse)
-def extract_requirements(payload: LlmExtractRequest):
+async def extract_requirements(payload: LlmExtractRequest):
     try:
-        data = extract_user_requirements(payload.query, payload.preferences)
-        set_last_extract({"query": payload.query, "preferences": payload.preferences, "data": data})
+        data = await extract_user_requirements_async(payload.query, payload.preferences)
+        extract = {"query": payload.query, "preferences": payload.preferences, "data": data}
+        set_last_extract(extract)
+        # Start the cart search now; GET /api/cart awaits or reads this result.
+        schedule_extract_search(extract)
         return {"data": data}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM extraction timed out")
     except Exception as exc:
         import logging
         logging.getLogger(__name__).exception("LLM extraction failed")
         raise HTTPException(status_code=500, detail=f"LLM extraction failed: {exc}")
+
+
+@router.post("/extract/stream")
+async def extract_requirements_stream(payload: LlmExtractRequest):
+    """
+    Streaming variant of /extract: one NDJSON line per completed field,
+    {"partial": true, "fields": [...], "data": {...}}, then {"partial": false, "data": {...}}.
+    The final extract is saved and prefetched exactly like /extract.
+    """
+
+    async def _lines():
+        try:
+            async for update in extract_user_requirements_stream(payload.query, payload.preferences):
+                line: Dict[str, Any] = {"partial": not update.final, "data": update.data}
+                if update.final:
+                    extract = {"query": payload.query, "preferences": payload.preferences, "data": update.data}
+                    set_last_extract(extract)
+                    schedule_extract_search(extract)
+                else:
+                    line["fields"] = sorted(update.fields)
+                yield dumps_json(line) + b"\n"
+        except asyncio.TimeoutError:
+            yield dumps_json({"error": "LLM extraction timed out"}) + b"\n"
+        except Exception as exc:
+            yield dumps_json({"error": f"LLM extraction failed: {exc}"}) + b"\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.post("/extract/batch")
+async def extract_requirements_batch(payload: LlmExtractBatchRequest):
+    """
+    Extract many prompts in one call. Streams one NDJSON line per input:
+    {"index", "query", "data"} or {"index", "query", "error"}.
+    Does not touch the last extract / cart search.
+    """
+    requests = [(item.query, item.preferences) for item in payload.items]
+
+    async def _lines():
+        async for index, data, error in extract_batch(
+            requests,
+            concurrency=payload.concurrency,
+            ordered=payload.order == "input",
+        ):
+            line: Dict[str, Any] = {"index": index, "query": requests[index][0]}
+            if error is None:
+                line["data"] = data
+            else:
+                line["error"] = error
+            yield dumps_json(line) + b"\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/metrics")
+def extraction_metrics():
+    """LLM-skip rate (rules fast path and cache), latency saved and per-tier model routing stats."""
+    return {
+        **get_extraction_metrics().snapshot(),
+        "cache": get_extraction_cache().stats(),
+        "routing": routing_snapshot(),
+    }
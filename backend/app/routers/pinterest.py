@@ -15,6 +15,7 @@ from app.data.pinterest import (
     set_zep_thread,
     get_zep_user_id,
     get_zep_thread_id,
+    invalidate_persona,
 )
 from app.data.pinterest.sync import sync_pinterest_to_zep
 from app.data.ZEP_mcp import update_user_persona_with_outfit_summaries
@@ -121,5 +122,6 @@ def pinterest_sync(payload: PinterestSyncPayload):
 
     if not success:
         raise HTTPException(status_code=500, detail="Failed to sync Pinterest data to Zep")
+    invalidate_persona(thread_id)
 
     return {"success": True}
@@ -1,18 +1,32 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional
 
-from app.data.products import get_products
-from app.services.ranking_service import process_and_rank, get_weights
+from app.data.catalog import CatalogQuery
+from app.data.products import get_catalog, get_products, rank_candidates
+from app.services.catalog_views import get_ranked_view
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
+# Products kept from text retrieval before ranking.
+SEARCH_CANDIDATES = 200
+
+
+class SearchFilters(BaseModel):
+    category: Optional[str] = None
+    retailer: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    max_delivery_days: Optional[float] = None
+
 
 class SearchRequest(BaseModel):
     query: str
     preferences: List[str] = []
     budget: Optional[float] = 400.0
     max_delivery_days: Optional[float] = 5.0
+    # Hard filters pushed down into the catalog backend (the fields above only weight the score).
+    filters: SearchFilters = SearchFilters()
 
 
 @router.get("")
@@ -30,85 +44,27 @@ def search_products(request: SearchRequest):
     - "Fast Delivery" -> increases delivery weight  
     - "My Style" -> increases style weight
     """
-    # Get all products (in a real app, this would search/filter products)
-    all_products = get_products()
-    
-    # Convert products to format expected by ranking engine
-    # Add delivery_days field if missing (parse from delivery string)
-    def parse_delivery_days(delivery_str: str) -> float:
-        """Parse delivery string to days"""
-        if isinstance(delivery_str, (int, float)):
-            return float(delivery_str)
-        if not isinstance(delivery_str, str):
-            return 5.0
-        import re
-        numbers = re.findall(r'\d+', delivery_str.lower())
-        if numbers:
-            return float(numbers[0])
-        if "tomorrow" in delivery_str.lower():
-            return 1.0
-        return 5.0
-    
-    # Group products by category for ranking
-    products_by_category: Dict[str, List[Dict[str, Any]]] = {}
-    for product in all_products:
-        category = product.get("category", "Other")
-        if category not in products_by_category:
-            products_by_category[category] = []
-        
-        # Ensure product has required fields for ranking
-        product_copy = product.copy()
-        if "delivery_days" not in product_copy:
-            delivery_str = product_copy.get("delivery", "5 days")
-            product_copy["delivery_days"] = parse_delivery_days(delivery_str)
-        if "preference_match" not in product_copy:
-            product_copy["preference_match"] = 0.8  # Default match score
-        
-        products_by_category[category].append(product_copy)
-    
-    # Prepare client data with preferences
-    client_data = {
-        "budget": request.budget,
-        "delivery_deadline": request.max_delivery_days,
-        "preferences_clicked": request.preferences,
-        "query": request.query
-    }
-    
-    # Default persona (can be enhanced later)
-    zep_persona = {
-        "preferred_styles": ["minimaliste", "sporty"],
-        "preferred_colors": ["blue", "black"]
-    }
-    
-    # Process and rank products
-    # Note: process_and_rank expects products_data with "items" key containing products_by_category
-    products_data = {
-        "query": request.query,
-        "items": products_by_category
-    }
-    ranking_payload = process_and_rank(products_data, client_data, zep_persona)
-    ranked_results = ranking_payload.get("results", {})
-    weights = ranking_payload.get("weights") or get_weights(request.preferences)
-    
-    # Format response for frontend
-    formatted_results = {}
-    for category, ranked_items in ranked_results.items():
-        formatted_results[category] = {
-            "category": category,
-            "weights": weights,
-            "products": [
-                {
-                    "rank": idx + 1,
-                    "product": item["product"],
-                    "score": item["score"],
-                    "score_breakdown": item["decomposition"],
-                    "explanation": item.get("why_local", ""),
-                    "llm_explanation": item.get("llm_explanation", "")
-                }
-                for idx, item in enumerate(ranked_items)
-            ]
-        }
-    
+    # Filters and the query text are pushed down into the catalog backend, which returns
+    # the best SEARCH_CANDIDATES products by BM25 (FTS5 for SQLite catalogs). The ranking
+    # itself comes from the precomputed views for these weights, restricted to the candidates.
+    # A query none of whose words occur anywhere in the catalog is ignored, as it was before
+    # text retrieval, and the filters alone decide. A query that matches the catalog but no
+    # product passing the filters returns no products.
+    catalog = get_catalog()
+    filters = CatalogQuery(**request.filters.model_dump())
+    candidates = None
+    relevance = None
+    if request.query.strip():
+        hits = rank_candidates(CatalogQuery(text=request.query, **request.filters.model_dump()), SEARCH_CANDIDATES)
+        if hits or rank_candidates(CatalogQuery(text=request.query), 1):
+            relevance = {product_id: round(score, 3) for product_id, score in hits}
+            candidates = [p for p in (catalog.get(product_id) for product_id in relevance) if p is not None]
+    if candidates is None and not filters.is_empty():
+        candidates = catalog.search(filters)
+    weights, formatted_results = get_ranked_view(
+        request.preferences, request.budget, request.max_delivery_days, candidates, relevance
+    )
+
     return {
         "query": request.query,
         "preferences": request.preferences,
@@ -119,8 +75,7 @@ def search_products(request: SearchRequest):
 
 @router.get("/{product_id}")
 def get_product(product_id: str):
-    products = get_products()
-    for p in products:
-        if p["id"] == product_id:
-            return p
+    product = get_catalog().get(product_id)
+    if product is not None:
+        return product
     raise HTTPException(status_code=404, detail="Product not found")
@@ -1,9 +1,16 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.services.ranking_service import process_and_rank, process_from_extract_and_results
+from app.services.explanations import get_cached_explanation, is_pending
+from app.services.ranking_service import (
+    process_and_rank_async,
+    process_batch_rank,
+    process_from_extract_and_results_async,
+    process_outfit,
+)
+from app.services.ranking_sessions import close_ranking_session, create_ranking_session, reweight_session
 
 router = APIRouter(prefix="/api/ranking", tags=["ranking"])
 
@@ -12,17 +19,125 @@ class RankingRequest(BaseModel):
     products_data: Dict[str, Any]
     client_data: Dict[str, Any]
     zep_persona: Dict[str, Any]
+    # Return only the best top_k per category; pass back page.next_cursor for the next page.
+    top_k: Optional[int] = Field(default=None, ge=1)
+    cursor: Optional[str] = None
+
+
+class RankingProfile(BaseModel):
+    id: Optional[str] = None
+    client_data: Dict[str, Any] = Field(default_factory=dict)
+    zep_persona: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRankingRequest(BaseModel):
+    # One candidate set ranked for many profiles (A/B variants, chip combinations, group shopping).
+    products_data: Dict[str, Any]
+    profiles: List[RankingProfile] = Field(min_length=1, max_length=5000)
+    top_k: int = Field(default=10, ge=1, le=100)
+
+
+class OutfitRequest(BaseModel):
+    products_data: Dict[str, Any]
+    client_data: Dict[str, Any]
+    zep_persona: Dict[str, Any]
+    alternatives: int = Field(default=3, ge=0, le=10)
+    # Best candidates per category considered by the optimizer.
+    candidates: int = Field(default=200, ge=1, le=500)
+
+
+class ReweightRequest(BaseModel):
+    preferences: List[str] = Field(default_factory=list)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    cursor: Optional[str] = None
 
 
 class RankingFromExtractRequest(BaseModel):
     extract: Dict[str, Any]
     results: List[Dict[str, Any]]
+    top_k: Optional[int] = Field(default=None, ge=1)
+    cursor: Optional[str] = None
 
 
 @router.post("/process")
 async def rank_products(payload: RankingRequest):
     try:
-        return process_and_rank(payload.products_data, payload.client_data, payload.zep_persona)
+        return await process_and_rank_async(
+            payload.products_data,
+            payload.client_data,
+            payload.zep_persona,
+            top_k=payload.top_k,
+            cursor=payload.cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Handlers doing blocking work without an async path are plain def: FastAPI runs them
+# in its threadpool instead of on the event loop.
+@router.post("/sessions")
+def create_session(payload: RankingRequest):
+    """Rank like /process and keep the products' factor scores for cheap reweighting."""
+    try:
+        return create_ranking_session(
+            payload.products_data,
+            payload.client_data,
+            payload.zep_persona,
+            top_k=payload.top_k,
+            cursor=payload.cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/reweight")
+def reweight(session_id: str, payload: ReweightRequest):
+    try:
+        ranking = reweight_session(session_id, payload.preferences, top_k=payload.top_k, cursor=payload.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if ranking is None:
+        raise HTTPException(status_code=404, detail="Ranking session not found or expired")
+    return ranking
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    if not close_ranking_session(session_id):
+        raise HTTPException(status_code=404, detail="Ranking session not found or expired")
+
+
+@router.post("/batch")
+def rank_batch(payload: BatchRankingRequest):
+    try:
+        return process_batch_rank(
+            payload.products_data,
+            [profile.model_dump(exclude_none=True) for profile in payload.profiles],
+            top_k=payload.top_k,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/outfit")
+def rank_outfit(payload: OutfitRequest):
+    """One item per category maximizing the total score within the budget and deadline."""
+    try:
+        return process_outfit(
+            payload.products_data,
+            payload.client_data,
+            payload.zep_persona,
+            alternatives=payload.alternatives,
+            candidates=payload.candidates,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -30,6 +145,21 @@ async def rank_products(payload: RankingRequest):
 @router.post("/from-extract")
 async def rank_from_extract(payload: RankingFromExtractRequest):
     try:
-        return process_from_extract_and_results(payload.extract, payload.results)
+        return await process_from_extract_and_results_async(
+            payload.extract, payload.results, top_k=payload.top_k, cursor=payload.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/explanations/{key}")
+async def get_explanation(key: str):
+    """LLM text for an entry returned with llm_explanation_pending (poll with its explanation_key)."""
+    text = get_cached_explanation(key)
+    if text is not None:
+        return {"key": key, "status": "ready", "llm_explanation": text}
+    if is_pending(key):
+        return {"key": key, "status": "pending", "llm_explanation": None}
+    raise HTTPException(status_code=404, detail="Unknown or failed explanation")
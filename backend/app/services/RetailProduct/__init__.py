@@ -1,3 +1,3 @@
-from .search import search_products
+from .search import filter_by_budget_and_deadline, search_products
 
-__all__ = ["search_products"]
+__all__ = ["search_products", "filter_by_budget_and_deadline"]
@@ -1141,9 +1141,20 @@ async def search_products(
 
     # No mock fallback: return empty results if nothing matches
 
-    # Final filter: budget and delivery
+    return filter_by_budget_and_deadline(all_results, budget, deadline), debug
+
+
+def filter_by_budget_and_deadline(
+    results: list[SearchResultItem], budget: str, deadline: str, keep_all_if_empty: bool = True
+) -> list[SearchResultItem]:
+    """
+    Final filter: budget and delivery. Keeps everything if nothing would survive, unless
+    keep_all_if_empty is False (callers that can search again instead).
+    """
+    max_price = _parse_budget(budget)
+    max_days = _parse_deadline_days(deadline)
     filtered: list[SearchResultItem] = []
-    for r in all_results:
+    for r in results:
         if max_price and r.price > max_price:
             continue
         if max_days is not None:
@@ -1151,8 +1162,7 @@ async def search_products(
             if d is not None and d > max_days:
                 continue
         filtered.append(r)
-
-    return (filtered if filtered else all_results), debug
+    return filtered if filtered or not keep_all_if_empty else results
 
 
 def format_search_response_json(results: list[SearchResultItem]) -> str:
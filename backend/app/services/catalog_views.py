@@ -0,0 +1,324 @@
+"""
+Precomputed ranking views of the static catalog for /api/products/search.
+
+A ranked view holds one category, read through the catalog backend's own category
+query, so the whole catalog is never copied into Python. Views are built per weight
+vector, budget bucket, delivery-deadline bucket and persona version, and every later
+request with the same inputs is a lookup. A product's score does not depend on the
+other products, so a filtered or full-text search is a cached view restricted to the
+matching ids; a category without a cached view ranks only the matching products. The
+request's exact budget and deadline only re-score the returned entries. Replacing the
+catalog (set_catalog / set_products) or syncing a new persona changes the version part
+of the key, so stale views are never served.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.data.catalog import CatalogQuery
+from app.data.pinterest import get_persona_version
+from app.data.products import get_catalog, get_catalog_version
+from app.services.explanations import get_cached_explanation
+from app.services.ranking_service import get_weights, process_and_rank, score_product
+
+logger = logging.getLogger(__name__)
+
+# Persona used for the catalog until the search request carries one.
+DEFAULT_PERSONA = {
+    "preferred_styles": ["minimaliste", "sporty"],
+    "preferred_colors": ["blue", "black"],
+}
+DEFAULT_BUDGET = 400.0
+DEFAULT_MAX_DELIVERY_DAYS = 5.0
+# One chip per weight that get_weights can raise; every subset is a distinct weight vector.
+PREFERENCE_CHIPS = ("Budget", "Fast Delivery", "My Style")
+
+# Views are keyed on the bucket at or above the requested budget and deadline, so
+# arbitrary client values share a handful of views.
+BUDGET_BUCKETS = (25.0, 50.0, 100.0, 200.0, 400.0, 800.0, 1600.0, 3200.0)
+DELIVERY_BUCKETS = (1.0, 2.0, 3.0, 5.0, 7.0, 14.0, 30.0)
+
+# Category views kept; one full-catalog request uses one per category.
+_MAX_VIEWS = 256
+# Startup warming ranks every category once per chip combination; larger catalogs
+# (SQLite feeds) build their views on first use instead.
+WARM_MAX_PRODUCTS = 5000
+
+_lock = threading.Lock()
+_views: "OrderedDict[tuple, RankedView]" = OrderedDict()
+_views_version: Optional[int] = None
+
+
+@dataclass
+class RankedView:
+    block: Dict[str, Any]
+    # product id -> position in the category's ranked list
+    positions: Dict[str, int]
+    # Entries shipped with fallback text while their LLM explanation was still running.
+    pending: List[Dict[str, Any]]
+
+
+def _bucket(value: float, buckets: Tuple[float, ...]) -> float:
+    for bucket in buckets:
+        if value <= bucket:
+            return bucket
+    return buckets[-1]
+
+
+def _view_key(
+    weights: Dict[str, float],
+    budget: float,
+    max_delivery_days: float,
+    category: str,
+    catalog_version: int,
+) -> tuple:
+    return (
+        catalog_version,
+        get_persona_version(),
+        tuple(sorted(weights.items())),
+        budget,
+        max_delivery_days,
+        category,
+    )
+
+
+def _catalog_version() -> int:
+    """Current catalog version; views of an older catalog are dropped when it moves."""
+    global _views_version
+    version = get_catalog_version()
+    with _lock:
+        if _views_version != version:
+            _views.clear()
+            _views_version = version
+    return version
+
+
+def _format_view(ranking: Dict[str, Any], weights: Dict[str, float]) -> Dict[str, Any]:
+    formatted = {}
+    for category, ranked_items in ranking.get("results", {}).items():
+        formatted[category] = {
+            "category": category,
+            "weights": weights,
+            "products": [
+                {
+                    "rank": idx + 1,
+                    "product": item["product"],
+                    "score": item["score"],
+                    "score_breakdown": item["decomposition"],
+                    "explanation": item.get("why_local", ""),
+                    "llm_explanation": item.get("llm_explanation", ""),
+                    "llm_explanation_pending": bool(item.get("llm_explanation_pending")),
+                    "explanation_key": item.get("explanation_key"),
+                }
+                for idx, item in enumerate(ranked_items)
+            ],
+        }
+    return formatted
+
+
+def _rank(
+    by_category: Dict[str, List[Dict[str, Any]]],
+    weights: Dict[str, float],
+    preferences: List[str],
+    budget: float,
+    max_delivery_days: float,
+) -> Dict[str, Any]:
+    # process_and_rank writes preference_match into the products, so it ranks copies.
+    items = {category: [dict(p) for p in products] for category, products in by_category.items()}
+    client_data = {
+        "budget": budget,
+        "delivery_deadline": max_delivery_days,
+        "preferences_clicked": preferences,
+    }
+    return _format_view(process_and_rank({"items": items}, client_data, DEFAULT_PERSONA), weights)
+
+
+def _ranked_view(block: Dict[str, Any]) -> RankedView:
+    positions: Dict[str, int] = {}
+    pending: List[Dict[str, Any]] = []
+    for idx, entry in enumerate(block["products"]):
+        positions.setdefault(str(entry["product"].get("id")), idx)
+        if entry["llm_explanation_pending"]:
+            pending.append(entry)
+    return RankedView(block=block, positions=positions, pending=pending)
+
+
+def _refresh_pending(view: RankedView) -> None:
+    # Explanations that missed the latency budget when the view was built land in the
+    # explanation cache later; patch them into the stored view once.
+    for entry in list(view.pending):
+        text = get_cached_explanation(entry["explanation_key"] or "")
+        if text is not None:
+            entry["llm_explanation"] = text
+            entry["llm_explanation_pending"] = False
+            view.pending.remove(entry)
+
+
+def _cached_view(key: tuple) -> Optional[RankedView]:
+    with _lock:
+        view = _views.get(key)
+        if view is not None:
+            _views.move_to_end(key)
+            _refresh_pending(view)
+    return view
+
+
+def _category_view(
+    category: str,
+    weights: Dict[str, float],
+    preferences: List[str],
+    budget: float,
+    max_delivery_days: float,
+) -> RankedView:
+    version = _catalog_version()
+    key = _view_key(weights, budget, max_delivery_days, category, version)
+    view = _cached_view(key)
+    if view is not None:
+        return view
+
+    # The backend's category filter (an indexed SQL query for SQLite catalogs) reads only
+    # this category; it matches case-insensitively, so keep the exact name.
+    products = [p for p in get_catalog().search(CatalogQuery(category=category)) if p["category"] == category]
+    ranked = _rank({category: products}, weights, preferences, budget, max_delivery_days)
+    view = _ranked_view(ranked.get(category) or {"category": category, "weights": weights, "products": []})
+    logger.info(
+        "[CatalogViews] built view category=%s weights=%s budget=%s max_days=%s",
+        category, weights, budget, max_delivery_days,
+    )
+    with _lock:
+        # Only store it if the catalog did not change while ranking.
+        if _views_version == version:
+            _views[key] = view
+            while len(_views) > _MAX_VIEWS:
+                _views.popitem(last=False)
+    return view
+
+
+def _restrict(
+    view: RankedView,
+    product_ids: List[str],
+    relevance: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    # Cost follows the number of ids, not the category size.
+    positions = sorted({view.positions[i] for i in product_ids if i in view.positions})
+    products = []
+    for rank, idx in enumerate(positions, start=1):
+        entry = {**view.block["products"][idx], "rank": rank}
+        if relevance is not None:
+            entry["relevance"] = relevance.get(str(entry["product"].get("id")))
+        products.append(entry)
+    return {**view.block, "products": products}
+
+
+def _rescore(
+    results: Dict[str, Any],
+    weights: Dict[str, float],
+    budget: float,
+    max_delivery_days: float,
+) -> Dict[str, Any]:
+    # Scores of the returned entries under the exact budget and deadline, re-sorted; only
+    # arithmetic on the stored products (preference_match included), no persona or LLM call.
+    rescored = {}
+    for category, block in results.items():
+        products = []
+        for entry in block["products"]:
+            scored = score_product(entry["product"], weights, budget, max_delivery_days)
+            products.append(
+                {
+                    **entry,
+                    "score": scored["score"],
+                    "score_breakdown": scored["decomposition"],
+                    "explanation": scored["why_local"],
+                }
+            )
+        products.sort(key=lambda entry: entry["score"], reverse=True)
+        for rank, entry in enumerate(products, start=1):
+            entry["rank"] = rank
+        rescored[category] = {**block, "products": products}
+    return rescored
+
+
+def get_ranked_view(
+    preferences: List[str],
+    budget: Optional[float] = None,
+    max_delivery_days: Optional[float] = None,
+    products: Optional[List[Dict[str, Any]]] = None,
+    relevance: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """
+    (weights, results by category) for the catalog, from the view cache when possible.
+    With products (the matches of a filtered or full-text search) only those are
+    returned, ranks numbered within the subset, and each carries its retrieval score
+    from relevance when given. The returned structure may be shared with the cache and
+    must not be mutated.
+    """
+    budget = DEFAULT_BUDGET if budget is None else float(budget)
+    max_delivery_days = DEFAULT_MAX_DELIVERY_DAYS if max_delivery_days is None else float(max_delivery_days)
+    weights = get_weights(preferences)
+    view_budget = _bucket(budget, BUDGET_BUCKETS)
+    view_days = _bucket(max_delivery_days, DELIVERY_BUCKETS)
+
+    from_views: Dict[str, Any] = {}
+    direct: Dict[str, Any] = {}
+    if products is None:
+        for category in get_catalog().categories():
+            view = _category_view(category, weights, preferences, view_budget, view_days)
+            if view.block["products"]:
+                from_views[category] = view.block
+    else:
+        ids_by_category: Dict[str, List[str]] = {}
+        uncached: Dict[str, List[Dict[str, Any]]] = {}
+        for product in products:
+            ids_by_category.setdefault(product["category"], []).append(str(product["id"]))
+        version = _catalog_version()
+        for category, product_ids in ids_by_category.items():
+            view = _cached_view(_view_key(weights, view_budget, view_days, category, version))
+            if view is not None:
+                from_views[category] = _restrict(view, product_ids, relevance)
+        for product in products:
+            if product["category"] not in from_views:
+                uncached.setdefault(product["category"], []).append(product)
+        # Categories without a view: rank just the matches, at the exact budget and deadline.
+        if uncached:
+            direct = _rank(uncached, weights, preferences, budget, max_delivery_days)
+        if relevance is not None:
+            for block in direct.values():
+                for entry in block["products"]:
+                    entry["relevance"] = relevance.get(str(entry["product"].get("id")))
+
+    if (budget, max_delivery_days) != (view_budget, view_days):
+        from_views = _rescore(from_views, weights, budget, max_delivery_days)
+    if products is None:
+        return weights, from_views
+    # Categories in the order their first match came in.
+    merged = {**from_views, **direct}
+    order = list(dict.fromkeys(p["category"] for p in products))
+    return weights, {category: merged[category] for category in order if category in merged}
+
+
+def warm_catalog_views() -> int:
+    """Build the views for every chip combination at the default budget and deadline."""
+    catalog_size = len(get_catalog())
+    if catalog_size > WARM_MAX_PRODUCTS:
+        logger.info("[CatalogViews] %s products; views are built on first use", catalog_size)
+        return 0
+    chip_sets = [list(c) for r in range(len(PREFERENCE_CHIPS) + 1) for c in combinations(PREFERENCE_CHIPS, r)]
+    built = 0
+    for chips in chip_sets:
+        try:
+            get_ranked_view(chips)
+            built += 1
+        except Exception as exc:
+            logger.warning("[CatalogViews] warming %s failed: %s", chips, exc)
+    return built
+
+
+def invalidate_catalog_views() -> None:
+    global _views_version
+    with _lock:
+        _views_version = None
+        _views.clear()
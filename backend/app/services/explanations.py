@@ -0,0 +1,341 @@
+"""
+Concurrent, cached LLM explanations for ranked winners.
+
+All explanation calls of a ranking run concurrently on one background event loop
+with a shared AsyncGroq client. The caller waits at most LLM_EXPLAIN_BUDGET_MS; any
+explanation still running after that is returned as its deterministic fallback and
+keeps going in the background, landing in the cache under its key for later reads.
+
+With LLM_EXPLAIN_BATCH=1 (default) the uncached winners of a ranking share one
+prompt answered with a JSON map category -> explanation, so a cart costs one call.
+explain_winners_async waits the same budget without blocking the caller's event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.data.llm_extractor.routing import get_model_router
+
+try:
+    from groq import AsyncGroq  # type: ignore
+    HAS_GROQ = True
+except ImportError:
+    HAS_GROQ = False
+    AsyncGroq = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 512
+_cache: "OrderedDict[str, str]" = OrderedDict()
+# explanation key -> future of {key: text}; a batched call serves several keys with one future.
+_pending: Dict[str, "concurrent.futures.Future[Dict[str, str]]"] = {}
+# Reentrant: a future that is already done runs its done-callback inside _track.
+_lock = threading.RLock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional["AsyncGroq"] = None
+
+
+@dataclass(frozen=True)
+class ExplanationJob:
+    category: str
+    key: str
+    prompt: str
+    fallback: str
+
+
+def explanation_key(best: Dict[str, Any], category: str, weights: Dict[str, float], preferences: List[str]) -> str:
+    """Same product, rounded decomposition, weights and preferences -> same explanation."""
+    p = best.get("product") or {}
+    decomp = best.get("decomposition") or {}
+    raw = json.dumps(
+        [
+            category,
+            p.get("name"),
+            p.get("retailer"),
+            p.get("price"),
+            p.get("delivery_days"),
+            p.get("preference_match"),
+            [decomp.get(k) for k in ("price_contrib", "delivery_contrib", "style_contrib")],
+            sorted(weights.items()),
+            sorted({str(x).lower() for x in preferences or []}),
+        ],
+        ensure_ascii=True,
+        default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def explanation_ok(text: str, finish_reason: Optional[str]) -> bool:
+    # Empty, one-liner or cut off at max_tokens: ask the larger model instead.
+    return len(text) >= 40 and finish_reason != "length"
+
+
+def get_cached_explanation(key: str) -> Optional[str]:
+    with _lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+        return text
+
+
+def is_pending(key: str) -> bool:
+    with _lock:
+        return key in _pending
+
+
+def _remember(key: str, text: str) -> None:
+    with _lock:
+        _cache[key] = text
+        _cache.move_to_end(key)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-explanations", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def _shared_client() -> "AsyncGroq":
+    global _client
+    if _client is None:
+        _client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), max_retries=1)
+    return _client
+
+
+async def _complete(prompt: str, max_tokens: int, accept: Callable[[str, Optional[str]], bool]) -> str:
+    """Routed completion: small model first, the large one when `accept` rejects the answer."""
+    router = get_model_router("explain")
+    tiers = router.tiers(simple=True)
+    text = ""
+    for tier, model in tiers:
+        start = time.perf_counter()
+        completion = await _shared_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=max_tokens,
+        )
+        router.record_call(tier, (time.perf_counter() - start) * 1000, getattr(completion, "usage", None))
+        choice = completion.choices[0]
+        text = (choice.message.content or "").strip()
+        if tier == tiers[-1][0] or accept(text, choice.finish_reason):
+            break
+        router.record_escalation()
+    return text
+
+
+async def _generate(key: str, prompt: str) -> Dict[str, str]:
+    try:
+        text = await _complete(prompt, 150, explanation_ok)
+    except Exception as exc:
+        logger.warning("[Explain] Groq call failed: %s", exc)
+        return {}
+    if not text:
+        return {}
+    _remember(key, text)
+    return {key: text}
+
+
+def parse_explanation_map(text: str, categories: List[str]) -> Dict[str, str]:
+    """Category -> explanation from a JSON object answer; missing or unusable entries are left out."""
+    start = text.find("{")
+    if start < 0:
+        return {}
+    try:
+        data, _end = json.JSONDecoder().raw_decode(text[start:])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    lowered = {str(k).strip().lower(): v for k, v in data.items()}
+    parsed: Dict[str, str] = {}
+    for category in categories:
+        value = data.get(category, lowered.get(category.lower()))
+        if isinstance(value, str) and explanation_ok(value.strip(), None):
+            parsed[category] = value.strip()
+    return parsed
+
+
+async def _generate_batch(jobs: List[ExplanationJob], prompt: str) -> Dict[str, str]:
+    categories = [job.category for job in jobs]
+    try:
+        text = await _complete(
+            prompt,
+            150 * len(jobs),
+            # Escalate when the small model's map is unparsable or misses a category.
+            lambda t, finish: finish != "length" and len(parse_explanation_map(t, categories)) == len(categories),
+        )
+    except Exception as exc:
+        logger.warning("[Explain] batched Groq call failed: %s", exc)
+        return {}
+    parsed = parse_explanation_map(text, categories)
+    if len(parsed) < len(jobs):
+        logger.info("[Explain] batched answer covered %s/%s categories", len(parsed), len(jobs))
+    explained: Dict[str, str] = {}
+    for job in jobs:
+        if job.category in parsed:
+            _remember(job.key, parsed[job.category])
+            explained[job.key] = parsed[job.category]
+    return explained
+
+
+def _track(keys: List[str], future: "concurrent.futures.Future[Dict[str, str]]") -> None:
+    # Caller holds _lock.
+    for key in keys:
+        _pending[key] = future
+
+    def _done(_f: "concurrent.futures.Future[Dict[str, str]]") -> None:
+        with _lock:
+            for key in keys:
+                if _pending.get(key) is _f:
+                    _pending.pop(key, None)
+
+    future.add_done_callback(_done)
+
+
+def _submit(
+    jobs: List[ExplanationJob],
+    batch_prompt: Optional[Callable[[List[ExplanationJob]], str]],
+) -> Dict[str, "concurrent.futures.Future[Dict[str, str]]"]:
+    """Future per job key; winners already being explained for another request share that call."""
+    loop = _background_loop()
+    futures: Dict[str, "concurrent.futures.Future[Dict[str, str]]"] = {}
+    with _lock:
+        fresh = []
+        for job in jobs:
+            if job.key in _pending:
+                futures[job.key] = _pending[job.key]
+            else:
+                fresh.append(job)
+        if batch_prompt is not None and len(fresh) > 1:
+            future = asyncio.run_coroutine_threadsafe(_generate_batch(fresh, batch_prompt(fresh)), loop)
+            _track([job.key for job in fresh], future)
+            futures.update((job.key, future) for job in fresh)
+        else:
+            for job in fresh:
+                future = asyncio.run_coroutine_threadsafe(_generate(job.key, job.prompt), loop)
+                _track([job.key], future)
+                futures[job.key] = future
+    return futures
+
+
+def _split_cached(jobs: List[ExplanationJob]) -> Tuple[Dict[str, Dict[str, Any]], List[ExplanationJob]]:
+    """Cache hits (and fallbacks when no LLM is configured), and the jobs that need a call."""
+    explained: Dict[str, Dict[str, Any]] = {}
+    misses: List[ExplanationJob] = []
+    llm_available = HAS_GROQ and bool(os.getenv("GROQ_API_KEY"))
+    for job in jobs:
+        cached = get_cached_explanation(job.key)
+        if cached is not None:
+            explained[job.category] = {"text": cached, "source": "cache", "pending": False, "key": job.key}
+        elif not llm_available:
+            explained[job.category] = {"text": job.fallback, "source": "fallback", "pending": False, "key": job.key}
+        else:
+            misses.append(job)
+    return explained, misses
+
+
+def _settle(
+    explained: Dict[str, Dict[str, Any]],
+    misses: List[ExplanationJob],
+    waiting: Dict[str, "concurrent.futures.Future[Dict[str, str]]"],
+    budget_ms: float,
+) -> Dict[str, Dict[str, Any]]:
+    for job in misses:
+        future = waiting[job.key]
+        text = None
+        if future.done() and not future.cancelled() and future.exception() is None:
+            text = future.result().get(job.key)
+        if text:
+            explained[job.category] = {"text": text, "source": "llm", "pending": False, "key": job.key}
+        else:
+            # Still running: the fallback now, the LLM text later via get_cached_explanation(key).
+            explained[job.category] = {
+                "text": job.fallback,
+                "source": "fallback",
+                "pending": not future.done(),
+                "key": job.key,
+            }
+    late = sum(1 for e in explained.values() if e["pending"])
+    if late:
+        logger.info("[Explain] %s explanation(s) missed the %.0f ms budget; filling in later", late, budget_ms)
+    return explained
+
+
+def _budget_and_batch(
+    budget_ms: Optional[float],
+    batch_prompt: Optional[Callable[[List[ExplanationJob]], str]],
+) -> Tuple[float, Optional[Callable[[List[ExplanationJob]], str]]]:
+    if budget_ms is None:
+        budget_ms = float(os.environ.get("LLM_EXPLAIN_BUDGET_MS", 1200))
+    if os.environ.get("LLM_EXPLAIN_BATCH", "1") == "0":
+        batch_prompt = None
+    return budget_ms, batch_prompt
+
+
+def explain_winners(
+    jobs: List[ExplanationJob],
+    budget_ms: Optional[float] = None,
+    batch_prompt: Optional[Callable[[List[ExplanationJob]], str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Explanation per category: {"text", "source": cache|llm|fallback, "pending", "key"}.
+    Blocks for at most budget_ms (LLM_EXPLAIN_BUDGET_MS, default 1200) for all LLM calls together.
+    batch_prompt builds one prompt for several uncached jobs (used when LLM_EXPLAIN_BATCH is on).
+    """
+    budget_ms, batch_prompt = _budget_and_batch(budget_ms, batch_prompt)
+    explained, misses = _split_cached(jobs)
+    waiting = _submit(misses, batch_prompt) if misses else {}
+    if waiting:
+        concurrent.futures.wait(set(waiting.values()), timeout=max(budget_ms, 0) / 1000)
+    return _settle(explained, misses, waiting, budget_ms)
+
+
+async def explain_winners_async(
+    jobs: List[ExplanationJob],
+    budget_ms: Optional[float] = None,
+    batch_prompt: Optional[Callable[[List[ExplanationJob]], str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """explain_winners for async callers: awaits the budget instead of blocking the event loop."""
+    budget_ms, batch_prompt = _budget_and_batch(budget_ms, batch_prompt)
+    explained, misses = _split_cached(jobs)
+    waiting = _submit(misses, batch_prompt) if misses else {}
+    if waiting:
+        # Not cancelled on timeout: late explanations keep running into the cache.
+        await asyncio.wait(
+            {asyncio.wrap_future(f) for f in set(waiting.values())},
+            timeout=max(budget_ms, 0) / 1000,
+        )
+    return _settle(explained, misses, waiting, budget_ms)
+
+
+def close_explanations() -> None:
+    """Close the shared client and stop the background loop (app shutdown)."""
+    global _loop, _client
+    with _lock:
+        loop, client = _loop, _client
+        _loop, _client = None, None
+    if loop is None:
+        return
+    if client is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+        except Exception:
+            pass
+    loop.call_soon_threadsafe(loop.stop)
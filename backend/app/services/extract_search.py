@@ -0,0 +1,226 @@
+"""
+Search driven by the last LLM extract, shared by GET /api/cart and the
+speculative prefetch scheduled from POST /api/llm/extract.
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable
+
+from app.data.llm_extractor import extract_user_requirements_stream
+from app.data.query_understanding import canonical_target, detect_target, plan_search_items
+from app.data.search_cache import set_last_search
+from app.schemas.agent import SearchItem
+from app.services.RetailProduct import filter_by_budget_and_deadline, search_products
+
+logger = logging.getLogger(__name__)
+
+# extract signature -> in-flight prefetch task
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def extract_signature(payload: dict) -> str:
+    return json.dumps(payload, sort_keys=True, ensure_ascii=True)
+
+
+def load_default_payload() -> dict:
+    defaults = {
+        "budget": "$70",
+        "deadline": "30 days",
+        "size": "M",
+        "style": "casual",
+        "target": "women",
+        "color": "",
+        "items": ["t-shirt"],
+    }
+    try:
+        base_dir = Path(__file__).resolve().parents[3]
+        payload_path = base_dir / "test-search.json"
+        if payload_path.exists():
+            raw = json.loads(payload_path.read_text(encoding="utf-8"))
+            if isinstance(raw, dict):
+                defaults.update(raw)
+    except Exception:
+        pass
+    return defaults
+
+
+def plan_search_from_extract(extract: dict) -> dict[str, Any]:
+    """Build search_products kwargs from a saved {query, preferences, data} extract."""
+    defaults = load_default_payload()
+    data = extract.get("data") or {}
+    prompt_text = str(extract.get("query") or "").strip()
+    style_list = data.get("style") or []
+    colors = data.get("colors") or []
+    item_text = str(data.get("item") or "").strip()
+    constraints = " ".join(data.get("constraints") or []).lower()
+    target = canonical_target(str(data.get("target") or "")) or detect_target(
+        constraints, f"{prompt_text} {item_text}"
+    )
+    size = str(data.get("size") or defaults["size"]).strip()
+    color = colors[0] if colors else defaults["color"]
+
+    item_specs, color = plan_search_items(
+        item_text or prompt_text,
+        item_text or prompt_text,
+        colors,
+        style_list,
+        target,
+        size,
+        color,
+    )
+    if not item_specs:
+        item_specs = [SearchItem(name=name, color=color, size=size) for name in defaults["items"]]
+
+    return {
+        "budget": data.get("budget") or defaults["budget"],
+        "deadline": data.get("deadline") or defaults["deadline"],
+        "size": size,
+        "style": " ".join(style_list) if style_list else defaults["style"],
+        "target": target or defaults["target"],
+        "color": color,
+        "items": item_specs,
+    }
+
+
+async def run_extract_search(extract: dict, signature: str | None = None) -> dict[str, Any]:
+    """Search for an extract and store it as the last search; returns the stored payload."""
+    signature = signature or extract_signature(extract)
+    query = plan_search_from_extract(extract)
+    results, _debug = await search_products(**query)
+
+    results_by_item: dict[str, list] = {}
+    retailers_set: set[str] = set()
+    for r in results:
+        item_key = r.item or "other"
+        results_by_item.setdefault(item_key, []).append(r.model_dump())
+        retailers_set.add(r.retailer)
+
+    payload = {
+        "source": "llm-extract",
+        "extract_signature": signature,
+        "query": {**query, "items": [spec.model_dump() for spec in query["items"]]},
+        "results_by_item": results_by_item,
+        "total_count": len(results),
+        "retailers": sorted(retailers_set),
+    }
+    set_last_search(payload)
+    return payload
+
+
+def schedule_extract_search(extract: dict) -> asyncio.Task:
+    """
+    Start searching for a fresh extract in the background so GET /api/cart can pick
+    up the results. Prefetches for older extracts are cancelled.
+    """
+    signature = extract_signature(extract)
+    task = _inflight.get(signature)
+    if task is not None and not task.done():
+        return task
+
+    for other_signature, other in list(_inflight.items()):
+        if other_signature != signature and not other.done():
+            other.cancel()
+
+    task = asyncio.create_task(run_extract_search(extract, signature))
+    _inflight[signature] = task
+
+    def _on_done(t: asyncio.Task) -> None:
+        if _inflight.get(signature) is t:
+            _inflight.pop(signature, None)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning("[Prefetch] search failed for extract: %s", t.exception())
+
+    task.add_done_callback(_on_done)
+    logger.info("[Prefetch] scheduled search for extract")
+    return task
+
+
+async def await_extract_search(signature: str) -> dict[str, Any] | None:
+    """Wait for an in-flight prefetch of this extract; None if there is none or it failed."""
+    task = _inflight.get(signature)
+    if task is None:
+        return None
+    try:
+        # Shield so a cancelled cart request does not kill the shared prefetch.
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if task.cancelled():
+            return None
+        raise
+    except Exception:
+        return None
+
+
+def _query_shape(query: dict[str, Any]) -> str:
+    # Budget and deadline are left out: the extractor emits them last, and they are
+    # applied to the provisional results afterwards instead of restarting the search.
+    shape = {k: v for k, v in query.items() if k not in ("budget", "deadline")}
+    shape["items"] = [i.model_dump() if isinstance(i, SearchItem) else i for i in shape.get("items") or []]
+    return json.dumps(shape, sort_keys=True, ensure_ascii=True, default=str)
+
+
+def _reconcile(results: list, budget: str, deadline: str) -> list | None:
+    """
+    Provisional results narrowed to the final budget and deadline, or None when an item
+    that had results loses all of them (a search under that budget would find others).
+    """
+    kept = filter_by_budget_and_deadline(results, budget, deadline, keep_all_if_empty=False)
+    if {r.item for r in results} - {r.item for r in kept}:
+        return None
+    return kept
+
+
+async def search_while_extracting(
+    prompt: str,
+    preferences: list[str],
+    build_query: Callable[[dict], dict[str, Any]],
+) -> tuple[dict, dict[str, Any], list, dict[str, Any]]:
+    """
+    Stream the extraction and start a provisional search_products call as soon as the
+    partial extract has item and target. build_query turns an extract into search kwargs.
+
+    The provisional search runs without budget/deadline and is restarted only when
+    item, target, colors, style or size change. Once the final extract arrives its
+    results are narrowed to the final budget and deadline; if that leaves an item with
+    no products, the full query is searched again. Returns (extract, query, results, debug).
+    """
+    provisional: asyncio.Task | None = None
+    provisional_shape: str | None = None
+    extracted: dict | None = None
+    try:
+        async for update in extract_user_requirements_stream(prompt, preferences):
+            if update.final:
+                extracted = update.data
+                break
+            if not {"item", "target"} <= update.fields:
+                continue
+            query = build_query(update.data)
+            shape = _query_shape(query)
+            if shape == provisional_shape:
+                continue
+            if provisional is not None:
+                provisional.cancel()
+                logger.info("[Provisional] query changed while extracting; restarting search")
+            provisional_shape = shape
+            provisional = asyncio.create_task(search_products(**{**query, "budget": "", "deadline": ""}))
+            logger.info("[Provisional] search started before extraction finished")
+
+        query = build_query(extracted or {})
+        if provisional is not None and _query_shape(query) == provisional_shape:
+            results, debug = await provisional
+            provisional = None
+            kept = _reconcile(results, query["budget"], query["deadline"])
+            if kept is not None:
+                return extracted, query, kept, {**debug, "provisional": True}
+            logger.info("[Provisional] budget/deadline left an item without products; searching again")
+    finally:
+        if provisional is not None and not provisional.done():
+            provisional.cancel()
+
+    if provisional is not None:
+        logger.info("[Provisional] final extract changed the query; searching again")
+    results, debug = await search_products(**query)
+    return extracted, query, results, debug
@@ -0,0 +1,197 @@
+"""
+Outfit assembly: one item per category, best total score within one budget.
+
+Categories are ranked independently against the whole budget, so their top picks can
+add up to far more than it. optimize_outfit takes the scored candidates of every
+category and solves the multiple-choice knapsack over prices discretized into
+`resolution` steps: dp[b] holds the best few bundles costing at most b steps, and each
+category is one max-plus pass over its candidates instead of enumerating combinations.
+Candidates beaten on both price and score by enough others are pruned first.
+Prices are rounded up to whole steps, so a returned bundle never exceeds the budget;
+candidates slower than the delivery deadline are left out.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+DEFAULT_RESOLUTION = 1000
+
+_NEG = float("-inf")
+
+
+def _feasible(entries: Sequence[Dict[str, Any]], max_delivery_days: float) -> List[Dict[str, Any]]:
+    if max_delivery_days <= 0:
+        return list(entries)
+    return [e for e in entries if float(e["product"].get("delivery_days", 0.0)) <= max_delivery_days]
+
+
+def _undominated(weights: List[int], scores: List[float], keep: int) -> List[int]:
+    """
+    Indices of candidates that can appear in a top-`keep` bundle: one with `keep` others at
+    most as expensive and at least as good is dropped, since swapping in any of those
+    gives `keep` distinct bundles that are no worse.
+    """
+    order = sorted(range(len(weights)), key=lambda i: (weights[i], -scores[i], i))
+    best: List[float] = []  # min-heap of the `keep` best scores among cheaper candidates
+    kept = []
+    for i in order:
+        if len(best) < keep or scores[i] > best[0]:
+            kept.append(i)
+        if len(best) < keep:
+            heapq.heappush(best, scores[i])
+        elif scores[i] > best[0]:
+            heapq.heapreplace(best, scores[i])
+    return sorted(kept)
+
+
+def _dp_numpy(
+    weights: List[List[int]],
+    scores: List[List[float]],
+    capacity: int,
+    keep: int,
+) -> Tuple[List[float], List[List[int]]]:
+    """Top `keep` totals at full capacity and their chosen candidate per category."""
+    cells = np.arange(capacity + 1)
+    dp = np.full((capacity + 1, keep), _NEG)
+    dp[:, 0] = 0.0
+    back = []
+    for w, s in zip(weights, scores):
+        w_arr = np.asarray(w, dtype=np.intp)
+        s_arr = np.asarray(s, dtype=np.float64)
+        prev = cells[None, :] - w_arr[:, None]  # candidates x cells
+        # (candidates, cells, keep) totals, then cells x (candidate, rank) flattened.
+        totals = np.where((prev >= 0)[:, :, None], dp[np.maximum(prev, 0)] + s_arr[:, None, None], _NEG)
+        totals = totals.transpose(1, 0, 2).reshape(capacity + 1, -1)
+        if totals.shape[1] > keep:
+            top = np.argpartition(-totals, keep - 1, axis=1)[:, :keep]
+        else:
+            top = np.broadcast_to(np.arange(totals.shape[1]), (capacity + 1, totals.shape[1]))
+        picked = np.take_along_axis(totals, top, axis=1)
+        # Best first; ties keep the higher-ranked candidate.
+        order = np.lexsort((top, -picked), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        picked = np.take_along_axis(picked, order, axis=1)
+        if picked.shape[1] < keep:
+            pad = keep - picked.shape[1]
+            picked = np.pad(picked, ((0, 0), (0, pad)), constant_values=_NEG)
+            top = np.pad(top, ((0, 0), (0, pad)))
+        dp = picked
+        back.append(top)
+
+    totals_out: List[float] = []
+    bundles: List[List[int]] = []
+    for rank in range(keep):
+        total = float(dp[capacity, rank])
+        if total == _NEG:
+            break
+        chosen: List[int] = []
+        b, r = capacity, rank
+        for i in range(len(weights) - 1, -1, -1):
+            c, r = divmod(int(back[i][b, r]), keep)
+            chosen.append(c)
+            b -= weights[i][c]
+        totals_out.append(total)
+        bundles.append(chosen[::-1])
+    return totals_out, bundles
+
+
+def _dp_python(
+    weights: List[List[int]],
+    scores: List[List[float]],
+    capacity: int,
+    keep: int,
+) -> Tuple[List[float], List[List[int]]]:
+    """Same recurrence as _dp_numpy with lists; cells hold (total, candidate, previous rank)."""
+    dp: List[List[Tuple[float, int, int]]] = [[(0.0, -1, -1)] for _ in range(capacity + 1)]
+    back: List[List[List[Tuple[float, int, int]]]] = []
+    for w, s in zip(weights, scores):
+        new: List[List[Tuple[float, int, int]]] = []
+        for b in range(capacity + 1):
+            options = [
+                (total + s[c], c, r)
+                for c in range(len(w))
+                if w[c] <= b
+                for r, (total, _c, _r) in enumerate(dp[b - w[c]])
+            ]
+            options.sort(key=lambda o: (-o[0], o[1] * keep + o[2]))
+            new.append(options[:keep])
+        back.append(new)
+        dp = new
+
+    totals_out: List[float] = []
+    bundles: List[List[int]] = []
+    for rank, (total, _c, _r) in enumerate(dp[capacity]):
+        chosen: List[int] = []
+        b, r = capacity, rank
+        for i in range(len(weights) - 1, -1, -1):
+            _t, c, r = back[i][b][r]
+            chosen.append(c)
+            b -= weights[i][c]
+        totals_out.append(total)
+        bundles.append(chosen[::-1])
+    return totals_out, bundles
+
+
+def optimize_outfit(
+    candidates: Dict[str, Sequence[Dict[str, Any]]],
+    budget: float,
+    max_delivery_days: float,
+    alternatives: int = 3,
+    resolution: int = DEFAULT_RESOLUTION,
+) -> Dict[str, Any]:
+    """
+    Pick one entry per category (score_product-shaped entries, best first) maximizing the
+    summed score with total price <= budget and every item within max_delivery_days.
+    Returns the best bundle plus up to `alternatives` runner-up bundles, best first.
+    Categories without a candidate meeting the deadline are listed in "unfilled"; if no
+    bundle fits the budget, "outfits" is empty. A non-positive budget means no price limit.
+    """
+    if alternatives < 0:
+        raise ValueError("alternatives must be non-negative")
+    if resolution < 1:
+        raise ValueError("resolution must be at least 1")
+
+    feasible = {category: _feasible(entries, max_delivery_days) for category, entries in candidates.items()}
+    unfilled = [category for category, entries in feasible.items() if not entries]
+    categories = [category for category, entries in feasible.items() if entries]
+    if budget <= 0:
+        budget = sum(max(float(e["product"].get("price", 0.0)) for e in feasible[c]) for c in categories)
+    step = budget / resolution if budget > 0 else 1.0
+    capacity = resolution if budget > 0 else 0
+
+    keep = alternatives + 1
+    weights: List[List[int]] = []
+    scores: List[List[float]] = []
+    for category in categories:
+        entries = feasible[category]
+        # The small slack keeps a price of exactly k steps at k despite float division.
+        units = [max(0, math.ceil(float(e["product"].get("price", 0.0)) / step - 1e-9)) for e in entries]
+        values = [float(e.get("score", 0.0)) for e in entries]
+        kept = _undominated(units, values, keep)
+        feasible[category] = [entries[i] for i in kept]
+        weights.append([units[i] for i in kept])
+        scores.append([values[i] for i in kept])
+    solve = _dp_numpy if HAS_NUMPY else _dp_python
+    totals, bundles = solve(weights, scores, capacity, keep) if categories else ([], [])
+
+    outfits = []
+    for total, chosen in zip(totals, bundles):
+        items = {category: feasible[category][c] for category, c in zip(categories, chosen)}
+        products = [entry["product"] for entry in items.values()]
+        outfits.append(
+            {
+                "items": items,
+                "total_score": round(total, 3),
+                "total_price": round(sum(float(p.get("price", 0.0)) for p in products), 2),
+                "delivery_days": max((float(p.get("delivery_days", 0.0)) for p in products), default=0.0),
+            }
+        )
+    return {"outfits": outfits, "unfilled": unfilled, "price_step": step}
@@ -1,25 +1,28 @@
-from typing import Dict, List, Any
-import os
+from typing import Callable, Dict, List, Any, Tuple
+import asyncio
+import base64
+import heapq
+import json
 import logging
 import re
 from dotenv import load_dotenv
-from app.data.ZEP_mcp import get_zep_client
-from app.data.pinterest import get_zep_thread_id
+from app.data.ZEP_mcp import get_async_zep_client, get_zep_client
+from app.services.ranking_vectorized import HAS_NUMPY, VECTORIZE_MIN_PRODUCTS, rank_category, rank_profiles
+from app.services.outfit_optimizer import optimize_outfit
+from app.services.style_similarity import style_match
+from app.services.explanations import (
+    ExplanationJob,
+    explain_winners,
+    explain_winners_async,
+    explanation_key,
+)
+from app.data.pinterest import get_cached_persona, get_persona_version, get_zep_thread_id, set_cached_persona
 from zep_cloud.errors import NotFoundError
 
-try:
-    from groq import Groq  # type: ignore
-    HAS_GROQ = True
-except ImportError:
-    HAS_GROQ = False
-    Groq = None  # type: ignore
-
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
 ZEP_CONTEXT_TEMPLATE_ID = "pinterest-style-color-context"
 
 
@@ -33,15 +36,16 @@ def score_product(
     budget: float,
     max_delivery_days: float,
 ) -> Dict[str, Any]:
-    price_score = max(0.0, 1.0 - (product["price"] / budget)) if budget > 0 else 0.5
-    delivery_score = max(0.0, (max_delivery_days - product["delivery_days"]) / max_delivery_days) if max_delivery_days > 0 else 0.5
-    style_score = product.get("preference_match", 0.5)
+    return _entry_from_factors(product, weights, _factor_scores(product, budget, max_delivery_days))
 
-    final_score = (
-        weights.get("price", 0.33) * price_score
-        + weights.get("delivery", 0.33) * delivery_score
-        + weights.get("style", 0.34) * style_score
-    )
+
+def _entry_from_factors(
+    product: Dict[str, Any],
+    weights: Dict[str, float],
+    factors: Tuple[float, float, float],
+) -> Dict[str, Any]:
+    price_score, delivery_score, style_score = factors
+    final_score = _weighted_score(weights, price_score, delivery_score, style_score)
 
     decomposition = {
         "price_contrib": round(weights.get("price", 0.33) * price_score, 3),
@@ -61,6 +65,21 @@ def score_product(
     }
 
 
+def _factor_scores(product: Dict[str, Any], budget: float, max_delivery_days: float) -> Tuple[float, float, float]:
+    price_score = max(0.0, 1.0 - (product["price"] / budget)) if budget > 0 else 0.5
+    delivery_score = max(0.0, (max_delivery_days - product["delivery_days"]) / max_delivery_days) if max_delivery_days > 0 else 0.5
+    style_score = product.get("preference_match", 0.5)
+    return price_score, delivery_score, style_score
+
+
+def _weighted_score(weights: Dict[str, float], price_score: float, delivery_score: float, style_score: float) -> float:
+    return (
+        weights.get("price", 0.33) * price_score
+        + weights.get("delivery", 0.33) * delivery_score
+        + weights.get("style", 0.34) * style_score
+    )
+
+
 # =============================================================================
 # WEIGHTS FROM PREFERENCES
 # =============================================================================
@@ -89,25 +108,21 @@ def get_weights(preferences: List[str]) -> Dict[str, float]:
 # =============================================================================
 
 def calculate_style_match(product: Dict[str, Any], persona: Dict[str, Any]) -> float:
-    score = 0.0
-    total_weight = 0.0
-
-    product_color = product.get("color", "").lower()
-    preferred_colors = persona.get("preferred_colors", [])
-    color_match = 1.0 if product_color in [c.lower() for c in preferred_colors] else 0.0
-    score += color_match * 0.4
-    total_weight += 0.4
+    """
+    0.4 * color hit (through color synonyms) + 0.6 * style similarity between the
+    product's text and the persona's preferred styles; see style_similarity.
+    """
+    return style_match(product, persona)
 
-    product_style = product.get("style", "").lower()
-    preferred_styles = persona.get("preferred_styles", [])
-    style_match = 1.0 if product_style in [s.lower() for s in preferred_styles] else 0.0
-    score += style_match * 0.6
-    total_weight += 0.6
 
-    return round(score / total_weight, 3) if total_weight > 0 else 0.5
+_zep_template_ready = False
 
 
-def _ensure_zep_context_template() -> None:
+def ensure_zep_context_template(force: bool = False) -> None:
+    """Create the Zep context template once per process (called at startup); force re-creates it."""
+    global _zep_template_ready
+    if _zep_template_ready and not force:
+        return
     client = get_zep_client()
     if not client:
         return
@@ -127,7 +142,8 @@ def _ensure_zep_context_template() -> None:
         )
     except Exception:
         # Template may already exist; ignore.
-        return
+        pass
+    _zep_template_ready = True
 
 
 def _parse_section_list(context_text: str, header: str) -> List[str]:
@@ -166,83 +182,109 @@ def _parse_styles_colors_from_messages(context_text: str) -> Dict[str, List[str]
     }
 
 
+def _parse_persona_context(context_text: str) -> Dict[str, Any]:
+    logger.info("[Zep] Raw context length=%s", len(context_text))
+    if context_text:
+        logger.info("[Zep] Raw context:\n%s", context_text)
+    if not context_text:
+        return {}
+
+    colors = _parse_section_list(context_text, "# PREFERRED COLORS")
+    styles = _parse_section_list(context_text, "# PREFERRED STYLES")
+    if not colors and not styles:
+        parsed = _parse_styles_colors_from_messages(context_text)
+        colors = parsed.get("preferred_colors", [])
+        styles = parsed.get("preferred_styles", [])
+
+    logger.info("[Zep] Parsed preferred_colors=%s", colors)
+    logger.info("[Zep] Parsed preferred_styles=%s", styles)
+
+    return {
+        "preferred_styles": styles,
+        "preferred_colors": colors,
+    }
+
+
+def _fetch_zep_persona(client: Any, thread_id: str) -> Dict[str, Any]:
+    """One get_user_context round trip; raises on anything but a missing thread/template."""
+    ensure_zep_context_template()
+    logger.info("[Zep] Retrieving context for thread=%s template=%s", thread_id, ZEP_CONTEXT_TEMPLATE_ID)
+    try:
+        result = client.thread.get_user_context(thread_id=thread_id, template_id=ZEP_CONTEXT_TEMPLATE_ID)
+    except NotFoundError:
+        logger.info("[Zep] Context template or thread not found; retrying after template ensure")
+        ensure_zep_context_template(force=True)
+        try:
+            result = client.thread.get_user_context(thread_id=thread_id, template_id=ZEP_CONTEXT_TEMPLATE_ID)
+        except NotFoundError:
+            logger.info("[Zep] Thread not found for thread_id=%s; skipping persona retrieval", thread_id)
+            return {}
+    return _parse_persona_context(getattr(result, "context", "") or "")
+
+
 def get_zep_persona_from_pinterest() -> Dict[str, Any]:
+    """Persona for the connected Pinterest thread, cached per thread until the TTL or the next sync."""
     client = get_zep_client()
     thread_id = get_zep_thread_id()
     if not client or not thread_id:
         logger.info("[Zep] Missing client or Pinterest thread; skipping persona retrieval")
         return {}
 
-    _ensure_zep_context_template()
+    cached = get_cached_persona(thread_id)
+    if cached is not None:
+        logger.info("[Zep] Persona cache hit for thread=%s", thread_id)
+        return cached
+
+    version = get_persona_version()
+    try:
+        persona = _fetch_zep_persona(client, thread_id)
+    except Exception as exc:
+        # Failures are not cached; the next ranking tries again.
+        logger.exception("[Zep] Failed to retrieve context: %s", exc)
+        return {}
+    set_cached_persona(thread_id, persona, version)
+    return persona
+
 
+async def _fetch_zep_persona_async(client: Any, thread_id: str) -> Dict[str, Any]:
+    """_fetch_zep_persona with the async Zep client; the one-time template setup runs in a thread."""
+    if not _zep_template_ready:
+        await asyncio.to_thread(ensure_zep_context_template)
+    logger.info("[Zep] Retrieving context for thread=%s template=%s", thread_id, ZEP_CONTEXT_TEMPLATE_ID)
     try:
+        result = await client.thread.get_user_context(thread_id=thread_id, template_id=ZEP_CONTEXT_TEMPLATE_ID)
+    except NotFoundError:
+        logger.info("[Zep] Context template or thread not found; retrying after template ensure")
+        await asyncio.to_thread(ensure_zep_context_template, True)
         try:
-            client.thread.get(thread_id=thread_id)
+            result = await client.thread.get_user_context(thread_id=thread_id, template_id=ZEP_CONTEXT_TEMPLATE_ID)
         except NotFoundError:
             logger.info("[Zep] Thread not found for thread_id=%s; skipping persona retrieval", thread_id)
             return {}
+    return _parse_persona_context(getattr(result, "context", "") or "")
 
-        logger.info("[Zep] Retrieving context for thread=%s template=%s", thread_id, ZEP_CONTEXT_TEMPLATE_ID)
-        result = client.thread.get_user_context(
-            thread_id=thread_id,
-            template_id=ZEP_CONTEXT_TEMPLATE_ID,
-        )
-        context_text = getattr(result, "context", "") or ""
-        logger.info("[Zep] Raw context length=%s", len(context_text))
-        if context_text:
-            logger.info("[Zep] Raw context:\n%s", context_text)
-        if not context_text:
-            return {}
 
-        colors = _parse_section_list(context_text, "# PREFERRED COLORS")
-        styles = _parse_section_list(context_text, "# PREFERRED STYLES")
-        if not colors and not styles:
-            parsed = _parse_styles_colors_from_messages(context_text)
-            colors = parsed.get("preferred_colors", [])
-            styles = parsed.get("preferred_styles", [])
+async def get_zep_persona_from_pinterest_async() -> Dict[str, Any]:
+    """get_zep_persona_from_pinterest without blocking the event loop on a cache miss."""
+    client = get_async_zep_client()
+    thread_id = get_zep_thread_id()
+    if not client or not thread_id:
+        logger.info("[Zep] Missing client or Pinterest thread; skipping persona retrieval")
+        return {}
 
-        logger.info("[Zep] Parsed preferred_colors=%s", colors)
-        logger.info("[Zep] Parsed preferred_styles=%s", styles)
+    cached = get_cached_persona(thread_id)
+    if cached is not None:
+        logger.info("[Zep] Persona cache hit for thread=%s", thread_id)
+        return cached
 
-        return {
-            "preferred_styles": styles,
-            "preferred_colors": colors,
-        }
-    except NotFoundError:
-        logger.info("[Zep] Context template or thread not found; retrying after template ensure")
-        _ensure_zep_context_template()
-        try:
-            result = client.thread.get_user_context(
-                thread_id=thread_id,
-                template_id=ZEP_CONTEXT_TEMPLATE_ID,
-            )
-            context_text = getattr(result, "context", "") or ""
-            logger.info("[Zep] Raw context length=%s", len(context_text))
-            if context_text:
-                logger.info("[Zep] Raw context:\n%s", context_text)
-            if not context_text:
-                return {}
-
-            colors = _parse_section_list(context_text, "# PREFERRED COLORS")
-            styles = _parse_section_list(context_text, "# PREFERRED STYLES")
-            if not colors and not styles:
-                parsed = _parse_styles_colors_from_messages(context_text)
-                colors = parsed.get("preferred_colors", [])
-                styles = parsed.get("preferred_styles", [])
-
-            logger.info("[Zep] Parsed preferred_colors=%s", colors)
-            logger.info("[Zep] Parsed preferred_styles=%s", styles)
-
-            return {
-                "preferred_styles": styles,
-                "preferred_colors": colors,
-            }
-        except Exception as exc:
-            logger.exception("[Zep] Failed to retrieve context after retry: %s", exc)
-            return {}
+    version = get_persona_version()
+    try:
+        persona = await _fetch_zep_persona_async(client, thread_id)
     except Exception as exc:
         logger.exception("[Zep] Failed to retrieve context: %s", exc)
         return {}
+    set_cached_persona(thread_id, persona, version)
+    return persona
 
 
 # =============================================================================
@@ -286,11 +328,11 @@ def _generate_fallback_explanation(best: Dict[str, Any], category: str, weights:
 # LLM EXPLANATION (Groq)
 # =============================================================================
 
-def generate_llm_explanation(best: Dict[str, Any], category: str, weights: Dict[str, float], preferences: List[str]) -> str:
+def _explanation_prompt(best: Dict[str, Any], category: str, weights: Dict[str, float], preferences: List[str]) -> str:
     p = best["product"]
     decomp = best["decomposition"]
 
-    prompt = f"""You are an expert shopping assistant. Write a short, natural, and convincing English explanation (3-4 sentences) of why this product is ranked #1 in the "{category}" category.
+    return f"""You are an expert shopping assistant. Write a short, natural, and convincing English explanation (3-4 sentences) of why this product is ranked #1 in the "{category}" category.
 
 Product: {p.get('name', 'Unknown')} from {p.get('retailer', 'Unknown retailer')}
 Price: ${p.get('price', 0):.2f}
@@ -308,45 +350,217 @@ User preferences: {', '.join(preferences) or 'balanced'}
 
 Be honest, focus on the strongest factor, use friendly tone. Return only the explanation."""
 
-    if not GROQ_API_KEY or not HAS_GROQ:
-        return _generate_fallback_explanation(best, category, weights, preferences)
 
-    try:
-        client = Groq(api_key=GROQ_API_KEY)
-        model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=150,
+def _batched_explanation_prompt(
+    winners: List[Tuple[str, Dict[str, Any]]],
+    weights: Dict[str, float],
+    preferences: List[str],
+) -> str:
+    """One prompt for the #1 of several categories; instructions and preferences are sent once."""
+    blocks = []
+    for category, best in winners:
+        p = best["product"]
+        decomp = best["decomposition"]
+        blocks.append(
+            f"""[{category}]
+Product: {p.get('name', 'Unknown')} from {p.get('retailer', 'Unknown retailer')}
+Price: ${p.get('price', 0):.2f} | Delivery: {p.get('delivery_days', 0)} days | Style match: {p.get('preference_match', 'N/A')}
+Final score: {best.get('score', 0):.3f} (price {decomp.get('price_contrib', 0):.3f}, delivery {decomp.get('delivery_contrib', 0):.3f}, style {decomp.get('style_contrib', 0):.3f})"""
         )
+    keys = ", ".join(json.dumps(category) for category, _best in winners)
+    products = "\n\n".join(blocks)
+
+    return f"""You are an expert shopping assistant. For each category below, write a short, natural, and convincing English explanation (3-4 sentences) of why its product is ranked #1 in that category.
+
+Weights: price {weights.get('price', 0):.0%}, delivery {weights.get('delivery', 0):.0%}, style {weights.get('style', 0):.0%}
+User preferences: {', '.join(preferences) or 'balanced'}
+
+{products}
 
-        return completion.choices[0].message.content.strip()
+Be honest, focus on each product's strongest factor, use friendly tone.
+Return only a JSON object with exactly these keys: {keys}. Each value is the explanation for that category."""
+
+
+def _explanation_jobs(
+    winners: List[Tuple[str, Dict[str, Any]]],
+    weights: Dict[str, float],
+    preferences: List[str],
+) -> Tuple[List[ExplanationJob], Callable[[List[ExplanationJob]], str]]:
+    jobs = [
+        ExplanationJob(
+            category=category,
+            key=explanation_key(best, category, weights, preferences),
+            prompt=_explanation_prompt(best, category, weights, preferences),
+            fallback=_generate_fallback_explanation(best, category, weights, preferences),
+        )
+        for category, best in winners
+    ]
+    by_category = dict(winners)
+
+    def batch_prompt(batch: List[ExplanationJob]) -> str:
+        return _batched_explanation_prompt([(job.category, by_category[job.category]) for job in batch], weights, preferences)
+
+    return jobs, batch_prompt
+
+
+def _apply_explanations(winners: List[Tuple[str, Dict[str, Any]]], explained: Dict[str, Dict[str, Any]]) -> None:
+    for category, best in winners:
+        explanation = explained[category]
+        best["llm_explanation"] = explanation["text"]
+        best["llm_explanation_pending"] = explanation["pending"]
+        best["explanation_key"] = explanation["key"]
+
+
+def explain_ranked_winners(
+    winners: List[Tuple[str, Dict[str, Any]]],
+    weights: Dict[str, float],
+    preferences: List[str],
+    budget_ms: float | None = None,
+) -> None:
+    """
+    Explain every category's #1 (see app.services.explanations): uncached winners share one
+    batched prompt, or run concurrently one call each with LLM_EXPLAIN_BATCH=0. Each
+    entry gets llm_explanation now; when the LLM misses the latency budget that is the
+    fallback text, llm_explanation_pending is True and explanation_key finds the LLM text later.
+    """
+    jobs, batch_prompt = _explanation_jobs(winners, weights, preferences)
+    _apply_explanations(winners, explain_winners(jobs, budget_ms, batch_prompt=batch_prompt))
+
+
+async def explain_ranked_winners_async(
+    winners: List[Tuple[str, Dict[str, Any]]],
+    weights: Dict[str, float],
+    preferences: List[str],
+    budget_ms: float | None = None,
+) -> None:
+    """explain_ranked_winners that awaits the latency budget instead of blocking."""
+    jobs, batch_prompt = _explanation_jobs(winners, weights, preferences)
+    _apply_explanations(winners, await explain_winners_async(jobs, budget_ms, batch_prompt=batch_prompt))
+
+
+# =============================================================================
+# TOP-K PAGES
+# =============================================================================
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def _page_block(offset: int, top_k: int, totals: Dict[str, int]) -> Dict[str, Any]:
+    has_more = any(offset + top_k < total for total in totals.values())
+    return {
+        "offset": offset,
+        "top_k": top_k,
+        "totals": totals,
+        "next_cursor": encode_cursor(offset + top_k) if has_more else None,
+    }
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offset = int(json.loads(raw)["offset"])
     except Exception:
-        return _generate_fallback_explanation(best, category, weights, preferences)
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def _rank_python(
+    products: List[Dict[str, Any]],
+    persona: Dict[str, Any],
+    weights: Dict[str, float],
+    budget: float,
+    max_delivery_days: float,
+    offset: int,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Heap-select ranks [offset, offset + limit); score_product details only for those."""
+    for p in products:
+        p["preference_match"] = calculate_style_match(p, persona)
+    keyed = (
+        (-round(_weighted_score(weights, *_factor_scores(p, budget, max_delivery_days)), 3), i)
+        for i, p in enumerate(products)
+    )
+    # (−score, index) keeps ties in input order, like the stable full sort.
+    selected = heapq.nsmallest(offset + limit, keyed)[offset:]
+    return [score_product(products[i], weights, budget, max_delivery_days) for _neg, i in selected]
 
 
 # =============================================================================
 # MAIN PROCESS
 # =============================================================================
 
-def process_and_rank(products_data: Dict[str, Any], client_data: Dict[str, Any], zep_persona: Dict[str, Any]) -> Dict[str, Any]:
+def process_and_rank(
+    products_data: Dict[str, Any],
+    client_data: Dict[str, Any],
+    zep_persona: Dict[str, Any],
+    top_k: int | None = None,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Rank every category of products_data. Without top_k each category is fully ranked.
+    With top_k only ranks [offset, offset + top_k) are selected and built (offset comes
+    from cursor), entries carry their "rank", and a "page" block holds the next cursor.
+    """
+    offset = _page_offset(top_k, cursor)
+    persona = _resolve_persona(zep_persona)
+    ranking, winners = _rank_categories(products_data, client_data, persona, top_k, offset)
+    if winners:
+        explain_ranked_winners(winners, ranking["weights"], client_data.get("preferences_clicked", []))
+        _log_explanations(winners)
+    return ranking
+
+
+async def process_and_rank_async(
+    products_data: Dict[str, Any],
+    client_data: Dict[str, Any],
+    zep_persona: Dict[str, Any],
+    top_k: int | None = None,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    process_and_rank for async handlers: the persona and the explanations are awaited,
+    and the CPU-only scoring runs in a worker thread, so one ranking never stalls the
+    event loop for other requests. Same result as process_and_rank.
+    """
+    offset = _page_offset(top_k, cursor)
+    persona = await _resolve_persona_async(zep_persona)
+    ranking, winners = await asyncio.to_thread(_rank_categories, products_data, client_data, persona, top_k, offset)
+    if winners:
+        await explain_ranked_winners_async(winners, ranking["weights"], client_data.get("preferences_clicked", []))
+        _log_explanations(winners)
+    return ranking
+
+
+def _page_offset(top_k: int | None, cursor: str | None) -> int:
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be at least 1")
+    return decode_cursor(cursor) if cursor else 0
+
+
+def _log_explanations(winners: List[Tuple[str, Dict[str, Any]]]) -> None:
+    for category, best in winners:
+        logger.info("[Ranking] category=%s top_llm_explanation=%s", category, best.get("llm_explanation"))
+
+
+def _rank_categories(
+    products_data: Dict[str, Any],
+    client_data: Dict[str, Any],
+    zep_persona: Dict[str, Any],
+    top_k: int | None,
+    offset: int,
+) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]:
+    """Scoring only (no I/O): the ranking without explanations, and each category's #1 to explain."""
     budget = client_data.get("budget", 400.0)
     max_delivery_days = client_data.get("delivery_deadline", 5.0)
     preferences = client_data.get("preferences_clicked", [])
-
     weights = get_weights(preferences)
 
     results: Dict[str, Any] = {}
-
-    zep_persona = zep_persona or {}
-    zep_context = get_zep_persona_from_pinterest()
-    if zep_context:
-        zep_persona = {
-            "preferred_styles": zep_context.get("preferred_styles") or zep_persona.get("preferred_styles") or [],
-            "preferred_colors": zep_context.get("preferred_colors") or zep_persona.get("preferred_colors") or [],
-        }
+    totals: Dict[str, int] = {}
+    winners: List[Tuple[str, Dict[str, Any]]] = []
 
     logger.info("[Ranking] start")
     logger.info("[Ranking] budget=%s max_delivery_days=%s preferences=%s", budget, max_delivery_days, preferences)
@@ -358,15 +572,27 @@ def process_and_rank(products_data: Dict[str, Any], client_data: Dict[str, Any],
             continue
 
         logger.info("[Ranking] category=%s products=%s", category, len(products))
-        for p in products:
-            p["preference_match"] = calculate_style_match(p, zep_persona)
-
-        scored = [score_product(p, weights, budget, max_delivery_days) for p in products]
-        scored.sort(key=lambda x: x["score"], reverse=True)
-
-        if scored:
+        totals[category] = len(products)
+        if HAS_NUMPY and len(products) >= VECTORIZE_MIN_PRODUCTS:
+            scored = rank_category(products, zep_persona, weights, budget, max_delivery_days, offset, top_k)
+        elif top_k is not None:
+            scored = _rank_python(products, zep_persona, weights, budget, max_delivery_days, offset, top_k)
+        else:
+            for p in products:
+                p["preference_match"] = calculate_style_match(p, zep_persona)
+
+            scored = [score_product(p, weights, budget, max_delivery_days) for p in products]
+            scored.sort(key=lambda x: x["score"], reverse=True)
+            scored = scored[offset:]
+
+        if top_k is not None:
+            for rank, entry in enumerate(scored, start=offset + 1):
+                entry["rank"] = rank
+
+        # Only the overall #1 gets an explanation; later pages do not.
+        if scored and offset == 0:
             best = scored[0]
-            best["llm_explanation"] = generate_llm_explanation(best, category, weights, preferences)
+            winners.append((category, best))
             logger.info(
                 "[Ranking] top=%s score=%s price=%s delivery_days=%s",
                 best["product"].get("name"),
@@ -376,7 +602,6 @@ def process_and_rank(products_data: Dict[str, Any], client_data: Dict[str, Any],
             )
             logger.info("[Ranking] top_decomposition=%s", best.get("decomposition"))
             logger.info("[Ranking] top_why_local=%s", best.get("why_local"))
-            logger.info("[Ranking] top_llm_explanation=%s", best.get("llm_explanation"))
 
         # Trace all ranked items (top 5 for clarity)
         for idx, entry in enumerate(scored[:5], start=1):
@@ -394,10 +619,116 @@ def process_and_rank(products_data: Dict[str, Any], client_data: Dict[str, Any],
 
         results[category] = scored
 
-    return {
+    ranking = {
         "weights": weights,
         "results": results,
     }
+    if top_k is not None:
+        ranking["page"] = _page_block(offset, top_k, totals)
+    return ranking, winners
+
+
+def _resolve_persona(zep_persona: Dict[str, Any] | None) -> Dict[str, Any]:
+    """The request persona, with styles and colors from the synced Pinterest/Zep persona taking precedence."""
+    return _merge_persona(zep_persona, get_zep_persona_from_pinterest())
+
+
+async def _resolve_persona_async(zep_persona: Dict[str, Any] | None) -> Dict[str, Any]:
+    return _merge_persona(zep_persona, await get_zep_persona_from_pinterest_async())
+
+
+def _merge_persona(zep_persona: Dict[str, Any] | None, zep_context: Dict[str, Any]) -> Dict[str, Any]:
+    zep_persona = zep_persona or {}
+    if zep_context:
+        zep_persona = {
+            "preferred_styles": zep_context.get("preferred_styles") or zep_persona.get("preferred_styles") or [],
+            "preferred_colors": zep_context.get("preferred_colors") or zep_persona.get("preferred_colors") or [],
+        }
+    return zep_persona
+
+
+# =============================================================================
+# BATCH RANKING (many profiles, one product set)
+# =============================================================================
+
+def process_batch_rank(
+    products_data: Dict[str, Any],
+    profiles: List[Dict[str, Any]],
+    top_k: int = 10,
+) -> Dict[str, Any]:
+    """
+    Rank one products_data for many profiles ({"client_data", "zep_persona", "id"?}).
+    Style matches and scores are one products x profiles matrix per category, so the
+    cost grows with the product count, not with profiles x products Python calls.
+    Each profile gets its top_k per category with score_product-shaped entries. Personas
+    are used as given (no Pinterest merge) and no LLM explanations are generated.
+    """
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1")
+    personas = [profile.get("zep_persona") or {} for profile in profiles]
+    client_data = [profile.get("client_data") or {} for profile in profiles]
+    weights = [get_weights(c.get("preferences_clicked", [])) for c in client_data]
+    budgets = [c.get("budget", 400.0) for c in client_data]
+    max_days = [c.get("delivery_deadline", 5.0) for c in client_data]
+
+    ranked: List[Dict[str, Any]] = [
+        {"id": profile.get("id", i), "weights": weights[i], "results": {}} for i, profile in enumerate(profiles)
+    ]
+    logger.info("[Ranking] batch profiles=%s categories=%s", len(profiles), len(products_data.get("items", {})))
+    for category, products in products_data.get("items", {}).items():
+        if not products or not profiles:
+            continue
+        if HAS_NUMPY:
+            per_profile = rank_profiles(products, personas, weights, budgets, max_days, top_k)
+        else:
+            per_profile = []
+            for i in range(len(profiles)):
+                copies = [dict(p) for p in products]
+                per_profile.append(_rank_python(copies, personas[i], weights[i], budgets[i], max_days[i], 0, top_k))
+        for i, scored in enumerate(per_profile):
+            for rank, entry in enumerate(scored, start=1):
+                entry["rank"] = rank
+            ranked[i]["results"][category] = scored
+
+    return {"top_k": top_k, "profiles": ranked}
+
+
+# =============================================================================
+# OUTFIT (one item per category under one budget)
+# =============================================================================
+
+def process_outfit(
+    products_data: Dict[str, Any],
+    client_data: Dict[str, Any],
+    zep_persona: Dict[str, Any],
+    alternatives: int = 3,
+    candidates: int = 200,
+) -> Dict[str, Any]:
+    """
+    Rank every category (top `candidates` each), then pick one item per category that
+    maximizes the summed score with the total price within budget and every item within
+    the delivery deadline. Returns the best outfit and up to `alternatives` runner-ups.
+
+    Categories are ranked without explanations (their #1 is often not picked); only the
+    best outfit's items are explained, without waiting: cached text or the fallback now,
+    llm_explanation_pending and explanation_key for the LLM text.
+    """
+    budget = client_data.get("budget", 400.0)
+    max_delivery_days = client_data.get("delivery_deadline", 5.0)
+    persona = _resolve_persona(zep_persona)
+    ranking, _winners = _rank_categories(products_data, client_data, persona, candidates, 0)
+    outfit = optimize_outfit(ranking["results"], budget, max_delivery_days, alternatives=alternatives)
+    if outfit["outfits"]:
+        picked = list(outfit["outfits"][0]["items"].items())
+        explain_ranked_winners(picked, ranking["weights"], client_data.get("preferences_clicked", []), budget_ms=0)
+    logger.info(
+        "[Outfit] categories=%s outfits=%s unfilled=%s best_total=%s",
+        len(ranking["results"]),
+        len(outfit["outfits"]),
+        outfit["unfilled"],
+        outfit["outfits"][0]["total_price"] if outfit["outfits"] else None,
+    )
+    return {"weights": ranking["weights"], "budget": budget, "max_delivery_days": max_delivery_days, **outfit}
 
 
 def _parse_budget_value(budget_str: str) -> float | None:
@@ -445,8 +776,29 @@ def _group_results_by_item(results: List[Dict[str, Any]]) -> Dict[str, List[Dict
 def process_from_extract_and_results(
     extract: Dict[str, Any],
     results: List[Dict[str, Any]],
+    top_k: int | None = None,
+    cursor: str | None = None,
 ) -> Dict[str, Any]:
     """Rank SearchResultItem-style results using LLM extractor output as input."""
+    products_data, client_data, zep_persona = _extract_ranking_inputs(extract, results)
+    return process_and_rank(products_data, client_data, zep_persona, top_k=top_k, cursor=cursor)
+
+
+async def process_from_extract_and_results_async(
+    extract: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    top_k: int | None = None,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """process_from_extract_and_results through process_and_rank_async."""
+    products_data, client_data, zep_persona = _extract_ranking_inputs(extract, results)
+    return await process_and_rank_async(products_data, client_data, zep_persona, top_k=top_k, cursor=cursor)
+
+
+def _extract_ranking_inputs(
+    extract: Dict[str, Any],
+    results: List[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
     budget_value = _parse_budget_value(str(extract.get("budget", ""))) or 400.0
     deadline_value = _parse_deadline_days(str(extract.get("deadline", ""))) or 5.0
     preferences = extract.get("constraints") or []
@@ -475,8 +827,10 @@ def process_from_extract_and_results(
                     "price": float(item.get("price") or 0.0),
                     "delivery_days": _parse_delivery_days(item.get("delivery_estimate") or item.get("deliveryEstimate")),
                     "retailer": item.get("retailer") or "",
-                    "style": (styles[0] if styles else ""),
-                    "color": (colors[0] if colors else ""),
+                    # The product's own text and variant colors; the extract's style and
+                    # colors are the persona they are matched against.
+                    "description": item.get("short_description") or "",
+                    "colors": list((item.get("variants") or {}).get("colors") or []),
                 }
             )
         products_by_category[category] = converted
@@ -484,4 +838,4 @@ def process_from_extract_and_results(
     logger.info("[RankingWorkflow] extract=%s", extract)
     logger.info("[RankingWorkflow] grouped_items=%s", {k: len(v) for k, v in products_by_category.items()})
 
-    return process_and_rank({"items": products_by_category, "query": extract.get("item") or ""}, client_data, zep_persona)
+    return {"items": products_by_category, "query": extract.get("item") or ""}, client_data, zep_persona
@@ -0,0 +1,174 @@
+"""
+Ranking sessions: re-rank the same products under new preference weights.
+
+Creating a session resolves the persona once, style-matches every product and caches
+each category's factor scores (price_score, delivery_score, style_score). A reweight
+(a preference chip toggled in the UI) only recomputes the weighted sum and the order
+from those cached factors; results are identical to process_and_rank with the new
+preferences on the same products and persona.
+"""
+
+import heapq
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.ranking_service import (
+    _entry_from_factors,
+    _factor_scores,
+    _page_block,
+    _resolve_persona,
+    _weighted_score,
+    calculate_style_match,
+    decode_cursor,
+    explain_ranked_winners,
+    get_weights,
+)
+from app.services.ranking_vectorized import HAS_NUMPY, VECTORIZE_MIN_PRODUCTS, category_factors, rank_factors
+
+_MAX_SESSIONS = 256
+
+_lock = threading.Lock()
+_sessions: "OrderedDict[str, RankingSession]" = OrderedDict()
+
+
+@dataclass
+class RankingSession:
+    session_id: str
+    expires_at: float
+    budget: float
+    max_delivery_days: float
+    persona: Dict[str, Any]
+    # category -> (products, factors): a 3 x n array, or a list of per-product tuples for small categories
+    categories: Dict[str, Tuple[List[Dict[str, Any]], Any]] = field(default_factory=dict)
+
+
+def _ttl() -> float:
+    return float(os.environ.get("RANKING_SESSION_TTL", 1800))
+
+
+def _rank(
+    products: List[Dict[str, Any]],
+    factors: Any,
+    weights: Dict[str, float],
+    offset: int,
+    top_k: Optional[int],
+) -> List[Dict[str, Any]]:
+    if not isinstance(factors, list):
+        return rank_factors(products, factors, weights, offset, top_k)
+    if top_k is None:
+        scored = [_entry_from_factors(p, weights, f) for p, f in zip(products, factors)]
+        scored.sort(key=lambda x: x["score"], reverse=True)
+        return scored[offset:]
+    keyed = ((-round(_weighted_score(weights, *f), 3), i) for i, f in enumerate(factors))
+    selected = heapq.nsmallest(offset + top_k, keyed)[offset:]
+    return [_entry_from_factors(products[i], weights, factors[i]) for _neg, i in selected]
+
+
+def _session_ranking(
+    session: RankingSession,
+    preferences: List[str],
+    top_k: Optional[int],
+    cursor: Optional[str],
+    explain_budget_ms: Optional[float],
+) -> Dict[str, Any]:
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be at least 1")
+    offset = decode_cursor(cursor) if cursor else 0
+    weights = get_weights(preferences)
+    results: Dict[str, Any] = {}
+    totals: Dict[str, int] = {}
+    winners: List[Tuple[str, Dict[str, Any]]] = []
+    for category, (products, factors) in session.categories.items():
+        totals[category] = len(products)
+        scored = _rank(products, factors, weights, offset, top_k)
+        if top_k is not None:
+            for rank, entry in enumerate(scored, start=offset + 1):
+                entry["rank"] = rank
+        if scored and offset == 0:
+            winners.append((category, scored[0]))
+        results[category] = scored
+    if winners:
+        explain_ranked_winners(winners, weights, preferences, explain_budget_ms)
+
+    ranking: Dict[str, Any] = {"session_id": session.session_id, "weights": weights, "results": results}
+    if top_k is not None:
+        ranking["page"] = _page_block(offset, top_k, totals)
+    return ranking
+
+
+def create_ranking_session(
+    products_data: Dict[str, Any],
+    client_data: Dict[str, Any],
+    zep_persona: Dict[str, Any],
+    top_k: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Cache the factor scores of products_data and return its first ranking with a session_id."""
+    budget = client_data.get("budget", 400.0)
+    max_delivery_days = client_data.get("delivery_deadline", 5.0)
+    persona = _resolve_persona(zep_persona)
+    session = RankingSession(
+        session_id=secrets.token_urlsafe(12),
+        expires_at=time.monotonic() + _ttl(),
+        budget=budget,
+        max_delivery_days=max_delivery_days,
+        persona=persona,
+    )
+    for category, products in products_data.get("items", {}).items():
+        if not products:
+            continue
+        # Session-owned copies: preference_match is written into them.
+        products = [dict(p) for p in products]
+        if HAS_NUMPY and len(products) >= VECTORIZE_MIN_PRODUCTS:
+            factors: Any = category_factors(products, persona, budget, max_delivery_days)
+        else:
+            for p in products:
+                p["preference_match"] = calculate_style_match(p, persona)
+            factors = [_factor_scores(p, budget, max_delivery_days) for p in products]
+        session.categories[category] = (products, factors)
+
+    with _lock:
+        _sessions[session.session_id] = session
+        while len(_sessions) > _MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return _session_ranking(session, client_data.get("preferences_clicked", []), top_k, cursor, None)
+
+
+def get_ranking_session(session_id: str) -> Optional[RankingSession]:
+    with _lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            return None
+        if session.expires_at < time.monotonic():
+            _sessions.pop(session_id, None)
+            return None
+        session.expires_at = time.monotonic() + _ttl()
+        _sessions.move_to_end(session_id)
+        return session
+
+
+def reweight_session(
+    session_id: str,
+    preferences: List[str],
+    top_k: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Re-rank a session for new preferences, or None if it expired. Explanations do not
+    wait for the LLM here: a cached one is used, otherwise the fallback text is returned
+    with llm_explanation_pending and the LLM text lands under its explanation_key.
+    """
+    session = get_ranking_session(session_id)
+    if session is None:
+        return None
+    return _session_ranking(session, preferences, top_k, cursor, 0)
+
+
+def close_ranking_session(session_id: str) -> bool:
+    with _lock:
+        return _sessions.pop(session_id, None) is not None
@@ -0,0 +1,240 @@
+"""
+Columnar scoring for process_and_rank.
+
+Packs price, delivery days and style match of a whole category into arrays and
+computes scores, contributions, the strongest factor and the ranking order in a
+few NumPy operations. Output matches calculate_style_match + score_product +
+sort(reverse=True) exactly, including Python's round() and stable tie order.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.style_similarity import StyleMatcher
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+# Below this many products per category the plain Python loop is faster.
+VECTORIZE_MIN_PRODUCTS = 32
+
+_FACTORS = ("price", "delivery", "style")
+
+
+def _round3(values: "np.ndarray") -> "np.ndarray":
+    """round(x, 3) for every element, bit-identical to Python's round()."""
+    rounded = np.round(values, 3)
+    scaled = values * 1000.0
+    # np.round scales before rounding; near .5 ties that can disagree with Python's
+    # correctly rounded result, so those few elements go through round().
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous.tolist():
+        rounded.flat[i] = round(float(values.flat[i]), 3)
+    return rounded
+
+
+def style_match_many(products: Sequence[Dict[str, Any]], persona: Dict[str, Any]) -> "np.ndarray":
+    """Vector form of calculate_style_match: one StyleMatcher row, rounded like round(x, 3)."""
+    return _round3(StyleMatcher(products, [persona]).rows(0, 1)[0])
+
+
+def factor_columns(
+    price: "np.ndarray",
+    delivery_days: "np.ndarray",
+    style: "np.ndarray",
+    budget: float,
+    max_delivery_days: float,
+) -> "np.ndarray":
+    """Unweighted price, delivery and style scores (3 x n), same formula as _factor_scores."""
+    n = len(price)
+    price_score = np.maximum(0.0, 1.0 - price / budget) if budget > 0 else np.full(n, 0.5)
+    delivery_score = (
+        np.maximum(0.0, (max_delivery_days - delivery_days) / max_delivery_days)
+        if max_delivery_days > 0
+        else np.full(n, 0.5)
+    )
+    return np.stack([price_score, delivery_score, style])
+
+
+def weigh_columns(factors: "np.ndarray", weights: Dict[str, float]) -> Dict[str, "np.ndarray"]:
+    """Scores and rounded contributions (3 x n) of factor columns under one weight vector."""
+    price_contrib = weights.get("price", 0.33) * factors[0]
+    delivery_contrib = weights.get("delivery", 0.33) * factors[1]
+    style_contrib = weights.get("style", 0.34) * factors[2]
+    final = price_contrib + delivery_contrib + style_contrib
+    return {
+        "score": _round3(final),
+        "contrib": _round3(np.stack([price_contrib, delivery_contrib, style_contrib])),
+    }
+
+
+def score_columns(
+    price: "np.ndarray",
+    delivery_days: "np.ndarray",
+    style: "np.ndarray",
+    weights: Dict[str, float],
+    budget: float,
+    max_delivery_days: float,
+) -> Dict[str, "np.ndarray"]:
+    """Scores and rounded contributions (3 x n) for packed columns, same formula as score_product."""
+    return weigh_columns(factor_columns(price, delivery_days, style, budget, max_delivery_days), weights)
+
+
+def top_indices(scores: "np.ndarray", count: int) -> "np.ndarray":
+    """
+    Indices of the `count` best scores, best first, in the same order a stable
+    descending sort would give (ties keep input order). Uses argpartition-style
+    selection, so only the selected indices are sorted.
+    """
+    n = len(scores)
+    if count >= n:
+        return np.argsort(-scores, kind="stable")
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
+    threshold = np.partition(scores, n - count)[n - count]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: count - len(above)]
+    selected = np.sort(np.concatenate([above, ties]))
+    return selected[np.argsort(-scores[selected], kind="stable")]
+
+
+def rank_category(
+    products: List[Dict[str, Any]],
+    persona: Dict[str, Any],
+    weights: Dict[str, float],
+    budget: float,
+    max_delivery_days: float,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Style-match, score and sort one category. Sets product["preference_match"] like
+    the loop in process_and_rank and returns score_product-shaped entries, best first.
+    With a limit only ranks [offset, offset + limit) are selected and built.
+    """
+    return rank_factors(products, category_factors(products, persona, budget, max_delivery_days), weights, offset, limit)
+
+
+def category_factors(
+    products: List[Dict[str, Any]],
+    persona: Dict[str, Any],
+    budget: float,
+    max_delivery_days: float,
+) -> "np.ndarray":
+    """Style-match a category (sets product["preference_match"]) and pack its factor columns."""
+    n = len(products)
+    style = style_match_many(products, persona)
+    for product, match in zip(products, style.tolist()):
+        product["preference_match"] = match
+    price = np.fromiter((p["price"] for p in products), dtype=np.float64, count=n)
+    delivery_days = np.fromiter((p["delivery_days"] for p in products), dtype=np.float64, count=n)
+    return factor_columns(price, delivery_days, style, budget, max_delivery_days)
+
+
+def rank_factors(
+    products: List[Dict[str, Any]],
+    factors: "np.ndarray",
+    weights: Dict[str, float],
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Weigh precomputed factor columns and build the entries for ranks [offset, offset + limit)."""
+    columns = weigh_columns(factors, weights)
+    scores = columns["score"]
+    if limit is None:
+        # Stable descending order keeps input order among equal scores, like list.sort(reverse=True).
+        order = np.argsort(-scores, kind="stable")[offset:]
+    else:
+        order = top_indices(scores, offset + limit)[offset:]
+    return _entries(products, scores[order], columns["contrib"][:, order], order)
+
+
+# Profiles are scored in blocks of rows so the block x n temporaries stay cache-sized.
+_PROFILE_BLOCK = 64
+
+
+def rank_profiles(
+    products: List[Dict[str, Any]],
+    personas: Sequence[Dict[str, Any]],
+    weights: Sequence[Dict[str, float]],
+    budgets: Sequence[float],
+    max_delivery_days: Sequence[float],
+    top_k: int,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Top-k of one category for many profiles at once: row j of every block is profile j.
+    Entries match rank_category for that profile, except that each entry's product is a
+    copy carrying that profile's preference_match (the shared product dicts are not touched).
+    """
+    n, m = len(products), len(personas)
+    # Style match per (profile, product), gathered per block from personas x distinct values.
+    matcher = StyleMatcher(products, personas)
+    price = np.fromiter((p["price"] for p in products), dtype=np.float64, count=n)
+    delivery_days = np.fromiter((p["delivery_days"] for p in products), dtype=np.float64, count=n)
+    budget = np.asarray(budgets, dtype=np.float64)[:, None]
+    max_days = np.asarray(max_delivery_days, dtype=np.float64)[:, None]
+    w = np.array([[wt.get("price", 0.33), wt.get("delivery", 0.33), wt.get("style", 0.34)] for wt in weights])
+
+    ranked: List[List[Dict[str, Any]]] = []
+    for lo in range(0, m, _PROFILE_BLOCK):
+        rows = slice(lo, min(lo + _PROFILE_BLOCK, m))
+        b, d = budget[rows], max_days[rows]
+        style = _round3(matcher.rows(rows.start, rows.stop))
+        # Same formulas as score_columns, broadcast over profiles; non-positive limits score 0.5.
+        price_contrib = np.where(b > 0, np.maximum(0.0, 1.0 - price / np.where(b > 0, b, 1.0)), 0.5)
+        price_contrib *= w[rows, 0:1]
+        delivery_contrib = np.where(d > 0, np.maximum(0.0, (d - delivery_days) / np.where(d > 0, d, 1.0)), 0.5)
+        delivery_contrib *= w[rows, 1:2]
+        style_contrib = style * w[rows, 2:3]
+        scores = _round3(price_contrib + delivery_contrib + style_contrib)
+
+        for j in range(scores.shape[0]):
+            order = top_indices(scores[j], top_k)
+            contrib = _round3(np.stack([price_contrib[j, order], delivery_contrib[j, order], style_contrib[j, order]]))
+            entries = _entries(products, scores[j, order], contrib, order)
+            for entry, match in zip(entries, style[j, order].tolist()):
+                entry["product"] = {**entry["product"], "preference_match": match}
+            ranked.append(entries)
+    return ranked
+
+
+def _entries(
+    products: List[Dict[str, Any]],
+    scores: "np.ndarray",
+    selected: "np.ndarray",
+    order: "np.ndarray",
+) -> List[Dict[str, Any]]:
+    """score_product-shaped entries for products[order]; scores and 3 x k contributions are already selected."""
+    # Only the selected columns are converted to Python objects.
+    score_list = scores.tolist()
+    # First maximum wins, as with max() over (price, delivery, style).
+    strongest = np.argmax(selected, axis=0).tolist()
+    price_c, delivery_c, style_c = (row.tolist() for row in selected)
+
+    # Contributions are rounded to 3 decimals, so only a few distinct why_local strings exist.
+    why_cache: Dict[tuple, str] = {}
+    ranked: List[Dict[str, Any]] = []
+    for j, i in enumerate(order.tolist()):
+        values = (price_c[j], delivery_c[j], style_c[j])
+        key = (strongest[j], values[strongest[j]])
+        why_local = why_cache.get(key)
+        if why_local is None:
+            why_local = why_cache[key] = (
+                f"boosted mainly by {_FACTORS[key[0]]} ({key[1]:.3f}) as it contributes the most to the score"
+            )
+        ranked.append(
+            {
+                "product": products[i],
+                "score": score_list[j],
+                "decomposition": {
+                    "price_contrib": values[0],
+                    "delivery_contrib": values[1],
+                    "style_contrib": values[2],
+                },
+                "why_local": why_local,
+            }
+        )
+    return ranked
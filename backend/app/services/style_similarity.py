@@ -0,0 +1,209 @@
+"""
+Local style similarity for preference_match.
+
+A product's text (name, style, category, description) becomes a bag of hashed word
+and character-trigram features; each preferred style of the persona becomes the same
+kind of vector, built once per persona. The style score is the best cosine between
+the product and any preferred style ("minimal" is close to "minimaliste", "sport" to
+"sporty"), or 1.0 when the product's style field names a preferred style exactly.
+Colors go through query_understanding's synonym table (English and French retailer
+names) so "Noir" matches "black" and "navy" matches "blue".
+
+Vectors hold integer counts, so every dot product and squared norm is an exact
+integer whatever the summation order: the NumPy path (one matrix product of the
+distinct product texts against all persona styles) returns the same floats as the
+per-product Python path, and the vectorized ranking stays identical to the loop.
+"""
+
+import math
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Sequence, Tuple
+
+from app.data.query_understanding import COLOR_SYNONYMS
+
+try:
+    import numpy as np  # type: ignore
+    HAS_NUMPY = True
+except ImportError:
+    np = None  # type: ignore
+    HAS_NUMPY = False
+
+# Product fields that describe its style; numbers in them carry no style signal.
+STYLE_FIELDS = ("name", "title", "style", "category", "short_description", "description")
+COLOR_WEIGHT = 0.4
+STYLE_WEIGHT = 0.6
+
+_FEATURE_MASK = (1 << 20) - 1
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def canonical_color(value: str) -> str:
+    """Canonical color for a color name ("Bleu marine" -> "blue"); unknown names stay as lowercased."""
+    value = value.strip().lower()
+    if value in COLOR_SYNONYMS:
+        return COLOR_SYNONYMS[value]
+    for word in _WORD.findall(value):
+        if word in COLOR_SYNONYMS:
+            return COLOR_SYNONYMS[word]
+    return value
+
+
+def style_text(product: Dict[str, Any]) -> str:
+    return " ".join([str(value) for field in STYLE_FIELDS if (value := product.get(field))])
+
+
+@lru_cache(maxsize=131072)
+def text_tokens(text: str) -> Tuple[str, ...]:
+    """Sorted words of a style text: the cache key of its vector."""
+    return tuple(sorted(_WORD.findall(text.lower())))
+
+
+def _color_key(product: Dict[str, Any]) -> Tuple[Any, ...]:
+    color, colors = product.get("color") or "", product.get("colors")
+    if color or colors:
+        return (color, *colors) if colors else (color,)
+    return (None, style_text(product))
+
+
+@lru_cache(maxsize=16384)
+def _colors_of(key: Tuple[Any, ...]) -> Tuple[str, ...]:
+    if key[0] is None:
+        # No color fields: the color words in the product's text.
+        return tuple(sorted({COLOR_SYNONYMS[w] for w in text_tokens(key[1]) if w in COLOR_SYNONYMS}))
+    return tuple(sorted({canonical_color(c) for c in key if c and c.strip()}))
+
+
+def product_colors(product: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    Canonical colors of a product: its color field and any variant colors, or, when it
+    has neither, the color words in its name and description.
+    """
+    return _colors_of(_color_key(product))
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple[int, ...]:
+    padded = f" {word} "
+    grams = (padded[i : i + 3] for i in range(len(padded) - 2))
+    return (zlib.crc32(f"w:{word}".encode()) & _FEATURE_MASK,) + tuple(
+        zlib.crc32(gram.encode()) & _FEATURE_MASK for gram in grams
+    )
+
+
+@lru_cache(maxsize=131072)
+def text_vector(tokens: Tuple[str, ...]) -> Tuple[Dict[int, int], int]:
+    """Hashed feature counts of a token bag and their squared norm (an exact integer)."""
+    counts: Dict[int, int] = {}
+    for token in tokens:
+        for feature in _word_features(token):
+            counts[feature] = counts.get(feature, 0) + 1
+    return counts, sum(c * c for c in counts.values())
+
+
+class PersonaProfile(NamedTuple):
+    colors: FrozenSet[str]
+    styles: FrozenSet[str]
+    # One (lowercased style, vector, squared norm) per preferred style.
+    terms: Tuple[Tuple[str, Dict[int, int], int], ...]
+
+
+@lru_cache(maxsize=1024)
+def _profile(colors: Tuple[str, ...], styles: Tuple[str, ...]) -> PersonaProfile:
+    lowered = tuple(dict.fromkeys(s.strip().lower() for s in styles if s and s.strip()))
+    terms = tuple((s, *text_vector(text_tokens(s))) for s in lowered)
+    return PersonaProfile(
+        colors=frozenset(canonical_color(c) for c in colors if c and c.strip()),
+        styles=frozenset(lowered),
+        terms=terms,
+    )
+
+
+def persona_profile(persona: Dict[str, Any]) -> PersonaProfile:
+    """Canonical colors, lowercased styles and style vectors of a persona, built once per persona."""
+    return _profile(tuple(persona.get("preferred_colors") or ()), tuple(persona.get("preferred_styles") or ()))
+
+
+def _cosine(vector: Dict[int, int], norm: int, term: Dict[int, int], term_norm: int) -> float:
+    if not norm or not term_norm:
+        return 0.0
+    dot = sum(count * vector.get(feature, 0) for feature, count in term.items())
+    return dot / math.sqrt(norm * term_norm)
+
+
+def style_match(product: Dict[str, Any], persona: Dict[str, Any]) -> float:
+    """0.4 * color hit + 0.6 * style similarity, rounded to 3 decimals."""
+    profile = persona_profile(persona)
+    color_hit = 0.0 if profile.colors.isdisjoint(product_colors(product)) else 1.0
+    if (product.get("style") or "").strip().lower() in profile.styles:
+        style = 1.0
+    else:
+        vector, norm = text_vector(text_tokens(style_text(product)))
+        style = max((_cosine(vector, norm, term, term_norm) for _s, term, term_norm in profile.terms), default=0.0)
+    return round(color_hit * COLOR_WEIGHT + style * STYLE_WEIGHT, 3)
+
+
+def _factorize(keys: Iterable[Any], count: int) -> "Tuple[np.ndarray, List[Any]]":
+    codes: Dict[Any, int] = {}
+    indices = np.fromiter((codes.setdefault(k, len(codes)) for k in keys), dtype=np.intp, count=count)
+    return indices, list(codes)
+
+
+class StyleMatcher:
+    """
+    Style match of n products for m personas. Colors, exact styles and texts are
+    factorized across the products, so per-persona work is over distinct values;
+    text similarity is one (distinct texts x features) @ (features x styles) product
+    over the features the personas' styles actually use.
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]], personas: Sequence[Dict[str, Any]]) -> None:
+        n = len(products)
+        profiles = [persona_profile(p) for p in personas]
+        # Factorized on the raw fields; colors and vectors are then derived once per distinct value.
+        self._colors, color_keys = _factorize((_color_key(p) for p in products), n)
+        self._styles, style_keys = _factorize((p.get("style") or "" for p in products), n)
+        self._texts, text_keys = _factorize((style_text(p) for p in products), n)
+        color_keys = [_colors_of(key) for key in color_keys]
+        style_keys = [key.strip().lower() for key in style_keys]
+
+        self._color_hit = np.array(
+            [[0.0 if prof.colors.isdisjoint(key) else 1.0 for key in color_keys] for prof in profiles]
+        ).reshape(len(profiles), len(color_keys))
+        self._style_hit = np.array([[key in prof.styles for key in style_keys] for prof in profiles], dtype=bool)
+        self._style_hit = self._style_hit.reshape(len(profiles), len(style_keys))
+
+        # Distinct style terms across personas, and the features they use.
+        terms: Dict[str, Tuple[Dict[int, int], int]] = {}
+        for prof in profiles:
+            for style, vector, norm in prof.terms:
+                terms.setdefault(style, (vector, norm))
+        term_index = {style: i for i, style in enumerate(terms)}
+        features = sorted({f for vector, _norm in terms.values() for f in vector})
+        term_matrix = np.array([[vector.get(f, 0) for vector, _norm in terms.values()] for f in features], dtype=np.float64)
+        term_norms = np.array([norm for _vector, norm in terms.values()], dtype=np.float64)
+
+        # Texts that differ only in numbers or word order share a token bag and a matrix row.
+        bags, bag_keys = _factorize((text_tokens(key) for key in text_keys), len(text_keys))
+        self._texts = bags[self._texts]
+        vectors = [text_vector(key) for key in bag_keys]
+        text_matrix = np.array([[vector.get(f, 0) for f in features] for vector, _norm in vectors], dtype=np.float64)
+        text_norms = np.array([norm for _vector, norm in vectors], dtype=np.float64)
+        # Integer-valued float64 products: exact, so identical to _cosine's integer sums.
+        dots = text_matrix.reshape(len(vectors), len(features)) @ term_matrix.reshape(len(features), len(terms))
+        denom = np.sqrt(text_norms[:, None] * term_norms[None, :])
+        cosine = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+        # Best cosine over each persona's own styles, per distinct text.
+        self._similarity = np.zeros((len(profiles), len(vectors)))
+        for j, prof in enumerate(profiles):
+            columns = [term_index[style] for style, _v, _n in prof.terms]
+            if columns:
+                self._similarity[j] = cosine[:, columns].max(axis=1)
+
+    def rows(self, lo: int, hi: int) -> "np.ndarray":
+        """Unrounded style match of personas [lo, hi) x products."""
+        color = self._color_hit[lo:hi][:, self._colors]
+        style = np.where(self._style_hit[lo:hi][:, self._styles], 1.0, self._similarity[lo:hi][:, self._texts])
+        return color * COLOR_WEIGHT + style * STYLE_WEIGHT
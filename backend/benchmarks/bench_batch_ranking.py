@@ -0,0 +1,94 @@
+"""
+Benchmark: ranking one product set for many profiles.
+
+"per-profile" ranks the category once per profile with rank_category (what calling
+/api/ranking/process per profile costs, minus HTTP); "batch" is process_batch_rank,
+which builds the products x profiles style matrix once and scores all profiles together.
+Every run checks that both return the same top-k per profile.
+
+Run from backend/:  python -m benchmarks.bench_batch_ranking [--products 5000] [--profiles 1,10,100,1000]
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from app.services.ranking_service import get_weights, process_batch_rank
+from app.services.ranking_vectorized import HAS_NUMPY, rank_category
+from benchmarks.bench_ranking_vectorized import COLORS, STYLES, build_products
+
+CHIPS = ["budget", "fast", "style"]
+
+
+def build_profiles(m: int, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"profile-{j}",
+            "client_data": {
+                "budget": rng.choice([50.0, 100.0, 150.0, 300.0]),
+                "delivery_deadline": rng.choice([3.0, 5.0, 7.0]),
+                "preferences_clicked": rng.sample(CHIPS, rng.randint(0, 2)),
+            },
+            "zep_persona": {
+                "preferred_colors": rng.sample(COLORS, 2),
+                "preferred_styles": rng.sample(STYLES, 2),
+            },
+        }
+        for j in range(m)
+    ]
+
+
+def per_profile(products: list[dict], profiles: list[dict], top_k: int) -> list[list[dict]]:
+    ranked = []
+    for profile in profiles:
+        client = profile["client_data"]
+        ranked.append(
+            rank_category(
+                products,
+                profile["zep_persona"],
+                get_weights(client["preferences_clicked"]),
+                client["budget"],
+                client["delivery_deadline"],
+                0,
+                top_k,
+            )
+        )
+    return ranked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--profiles", default="1,10,100,1000")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        raise SystemExit("numpy is not installed")
+
+    products = build_products(args.products)
+    print(f"{'profiles':>10}{'per-profile ms':>16}{'batch ms':>12}{'speedup':>10}{'identical':>11}")
+    for m in (int(s) for s in args.profiles.split(",")):
+        profiles = build_profiles(m)
+        # rank_category writes preference_match into the products; keep the batch input clean.
+        loop_products = copy.deepcopy(products)
+
+        start = time.perf_counter()
+        expected = per_profile(loop_products, profiles, args.top_k)
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = process_batch_rank({"items": {"items": products}}, profiles, args.top_k)
+        batch_s = time.perf_counter() - start
+
+        identical = all(
+            [(e["product"]["name"], e["score"], e["decomposition"]) for e in want]
+            == [(e["product"]["name"], e["score"], e["decomposition"]) for e in got["results"]["items"]]
+            for want, got in zip(expected, batch["profiles"])
+        )
+        print(f"{m:>10}{loop_s * 1000:>16.1f}{batch_s * 1000:>12.1f}{loop_s / batch_s:>9.1f}x{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
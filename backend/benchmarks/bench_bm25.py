@@ -0,0 +1,77 @@
+"""
+Benchmark: BM25 retrieval index for /api/products/search.
+
+Measures a full index build, an incremental sync after 1% of the catalog changed
+(edits, additions and removals), and query latency for short and long queries
+with the default candidate limit.
+
+Run from backend/:  python -m benchmarks.bench_bm25 [--sizes 10000,100000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.data.catalog import BM25Index
+from benchmarks.bench_catalog import WORDS, build_feed
+
+QUERIES = [
+    "linen",
+    "black denim jacket",
+    "minimal oversized knit tops",
+    "classic slim leather shoes for the office in black or navy",
+]
+REASONS = ["Soft fabric, easy to layer.", "Popular with your style profile.", "Great value basic.", "Lightweight for summer."]
+
+
+def build_products(n: int) -> list[dict]:
+    rng = random.Random(3)
+    products = build_feed(n)
+    for p in products:
+        p["whySuggested"] = f"{rng.choice(REASONS)} {rng.choice(WORDS)} look."
+    return products
+
+
+def changed_catalog(products: list[dict], fraction: float = 0.01) -> list[dict]:
+    rng = random.Random(9)
+    k = max(1, int(len(products) * fraction))
+    updated = [dict(p) for p in products[k:]]
+    for p in rng.sample(updated, k):
+        p["name"] = f"{rng.choice(WORDS)} {p['name']}"
+    updated += [{**p, "id": f"{p['id']}-new"} for p in products[:k]]
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        products = build_products(n)
+        index = BM25Index()
+        start = time.perf_counter()
+        index.sync(products)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        changed = changed_catalog(products)
+        start = time.perf_counter()
+        stats = index.sync(changed)
+        sync_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n{n} products: build {build_ms:.0f} ms | incremental sync {sync_ms:.0f} ms {stats}")
+        print(f"{'query':>62}{'p50 ms':>10}{'max ms':>10}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                index.search(query, args.limit)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{query:>62}{statistics.median(timings):>10.2f}{max(timings):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: catalog backends at retailer-feed sizes.
+
+Builds a synthetic feed, loads it into MemoryCatalog and writes it to a SQLite catalog
+file (build_sqlite_catalog), then compares startup (building the in-memory indexes vs
+opening the memory-mapped file) and pushed-down searches. Each search is also checked
+to return the same ids from both backends.
+
+Run from backend/:  python -m benchmarks.bench_catalog [--sizes 10000,50000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.data.catalog import CatalogQuery, MemoryCatalog, SQLiteCatalog, build_sqlite_catalog
+
+CATEGORIES = ["Jeans", "Tops", "Dresses", "Shoes", "Jackets", "Accessories"]
+RETAILERS = ["ha", "zen", "ae", "zara", "stradivarius"]
+WORDS = ["minimal", "oversized", "linen", "denim", "knit", "leather", "cropped", "classic", "slim", "vintage"]
+COLORS = ["black", "white", "navy", "beige", "red", "green", "grey", "blue"]
+
+QUERIES = {
+    "text": CatalogQuery(text="linen black"),
+    "category+price": CatalogQuery(category="jeans", min_price=20, max_price=60),
+    "retailer+delivery": CatalogQuery(retailer="zara", max_delivery_days=3),
+    "all filters": CatalogQuery(text="denim", category="jackets", max_price=120, max_delivery_days=5, retailer="ha"),
+}
+
+
+def build_feed(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"sku-{i}",
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(CATEGORIES).lower()} {i}",
+            "brand": rng.choice(RETAILERS).title(),
+            "category": rng.choice(CATEGORIES),
+            "retailer": rng.choice(RETAILERS),
+            "price": round(rng.uniform(5, 250), 2),
+            "delivery": f"Standard · {rng.randint(1, 10)} days",
+            "color": rng.choice(COLORS),
+        }
+        for i in range(n)
+    ]
+
+
+def _timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    value = fn()
+    return (time.perf_counter() - start) * 1000, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,50000")
+    args = parser.parse_args()
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        feed = build_feed(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.sqlite3")
+            write_ms, _ = _timed(lambda: build_sqlite_catalog(path, feed))
+            memory_ms, memory = _timed(lambda: MemoryCatalog(feed))
+            open_ms, sqlite = _timed(lambda: SQLiteCatalog(path))
+            print(f"\n{n} products: memory load {memory_ms:.1f} ms | sqlite open {open_ms:.2f} ms (write {write_ms:.0f} ms)")
+            print(f"{'query':>20}{'hits':>8}{'memory ms':>12}{'sqlite ms':>12}{'same':>7}")
+            for name, query in QUERIES.items():
+                mem_ms, mem_hits = _timed(lambda: memory.search(query))
+                sql_ms, sql_hits = _timed(lambda: sqlite.search(query))
+                same = [p["id"] for p in mem_hits] == [p["id"] for p in sql_hits]
+                print(f"{name:>20}{len(mem_hits):>8}{mem_ms:>12.2f}{sql_ms:>12.2f}{str(same):>7}")
+            sqlite.close()
+
+
+if __name__ == "__main__":
+    main()
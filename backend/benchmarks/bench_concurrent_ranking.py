@@ -0,0 +1,114 @@
+"""
+Benchmark: concurrent POST /api/ranking/process requests on one event loop.
+
+Sends --concurrency requests at once through httpx's ASGI transport to an app with
+the ranking router, with Zep and Groq replaced by the latency stubs of
+bench_ranking_service. Every request ranks its own catalog, so no explanation is a
+cache hit. Two handlers are compared:
+
+  blocking   the previous handler: sync process_and_rank called inside async def, so
+             the Zep read, the explanation wait and the scoring block the loop
+  async      /api/ranking/process: awaited persona and explanations, scoring in a thread
+
+Run from backend/:  python -m benchmarks.bench_concurrent_ranking [--concurrency 50] [--zep-ms 50] [--groq-ms 300]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.routers.ranking import RankingRequest, router
+from app.services import explanations
+from app.services.ranking_service import process_and_rank
+from benchmarks.bench_ranking_service import build_catalog, build_persona, install_stubs
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+
+    @app.post("/bench/blocking")
+    async def rank_blocking(payload: RankingRequest):
+        try:
+            return process_and_rank(
+                payload.products_data,
+                payload.client_data,
+                payload.zep_persona,
+                top_k=payload.top_k,
+                cursor=payload.cursor,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return app
+
+
+def build_payloads(count: int, categories: int, per_category: int) -> list[dict]:
+    rng = random.Random(17)
+    payloads = []
+    for i in range(count):
+        catalog = build_catalog(categories, per_category, seed=i)
+        payloads.append(
+            {
+                "products_data": catalog,
+                "client_data": {
+                    "budget": rng.choice([80.0, 150.0, 300.0]),
+                    "delivery_deadline": rng.choice([3.0, 5.0, 7.0]),
+                    "preferences_clicked": rng.sample(["Budget", "Fast Delivery", "My Style"], rng.randint(0, 2)),
+                },
+                "zep_persona": build_persona(4, seed=i),
+                "top_k": 10,
+            }
+        )
+    return payloads
+
+
+async def run(app: FastAPI, path: str, payloads: list[dict]) -> tuple[float, list[float]]:
+    explanations._cache.clear()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        # All requests arrive together, so latency is completion time since the common start.
+        start = time.perf_counter()
+
+        async def one(payload: dict) -> float:
+            response = await client.post(path, json=payload)
+            response.raise_for_status()
+            return (time.perf_counter() - start) * 1000
+
+        latencies = await asyncio.gather(*(one(p) for p in payloads))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--products", type=int, default=300, help="products per category")
+    parser.add_argument("--zep-ms", type=float, default=50.0)
+    parser.add_argument("--groq-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    install_stubs(args.zep_ms, args.groq_ms, build_persona(4))
+    app = build_app()
+    payloads = build_payloads(args.concurrency, args.categories, args.products)
+    try:
+        print(f"{'handler':>10}{'requests':>10}{'wall s':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, path in (("blocking", "/bench/blocking"), ("async", "/api/ranking/process")):
+            wall, latencies = asyncio.run(run(app, path, payloads))
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            print(
+                f"{name:>10}{len(latencies):>10}{wall:>9.2f}{len(latencies) / wall:>9.1f}"
+                f"{statistics.median(latencies):>10.0f}{p95:>10.0f}{latencies[-1]:>10.0f}"
+            )
+    finally:
+        explanations.close_explanations()
+
+
+if __name__ == "__main__":
+    main()
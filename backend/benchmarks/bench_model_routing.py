@@ -0,0 +1,125 @@
+"""
+Offline evaluation: large-model-only extraction vs tiered routing.
+
+Runs a fixed, labelled prompt set through extract_user_requirements_async twice
+(routing off, routing on) with the cache and rules fast path disabled, and reports
+mean/p50/p95 latency, field accuracy against the labels, escalation rate and tokens.
+Calls the real Groq API, so GROQ_API_KEY must be set.
+
+Run from backend/:  python -m benchmarks.bench_model_routing [--repeat 1]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()  # GROQ_API_KEY and the routing settings, as the app entry point does
+os.environ["LLM_EXTRACT_CACHE_PATH"] = ""
+
+from app.data.llm_extractor import extractor, routing  # noqa: E402
+from app.data.llm_extractor.cache import get_extraction_cache  # noqa: E402
+
+# (prompt, expected fields); item is matched as a substring, numbers in budget/deadline exactly.
+PROMPT_SET = [
+    ("black hoodie for men size L", {"item": "hoodie", "target": "men", "size": "L", "colors": ["black"]}),
+    ("red summer dress for women under $50", {"item": "dress", "target": "women", "budget": "50", "colors": ["red"]}),
+    ("white sneakers size 42 delivered in 3 days", {"item": "sneakers", "size": "42", "deadline": "3", "colors": ["white"]}),
+    ("kids blue jeans, budget 30 dollars", {"item": "jeans", "target": "kids", "budget": "30", "colors": ["blue"]}),
+    ("navy blazer for men, slim fit, size M, need it by friday", {"item": "blazer", "target": "men", "size": "M"}),
+    ("cozy beige sweater for women", {"item": "sweater", "target": "women", "colors": ["beige"]}),
+    ("une robe noire pour femme moins de 80 dt en 5 jours", {"item": "robe", "target": "women", "budget": "80", "deadline": "5"}),
+    ("green rain jacket for kids size S within 1 week", {"item": "jacket", "target": "kids", "size": "S", "deadline": "1"}),
+    ("minimalist leather tote bag under 120$", {"item": "bag", "budget": "120"}),
+    ("grey joggers and a white t-shirt for men size XL", {"item": "joggers", "target": "men", "size": "XL"}),
+    ("floral midi skirt for women in pink, budget $45, 4 days", {"item": "skirt", "target": "women", "budget": "45", "deadline": "4", "colors": ["pink"]}),
+    ("black ankle boots women size 38", {"item": "boots", "target": "women", "size": "38", "colors": ["black"]}),
+    (
+        "I'm going to a beach wedding next month and want something light, breathable and not too formal, "
+        "ideally linen in a pastel tone, for a man around size L, nothing above 150 dollars",
+        {"item": "linen", "target": "men", "size": "L", "budget": "150"},
+    ),
+    (
+        "looking for a warm waterproof winter parka for my 8 year old daughter, she's usually a size 8, "
+        "prefer dark colors and it has to arrive within 10 days",
+        {"item": "parka", "target": "kids", "size": "8", "deadline": "10"},
+    ),
+    ("oversized vintage denim jacket for women, blue, under $90", {"item": "jacket", "target": "women", "budget": "90", "colors": ["blue"]}),
+    ("men's running shorts black size M in 2 days", {"item": "shorts", "target": "men", "size": "M", "deadline": "2", "colors": ["black"]}),
+]
+
+
+def _numbers(text: str) -> list[str]:
+    return re.findall(r"\d+", str(text or ""))
+
+
+def field_accuracy(data: dict, expected: dict) -> tuple[int, int]:
+    hits = 0
+    for key, want in expected.items():
+        got = data.get(key)
+        if key == "item":
+            hits += want in str(got or "").lower()
+        elif key in ("budget", "deadline"):
+            hits += want in _numbers(got)
+        elif key == "colors":
+            hits += set(want) <= {str(c).lower() for c in got or []}
+        elif key == "target":
+            hits += str(got or "").lower().startswith(want[:3]) or (want == "women" and "fem" in str(got).lower())
+        else:
+            hits += str(got or "").strip().lower() == want.lower()
+    return hits, len(expected)
+
+
+async def run_mode(enabled: bool, repeat: int) -> dict:
+    extractor.RULES_FAST_PATH = False
+    router = routing.get_model_router("extract")
+    router.enabled = enabled
+    router.reset()
+    latencies: list[float] = []
+    hits = total = 0
+    for _ in range(repeat):
+        for prompt, expected in PROMPT_SET:
+            get_extraction_cache().clear()
+            start = time.perf_counter()
+            data = await extractor.extract_user_requirements_async(prompt, [])
+            latencies.append((time.perf_counter() - start) * 1000)
+            h, t = field_accuracy(data, expected)
+            hits += h
+            total += t
+    latencies.sort()
+    snapshot = router.snapshot()
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "accuracy": hits / total if total else 0.0,
+        "escalation_rate": snapshot["escalation_rate"],
+        "tokens": sum(t["prompt_tokens"] + t["completion_tokens"] for t in snapshot["tiers"].values()),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    if not os.environ.get("GROQ_API_KEY"):
+        sys.exit("GROQ_API_KEY is not set; this benchmark calls the Groq API.")
+
+    print(f"{len(PROMPT_SET)} prompts x {args.repeat}")
+    print(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'accuracy':>10}{'escalated':>11}{'tokens':>9}")
+    for label, enabled in (("large only", False), ("routed", True)):
+        r = await run_mode(enabled, args.repeat)
+        print(
+            f"{label:<12}{r['mean_ms']:>10.0f}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}"
+            f"{r['accuracy']:>10.1%}{r['escalation_rate']:>11.1%}{r['tokens']:>9}"
+        )
+    await extractor.close_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark: outfit optimizer (multiple-choice knapsack over discretized prices).
+
+Times optimize_outfit at categories x candidates sizes up to 10 x 200 and shows what
+the independent per-category top picks would cost against the budget. Small sizes are
+also solved by brute force over every combination (same discretized prices) to check
+the best bundle and the ordering of the alternatives.
+
+Run from backend/:  python -m benchmarks.bench_outfit [--sizes 3x12,4x10,10x50,10x200]
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+
+from app.services import outfit_optimizer
+from app.services.outfit_optimizer import DEFAULT_RESOLUTION, optimize_outfit
+
+
+def build_candidates(categories: int, per_category: int, seed: int = 13) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    candidates = {}
+    for c in range(categories):
+        entries = [
+            {
+                "product": {
+                    "name": f"cat{c}-item{i}",
+                    "price": round(rng.uniform(10, 180), 2),
+                    "delivery_days": float(rng.randint(1, 9)),
+                },
+                "score": round(rng.uniform(0.2, 0.95), 3),
+            }
+            for i in range(per_category)
+        ]
+        entries.sort(key=lambda e: e["score"], reverse=True)
+        candidates[f"category-{c}"] = entries
+    return candidates
+
+
+def brute_force(candidates: dict, budget: float, max_days: float, keep: int) -> list[float]:
+    step = budget / DEFAULT_RESOLUTION
+    pools = [[e for e in entries if e["product"]["delivery_days"] <= max_days] for entries in candidates.values()]
+    totals = []
+    for combo in itertools.product(*pools):
+        units = sum(max(0, math.ceil(e["product"]["price"] / step - 1e-9)) for e in combo)
+        if units <= DEFAULT_RESOLUTION:
+            totals.append(sum(e["score"] for e in combo))
+    return sorted(totals, reverse=True)[:keep]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="3x12,4x10,10x50,10x200")
+    parser.add_argument("--alternatives", type=int, default=3)
+    parser.add_argument("--max-days", type=float, default=7.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8}{'budget':>9}{'top picks $':>13}{'outfit $':>10}{'score':>8}{'ms':>9}{'python ms':>11}{'brute':>7}")
+    for size in args.sizes.split(","):
+        categories, per_category = (int(x) for x in size.split("x"))
+        candidates = build_candidates(categories, per_category)
+        budget = 60.0 * categories
+        top_picks = sum(entries[0]["product"]["price"] for entries in candidates.values())
+
+        best_ms = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = optimize_outfit(candidates, budget, args.max_days, args.alternatives)
+            best_ms = min(best_ms, (time.perf_counter() - start) * 1000)
+        outfits = result["outfits"]
+
+        python_ms, brute = "-", "-"
+        if categories * per_category <= 60:
+            outfit_optimizer.HAS_NUMPY = False
+            try:
+                start = time.perf_counter()
+                fallback = optimize_outfit(candidates, budget, args.max_days, args.alternatives)
+                python_ms = f"{(time.perf_counter() - start) * 1000:.1f}"
+            finally:
+                outfit_optimizer.HAS_NUMPY = True
+            expected = [round(t, 3) for t in brute_force(candidates, budget, args.max_days, args.alternatives + 1)]
+            same = [o["total_score"] for o in outfits] == expected == [o["total_score"] for o in fallback["outfits"]]
+            brute = str(same)
+
+        best = outfits[0] if outfits else {"total_price": 0.0, "total_score": 0.0}
+        print(
+            f"{size:>8}{budget:>9.0f}{top_picks:>13.2f}{best['total_price']:>10.2f}{best['total_score']:>8.3f}"
+            f"{best_ms:>9.2f}{python_ms:>11}{brute:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Microbenchmark: prompt -> items/colors/styles/target parsing.
+
+Compares the previous per-call approach (linear keyword scans plus a fresh
+re.sub pattern per color/style) with app.data.query_understanding, cold
+(memo cleared) and warm (repeated prompts).
+
+Run from backend/:  python -m benchmarks.bench_query_understanding [--prompts 20000]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app.data import query_understanding as qu
+
+_LEGACY_KEYWORDS = [
+    "t-shirt", "tshirt", "tee", "shirt", "pants", "jeans", "shorts", "hoodie",
+    "sweater", "jacket", "dress", "skirt", "shoes", "sneakers", "boots", "bag",
+]
+
+
+def _legacy_infer_items(text: str) -> list[str]:
+    lowered = text.lower()
+    items: list[str] = []
+    for keyword in _LEGACY_KEYWORDS:
+        if keyword in lowered:
+            normalized = "t-shirt" if keyword in {"tshirt", "tee"} else keyword
+            if normalized == "shirt" and "t-shirt" in items:
+                continue
+            if normalized not in items:
+                items.append(normalized)
+    return items
+
+
+def _legacy_clean(item: str, colors: list[str], style_list: list[str], target: str) -> str:
+    text = item.lower()
+    for t in [target, "women", "women's", "men", "men's", "kids", "kid", "girl", "boy"]:
+        if t:
+            text = re.sub(rf"\b{re.escape(t)}\b", "", text)
+    for c in colors:
+        text = re.sub(rf"\b{re.escape(c.lower())}\b", "", text)
+    for s in style_list:
+        text = re.sub(rf"\b{re.escape(s.lower())}\b", "", text)
+    text = re.sub(r"\bunder\b|\bby\b|\bin\b|\bwithin\b", "", text)
+    text = re.sub(r"\$\s*\d+(?:\.\d+)?|\d+\s*\$", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _legacy_colors(text: str) -> list[str]:
+    lower = text.lower()
+    color_list = ["white", "black", "gray", "grey", "red", "blue", "green", "yellow", "pink", "purple", "orange", "brown", "beige"]
+    return [c for c in color_list if re.search(rf"\b{re.escape(c)}\b", lower)]
+
+
+def build_corpus(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    items = list(qu.ITEM_SYNONYMS)
+    colors = list(qu.COLOR_SYNONYMS)
+    styles = list(qu.STYLE_SYNONYMS)
+    targets = list(qu.TARGET_SYNONYMS)
+    corpus = []
+    for _ in range(n):
+        parts = [rng.choice(colors), rng.choice(styles), rng.choice(items)]
+        if rng.random() < 0.4:
+            parts += ["and", rng.choice(colors), rng.choice(items)]
+        parts += ["for", rng.choice(targets), "size", rng.choice(["S", "M", "L", "XL", "38", "40"])]
+        parts += [f"under ${rng.randint(20, 300)}", "in", str(rng.randint(2, 14)), "days"]
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def _run_legacy(corpus: list[str]) -> None:
+    for prompt in corpus:
+        colors = _legacy_colors(prompt)
+        _legacy_infer_items(prompt)
+        _legacy_clean(prompt, colors, ["casual", "chic"], "women")
+
+
+def _run_new(corpus: list[str]) -> None:
+    for prompt in corpus:
+        parsed = qu.parse_prompt(prompt)
+        qu.clean_item_text(prompt, list(parsed.colors), ["casual", "chic"], "women")
+
+
+def _clear_caches() -> None:
+    qu.parse_prompt.cache_clear()
+    qu._clean_item_text.cache_clear()
+
+
+def _bench(label: str, fn, corpus: list[str]) -> None:
+    start = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34}{elapsed * 1e6 / len(corpus):>10.2f} us/prompt{len(corpus) / elapsed:>14,.0f} prompts/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=20000)
+    parser.add_argument("--unique", type=int, default=2000, help="distinct prompts in the warm-cache run")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.prompts)
+    repeated = build_corpus(args.unique) * max(1, args.prompts // args.unique)
+
+    _bench("legacy (linear scans + re.sub)", _run_legacy, corpus)
+    _clear_caches()
+    _bench("compiled, cold cache", _run_new, corpus)
+    _clear_caches()
+    _bench("legacy, repeated prompts", _run_legacy, repeated)
+    _bench("compiled, repeated prompts", _run_new, repeated)
+    print(qu.parse_prompt.cache_info())
+
+
+if __name__ == "__main__":
+    main()
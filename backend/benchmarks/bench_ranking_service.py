@@ -0,0 +1,320 @@
+"""
+Benchmark suite: app.services.ranking_service at catalog scale.
+
+Builds synthetic catalogs (categories x products per category, personas with a
+given number of preferred styles and colors) and measures:
+
+  get_weights, calculate_style_match, score_product   throughput per call
+  process_and_rank                                     categories x products grid
+  process_from_extract_and_results                     results-list sizes
+
+Zep and Groq are replaced by local stubs with configurable latency: the Pinterest
+persona lookup sleeps --zep-ms (an uncached Zep read on every call), and the
+explanation client answers after --groq-ms, so LLM_EXPLAIN_BUDGET_MS behaves as in
+production. The explanation cache is cleared before every end-to-end call; pass
+--zep-ms 0 --groq-ms 0 for CPU-only scaling curves.
+
+Each case reports median/p95 latency, throughput and peak traced memory (a separate
+tracemalloc run), plus the log-log slope of latency against input size per function
+(1.0 = linear). --output writes everything as JSON; --baseline compares medians with
+an earlier --output file and exits 1 when a case is slower by more than --tolerance.
+
+Run from backend/:  python -m benchmarks.bench_ranking_service [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from app.services import explanations, ranking_service  # noqa: E402
+from app.services.ranking_service import (  # noqa: E402
+    calculate_style_match,
+    get_weights,
+    process_and_rank,
+    process_from_extract_and_results,
+    score_product,
+)
+from app.services.ranking_vectorized import HAS_NUMPY  # noqa: E402
+
+STYLE_WORDS = ["minimal", "classic", "sporty", "boho", "vintage", "streetwear", "formal", "casual", "preppy", "grunge"]
+COLORS = ["black", "white", "navy", "beige", "red", "green", "grey", "pink", "brown", "blue", "noir", "bleu"]
+GARMENTS = ["shirt", "jeans", "jacket", "dress", "sneakers", "coat", "skirt", "hoodie", "boots", "tote"]
+CHIPS = ["Budget", "Fast Delivery", "My Style"]
+
+
+# =============================================================================
+# STUBS
+# =============================================================================
+
+class StubCompletions:
+    """chat.completions.create of AsyncGroq: sleeps, then answers like the explanation prompts expect."""
+
+    def __init__(self, latency_ms: float) -> None:
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    async def create(self, model: str, messages: list, **_kwargs) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        prompt = messages[-1]["content"]
+        sentence = "It balances price, delivery and your style better than the other options in this category."
+        marker = "exactly these keys: "
+        if marker in prompt:
+            keys = json.loads("[" + prompt.split(marker, 1)[1].split(". Each value", 1)[0] + "]")
+            content = json.dumps({key: sentence for key in keys})
+        else:
+            content = sentence
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=None,
+        )
+
+
+def install_stubs(zep_ms: float, groq_ms: float, persona: dict) -> StubCompletions:
+    completions = StubCompletions(groq_ms)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    def zep_persona() -> dict:
+        time.sleep(zep_ms / 1000)
+        return persona
+
+    async def zep_persona_async() -> dict:
+        await asyncio.sleep(zep_ms / 1000)
+        return persona
+
+    async def close() -> None:
+        return None
+
+    client.close = close
+    explanations._shared_client = lambda: client
+    ranking_service.get_zep_persona_from_pinterest = zep_persona
+    ranking_service.get_zep_persona_from_pinterest_async = zep_persona_async
+    return completions
+
+
+# =============================================================================
+# SYNTHETIC DATA
+# =============================================================================
+
+def build_persona(size: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    styles = [f"{rng.choice(STYLE_WORDS)}{'' if i < len(STYLE_WORDS) else i}" for i in range(size)]
+    return {"preferred_styles": styles, "preferred_colors": [rng.choice(COLORS) for _ in range(size)]}
+
+
+def build_catalog(categories: int, per_category: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    items = {}
+    for c in range(categories):
+        garment = GARMENTS[c % len(GARMENTS)]
+        items[f"{garment}-{c}"] = [
+            {
+                "name": f"{rng.choice(STYLE_WORDS)} {rng.choice(COLORS)} {garment} {i}",
+                "price": round(rng.uniform(5, 300), 2),
+                "delivery_days": float(rng.randint(1, 12)),
+                "retailer": f"retailer-{i % 23}",
+                "color": rng.choice(COLORS),
+                "style": rng.choice(STYLE_WORDS),
+            }
+            for i in range(per_category)
+        ]
+    return {"query": "outfit", "items": items}
+
+
+def build_search_results(count: int, categories: int = 3, seed: int = 9) -> tuple[dict, list]:
+    rng = random.Random(seed)
+    extract = {"item": "outfit", "budget": "150", "deadline": "5 days", "style": ["minimal"], "colors": ["black"], "constraints": ["Budget"]}
+    results = [
+        {
+            "name": f"{rng.choice(STYLE_WORDS)} {GARMENTS[i % categories]} {i}",
+            "price": round(rng.uniform(5, 300), 2),
+            "delivery_estimate": f"{rng.randint(1, 4)}-{rng.randint(5, 12)} days",
+            "retailer": f"retailer-{i % 23}",
+            "variants": {"sizes": ["S", "M"], "colors": rng.sample(COLORS, 2), "material": []},
+            "short_description": f"A {rng.choice(STYLE_WORDS)} piece in soft fabric.",
+            "item": GARMENTS[i % categories],
+        }
+        for i in range(count)
+    ]
+    return extract, results
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def measure(fn, repeat: int, calls: int = 1, memory: bool = True) -> dict:
+    """Median/p95 ms per run of fn, throughput in calls/s, and peak traced KiB of one extra run."""
+    fn()  # warm-up: imports, caches, the explanation loop
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    peak_kib = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak_kib = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    median = statistics.median(timings)
+    return {
+        "median_ms": round(median, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, math.ceil(0.95 * len(timings)) - 1)], 3),
+        "throughput_per_s": round(calls / (median / 1000), 1) if median > 0 else None,
+        "peak_kib": peak_kib,
+    }
+
+
+def scaling_exponent(points: list[tuple[float, float]]) -> float | None:
+    """Least-squares slope of log(ms) against log(size)."""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mx = statistics.fmean(x for x, _ in points)
+    my = statistics.fmean(y for _, y in points)
+    den = sum((x - mx) ** 2 for x, _ in points)
+    return round(sum((x - mx) * (y - my) for x, y in points) / den, 2) if den else None
+
+
+def _ints(text: str) -> list[int]:
+    return [int(v) for v in text.split(",") if v]
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    cases: list[dict] = []
+
+    def record(name: str, params: dict, size: int, stats: dict) -> None:
+        case = {"name": name, "params": params, "size": size, **stats}
+        cases.append(case)
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        peak = "-" if stats["peak_kib"] is None else f"{stats['peak_kib']:.0f}"
+        print(f"{name:>34} {label:<28}{stats['median_ms']:>11.3f}{stats['p95_ms']:>11.3f}{stats['throughput_per_s'] or 0:>14.0f}{peak:>12}")
+
+    print(f"{'case':>34} {'params':<28}{'median ms':>11}{'p95 ms':>11}{'per second':>14}{'peak KiB':>12}")
+
+    chip_sets = [[], ["Budget"], ["Fast Delivery", "My Style"], CHIPS, ["cheap", "express"]]
+    record("get_weights", {"calls": 10000}, 10000, measure(
+        lambda: [get_weights(chip_sets[i % len(chip_sets)]) for i in range(10000)], args.repeat, 10000, memory=False))
+
+    products = build_catalog(1, 5000)["items"]
+    products = next(iter(products.values()))
+    for size in _ints(args.persona_sizes):
+        persona = build_persona(size)
+        record("calculate_style_match", {"persona": size, "calls": len(products)}, size, measure(
+            lambda: [calculate_style_match(p, persona) for p in products], args.repeat, len(products), memory=False))
+
+    weights = get_weights(["Budget"])
+    for p in products:
+        p["preference_match"] = 0.5
+    record("score_product", {"calls": len(products)}, len(products), measure(
+        lambda: [score_product(p, weights, 150.0, 7.0) for p in products], args.repeat, len(products), memory=False))
+
+    persona = build_persona(max(_ints(args.persona_sizes)))
+    client = {"budget": 150.0, "delivery_deadline": 7.0, "preferences_clicked": ["Budget", "My Style"]}
+    for categories in _ints(args.categories):
+        for per_category in _ints(args.products):
+            catalog = build_catalog(categories, per_category)
+
+            def rank(catalog=catalog) -> None:
+                explanations._cache.clear()
+                process_and_rank(catalog, client, persona, top_k=args.top_k)
+
+            record(
+                "process_and_rank",
+                {"categories": categories, "products": per_category},
+                categories * per_category,
+                measure(rank, args.repeat, categories * per_category),
+            )
+
+    for count in _ints(args.results):
+        extract, results = build_search_results(count)
+
+        def rank_extract(extract=extract, results=results) -> None:
+            explanations._cache.clear()
+            process_from_extract_and_results(extract, results, top_k=args.top_k)
+
+        record("process_from_extract_and_results", {"results": count}, count, measure(rank_extract, args.repeat, count))
+    return cases
+
+
+def compare(cases: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = {(c["name"], json.dumps(c["params"], sort_keys=True)): c for c in json.load(f)["cases"]}
+    regressions = []
+    for case in cases:
+        old = baseline.get((case["name"], json.dumps(case["params"], sort_keys=True)))
+        if old and case["median_ms"] > old["median_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{case['name']} {case['params']}: {old['median_ms']:.3f} -> {case['median_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", default="1,4")
+    parser.add_argument("--products", default="100,1000,10000", help="products per category")
+    parser.add_argument("--persona-sizes", default="2,8,32", help="preferred styles and colors per persona")
+    parser.add_argument("--results", default="30,300,3000", help="search results for process_from_extract_and_results")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--zep-ms", type=float, default=50.0, help="stub Zep persona latency")
+    parser.add_argument("--groq-ms", type=float, default=300.0, help="stub Groq completion latency")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write cases and scaling exponents as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown vs the baseline")
+    args = parser.parse_args()
+
+    completions = install_stubs(args.zep_ms, args.groq_ms, build_persona(max(_ints(args.persona_sizes))))
+    try:
+        cases = run(args)
+    finally:
+        explanations.close_explanations()
+
+    scaling = {}
+    for name in ("calculate_style_match", "process_and_rank", "process_from_extract_and_results"):
+        points = [(c["size"], c["median_ms"]) for c in cases if c["name"] == name]
+        scaling[name] = scaling_exponent(points)
+    print("\nscaling (log-log slope of latency vs size):", scaling)
+    print(f"stub Groq calls: {completions.calls}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": HAS_NUMPY,
+            "zep_ms": args.zep_ms,
+            "groq_ms": args.groq_ms,
+            "explain_budget_ms": float(os.environ.get("LLM_EXPLAIN_BUDGET_MS", 1200)),
+            "repeat": args.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": cases,
+        "scaling": scaling,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.baseline:
+        regressions = compare(cases, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
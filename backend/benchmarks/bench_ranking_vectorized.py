@@ -0,0 +1,85 @@
+"""
+Benchmark: per-category scoring in process_and_rank, Python loop vs NumPy columns.
+
+The loop path is calculate_style_match + score_product per product, then a sort;
+the columnar path is ranking_vectorized.rank_category. Every run also checks that
+both produce identical entries (order, scores, decompositions, why_local). The
+top-k column is rank_category with a limit: selection plus details for k items only.
+
+Run from backend/:  python -m benchmarks.bench_ranking_vectorized [--sizes 100,1000,10000,100000,1000000]
+"""
+
+import argparse
+import random
+import time
+
+from app.services.ranking_service import calculate_style_match, get_weights, score_product
+from app.services.ranking_vectorized import HAS_NUMPY, rank_category
+
+COLORS = ["black", "white", "navy", "beige", "red", "green", "grey", "pink", "brown", "blue"]
+STYLES = ["casual", "minimal", "boho", "streetwear", "classic", "sporty", "vintage", "formal"]
+PERSONA = {"preferred_colors": ["Black", "beige", "navy"], "preferred_styles": ["minimal", "Classic"]}
+
+
+def build_products(n: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"product-{i}",
+            "price": round(rng.uniform(5, 300), 2),
+            "delivery_days": float(rng.randint(1, 14)),
+            "retailer": f"retailer-{i % 37}",
+            "color": rng.choice(COLORS),
+            "style": rng.choice(STYLES),
+        }
+        for i in range(n)
+    ]
+
+
+def rank_loop(products: list[dict], weights: dict, budget: float, max_days: float) -> list[dict]:
+    for p in products:
+        p["preference_match"] = calculate_style_match(p, PERSONA)
+    scored = [score_product(p, weights, budget, max_days) for p in products]
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        raise SystemExit("numpy is not installed")
+
+    weights = get_weights(["budget"])
+    budget, max_days = 150.0, 7.0
+    print(f"{'products':>10}{'loop ms':>12}{'numpy ms':>12}{'speedup':>10}{'top-k ms':>11}{'identical':>11}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        products = build_products(n)
+        repeat = args.repeat if n <= 100_000 else 1
+        loop_s = _best_of(lambda: rank_loop(products, weights, budget, max_days), repeat)
+        vec_s = _best_of(lambda: rank_category(products, PERSONA, weights, budget, max_days), repeat)
+        top_s = _best_of(lambda: rank_category(products, PERSONA, weights, budget, max_days, 0, args.top_k), repeat)
+        full = rank_loop(products, weights, budget, max_days)
+        identical = full == rank_category(products, PERSONA, weights, budget, max_days) and full[: args.top_k] == (
+            rank_category(products, PERSONA, weights, budget, max_days, 0, args.top_k)
+        )
+        print(
+            f"{n:>10}{loop_s * 1000:>12.2f}{vec_s * 1000:>12.2f}{loop_s / vec_s:>9.1f}x"
+            f"{top_s * 1000:>11.2f}{str(identical):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Serialization / wire-size benchmark for the /api/agent/search payload shape.
+
+Run from backend/:  python -m benchmarks.bench_serialization [--items 4] [--results 20]
+"""
+
+import argparse
+import gzip
+import json
+import time
+
+from app.middleware import HAS_BROTLI, brotli
+from app.responses import HAS_ORJSON, dumps_json
+from app.schemas.agent import ProductVariants, SearchResultItem
+
+
+def build_payload(n_items: int, n_results: int) -> dict:
+    item_names = ["t-shirt", "jeans", "sneakers", "jacket", "dress", "bag", "hoodie", "skirt"]
+    results_by_item: dict[str, list] = {}
+    retailers: set[str] = set()
+    for i in range(n_items):
+        item = item_names[i % len(item_names)]
+        rows = []
+        for j in range(n_results):
+            retailer = f"Retailer {j % 7}"
+            retailers.add(retailer)
+            rows.append(
+                SearchResultItem(
+                    name=f"Casual {item} model {j} - organic cotton, relaxed fit",
+                    price=19.99 + j * 3.5,
+                    delivery_estimate=f"{2 + j % 5}-{4 + j % 5} days",
+                    variants=ProductVariants(
+                        sizes=["XS", "S", "M", "L", "XL"],
+                        colors=["black", "white", "navy", "olive"],
+                        material=["cotton", "elastane"],
+                    ),
+                    retailer=retailer,
+                    image_url=f"https://cdn.example.com/img/{item}/{j}.jpg?wid=1024&fmt=webp",
+                    link=f"https://shop{j % 7}.example.com/p/{item}-{j}",
+                    url=f"https://shop{j % 7}.example.com/p/{item}-{j}",
+                    short_description="Soft breathable fabric with a classic crew neck. Machine washable.",
+                    item=item,
+                ).model_dump()
+            )
+        results_by_item[item] = rows
+    return {
+        "query": {"budget": "$70", "deadline": "5 days", "size": "M", "style": "casual", "target": "women", "color": "", "items": []},
+        "results_by_item": results_by_item,
+        "total_count": n_items * n_results,
+        "retailers": sorted(retailers),
+    }
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--results", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    payload = build_payload(args.items, args.results)
+    variants = {
+        "json indent=2 (before)": lambda: json.dumps(payload, indent=2).encode("utf-8"),
+        "json compact": lambda: json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+        f"dumps_json ({'orjson' if HAS_ORJSON else 'json fallback'})": lambda: dumps_json(payload),
+    }
+
+    print(f"payload: {args.items} items x {args.results} results")
+    print(f"{'serializer':<32}{'us/op':>10}{'raw B':>10}{'gzip B':>10}{'br B':>10}")
+    for name, fn in variants.items():
+        body = fn()
+        gz = len(gzip.compress(body, compresslevel=6))
+        br = len(brotli.compress(body, quality=4)) if HAS_BROTLI else "-"
+        print(f"{name:<32}{_time(fn, args.repeat):>10.1f}{len(body):>10}{gz:>10}{br:>10}")
+
+    body = dumps_json(payload)
+    print(f"{'gzip level 6 cost':<32}{_time(lambda: gzip.compress(body, compresslevel=6), args.repeat):>10.1f}")
+    if HAS_BROTLI:
+        print(f"{'brotli q4 cost':<32}{_time(lambda: brotli.compress(body, quality=4), args.repeat):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+catalog/bm25.py: an index brought up to date with sync() answers queries exactly like
+one built from scratch on the new catalog, with NumPy and with the Python scorer.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+
+from app.data.catalog import bm25
+from app.data.catalog.bm25 import BM25Index
+from benchmarks.bench_bm25 import QUERIES, build_products, changed_catalog
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def use_numpy(request, monkeypatch):
+    if request.param and not bm25.HAS_NUMPY:
+        pytest.skip("numpy is not installed")
+    monkeypatch.setattr(bm25, "HAS_NUMPY", request.param)
+    return request.param
+
+
+def _fresh(products: list[dict]) -> BM25Index:
+    index = BM25Index()
+    index.sync(products)
+    return index
+
+
+def _assert_same_results(index: BM25Index, expected: BM25Index, allowed=None) -> None:
+    for query in QUERIES + ["linen shirt", "unknownword"]:
+        got = index.search(query, 50, allowed)
+        want = expected.search(query, 50, allowed)
+        assert [pid for pid, _ in got] == [pid for pid, _ in want], query
+        assert [score for _, score in got] == pytest.approx([score for _, score in want]), query
+
+
+def test_sync_matches_fresh_build(use_numpy):
+    products = build_products(500)
+    index = _fresh(products)
+
+    changed = changed_catalog(products, fraction=0.05)
+    stats = index.sync(changed)
+
+    assert stats == {"added": 25, "updated": 25, "removed": 25}
+    assert len(index) == len(changed)
+    _assert_same_results(index, _fresh(changed))
+
+
+def test_sync_unchanged_catalog_is_a_no_op(use_numpy):
+    products = build_products(200)
+    index = _fresh(products)
+
+    assert index.sync(products) == {"added": 0, "updated": 0, "removed": 0}
+
+
+def test_reordering_changes_tie_order_only(use_numpy):
+    products = build_products(200)
+    index = _fresh(products)
+
+    reordered = list(reversed(products))
+    assert index.sync(reordered) == {"added": 0, "updated": 0, "removed": 0}
+    _assert_same_results(index, _fresh(reordered))
+
+
+def test_upsert_and_remove_match_fresh_build(use_numpy):
+    products = build_products(200)
+    index = _fresh(products)
+
+    edited = {**products[10], "name": "linen shirt special"}
+    index.upsert(edited)
+    index.remove(str(products[20]["id"]))
+
+    expected = [edited if p is products[10] else p for p in products if p is not products[20]]
+    _assert_same_results(index, _fresh(expected))
+
+
+def test_search_within_allowed_ids(use_numpy):
+    products = build_products(300)
+    index = _fresh(products)
+    allowed = {str(p["id"]) for p in products[::3]}
+
+    for query in QUERIES:
+        assert {pid for pid, _ in index.search(query, 500, allowed)} <= allowed
+    _assert_same_results(index, _fresh(products), allowed)
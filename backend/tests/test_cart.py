@@ -0,0 +1,115 @@
+"""
+/api/cart: user edits made through /api/cart/items survive a reload of the search results.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.data.cart_store import CartState
+from app.routers import cart as cart_router
+
+
+def _result(name: str, price: float, retailer: str = "Shop") -> dict:
+    return {
+        "name": name,
+        "price": price,
+        "retailer": retailer,
+        "link": f"https://shop.example/{name.lower().replace(' ', '-')}",
+        "delivery_estimate": "3 days",
+        "variants": {"sizes": ["M"], "colors": ["black"]},
+    }
+
+
+@pytest.fixture
+def search(monkeypatch):
+    """Mutable stand-in for the retailer search; each GET /api/cart re-runs it."""
+    results = {"items": [_result("Linen Shirt", 40.0), _result("Chino Pants", 55.0)]}
+
+    async def fake_search_products(**_kwargs):
+        return [dict(r) for r in results["items"]], {}
+
+    state = CartState()
+    monkeypatch.setattr(cart_router, "search_products", fake_search_products)
+    monkeypatch.setattr(cart_router, "get_last_extract", lambda: None)
+    monkeypatch.setattr(cart_router, "get_last_search", lambda: None)
+    monkeypatch.setattr(cart_router, "get_persona_version", lambda: 1)
+    monkeypatch.setattr(cart_router, "get_cart_state", lambda: state)
+    return results
+
+
+@pytest.fixture
+def client(search) -> TestClient:
+    app = FastAPI()
+    app.include_router(cart_router.router)
+    return TestClient(app)
+
+
+def _items(client: TestClient) -> dict:
+    response = client.get("/api/cart", params={"items": "shirt,pants"})
+    assert response.status_code == 200
+    return {item["id"]: item for item in response.json()["items"]}
+
+
+def test_added_item_survives_get_and_new_search(client, search):
+    _items(client)
+    created = client.post("/api/cart/items", json={"title": "Straw Hat", "price": 20.0, "retailer": "Hats"})
+    assert created.status_code == 201
+    item_id = created.json()["item"]["id"]
+
+    patched = client.patch(f"/api/cart/items/{item_id}", json={"quantity": 3, "variant": {"size": "L"}})
+    assert patched.status_code == 200
+
+    items = _items(client)
+    assert items[item_id]["quantity"] == 3
+    assert items[item_id]["variant"]["size"] == "L"
+
+    # A fresh search replaces the search layer only.
+    search["items"] = [_result("Wool Coat", 120.0)]
+    response = client.get("/api/cart", params={"items": "coat"})
+    body = response.json()
+    assert [item["title"] for item in body["items"]] == ["Wool Coat", "Straw Hat"]
+    assert body["totalPrice"] == 180.0
+
+
+def test_edits_to_search_items_are_replayed(client, search):
+    items = _items(client)
+    shirt, pants = (next(i for i in items.values() if i["title"] == t) for t in ("Linen Shirt", "Chino Pants"))
+    assert client.patch(f"/api/cart/items/{shirt['id']}", json={"quantity": 2}).status_code == 200
+    assert client.delete(f"/api/cart/items/{pants['id']}").status_code == 200
+
+    # Same products, new result set (different order and an extra item).
+    search["items"] = [_result("Chino Pants", 55.0), _result("Linen Shirt", 40.0), _result("Belt", 15.0)]
+    body = client.get("/api/cart", params={"items": "shirt,pants,belt"}).json()
+    by_title = {item["title"]: item for item in body["items"]}
+    assert set(by_title) == {"Linen Shirt", "Belt"}
+    assert by_title["Linen Shirt"]["quantity"] == 2
+    assert body["totalPrice"] == 95.0
+
+
+@pytest.mark.parametrize("payload", [{"variant": None}, {"quantity": None}, {"quantity": 0}])
+def test_patch_rejects_null_and_invalid_fields(client, payload):
+    item_id = next(iter(_items(client)))
+    response = client.patch(f"/api/cart/items/{item_id}", json=payload)
+    assert response.status_code == 422
+    assert _items(client)[item_id]["quantity"] == 1
+
+
+def test_weak_etag_from_compressed_response_revalidates(search):
+    from app.middleware import CompressionMiddleware
+
+    app = FastAPI()
+    app.include_router(cart_router.router)
+    app.add_middleware(CompressionMiddleware, minimum_size=1)
+    client = TestClient(app)
+
+    response = client.get("/api/cart", params={"items": "shirt,pants"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/cart", params={"items": "shirt,pants"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
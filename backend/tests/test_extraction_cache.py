@@ -0,0 +1,73 @@
+"""
+llm_extractor/cache.py: prompts that differ only in case, spacing or punctuation share
+a key, and entries written under another EXTRACTOR_VERSION are never served.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+from app.data.llm_extractor import cache
+from app.data.llm_extractor.cache import ExtractionCache, extraction_cache_key, normalize_prompt
+
+MODEL = "test-model"
+
+
+def test_key_ignores_case_spacing_and_punctuation():
+    key = extraction_cache_key("Black linen shirt, under $29.99!", ["Budget", "My Style"], MODEL)
+
+    assert extraction_cache_key("  black   LINEN shirt under $29.99 ", ["my style", "budget"], MODEL) == key
+    assert extraction_cache_key("black linen shirt under $29.98", ["budget", "my style"], MODEL) != key
+    assert normalize_prompt("Under $29.99.") == "under $29.99"
+
+
+def test_key_depends_on_preferences_model_and_version(monkeypatch):
+    key = extraction_cache_key("linen shirt", ["budget"], MODEL)
+
+    assert extraction_cache_key("linen shirt", [], MODEL) != key
+    assert extraction_cache_key("linen shirt", ["budget"], "other-model") != key
+    monkeypatch.setattr(cache, "EXTRACTOR_VERSION", cache.EXTRACTOR_VERSION + 1)
+    assert extraction_cache_key("linen shirt", ["budget"], MODEL) != key
+
+
+def test_persisted_entries_survive_reopen(tmp_path):
+    db_path = str(tmp_path / "extract.sqlite3")
+    ExtractionCache(db_path=db_path).set("k", {"item": "shirt"})
+
+    reopened = ExtractionCache(db_path=db_path)
+
+    assert reopened.get("k") == {"item": "shirt"}
+    assert reopened.stats()["persistent_hits"] == 1
+
+
+def test_version_bump_purges_old_entries(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "extract.sqlite3")
+    ExtractionCache(db_path=db_path).set("k", {"item": "shirt"})
+
+    monkeypatch.setattr(cache, "EXTRACTOR_VERSION", cache.EXTRACTOR_VERSION + 1)
+    reopened = ExtractionCache(db_path=db_path)
+
+    assert reopened.get("k") is None
+    assert reopened._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0] == 0
+
+
+def test_get_returns_copies():
+    store = ExtractionCache()
+    value = {"colors": ["black"]}
+    store.set("k", value)
+    value["colors"].append("navy")
+
+    first = store.get("k")
+    first["colors"].append("red")
+
+    assert store.get("k") == {"colors": ["black"]}
+
+
+def test_lru_eviction():
+    store = ExtractionCache(max_entries=2)
+    store.set("a", {"n": 1})
+    store.set("b", {"n": 2})
+    store.get("a")
+    store.set("c", {"n": 3})
+
+    assert store.get("b") is None
+    assert store.get("a") == {"n": 1}
+    assert store.get("c") == {"n": 3}
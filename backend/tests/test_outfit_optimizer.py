@@ -0,0 +1,59 @@
+"""
+outfit_optimizer.optimize_outfit: the best bundle and its alternatives match a brute
+force over every combination at small sizes, with NumPy and with the pure-Python DP.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services import outfit_optimizer
+from app.services.outfit_optimizer import optimize_outfit
+from benchmarks.bench_outfit import brute_force, build_candidates
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def use_numpy(request, monkeypatch):
+    if request.param and not outfit_optimizer.HAS_NUMPY:
+        pytest.skip("numpy is not installed")
+    monkeypatch.setattr(outfit_optimizer, "HAS_NUMPY", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("categories,per_category", [(2, 8), (3, 12), (4, 6)])
+@pytest.mark.parametrize("max_days", [3.0, 7.0])
+def test_matches_brute_force(use_numpy, categories, per_category, max_days):
+    candidates = build_candidates(categories, per_category)
+    budget = 60.0 * categories
+    alternatives = 3
+
+    result = optimize_outfit(candidates, budget, max_days, alternatives)
+
+    expected = [round(t, 3) for t in brute_force(candidates, budget, max_days, alternatives + 1)]
+    assert [o["total_score"] for o in result["outfits"]] == expected
+    for outfit in result["outfits"]:
+        assert outfit["total_price"] <= budget
+        assert outfit["delivery_days"] <= max_days
+        assert set(outfit["items"]) == set(candidates)
+
+
+def test_unfilled_category_is_reported(use_numpy):
+    candidates = build_candidates(2, 5)
+    for entry in candidates["category-1"]:
+        entry["product"]["delivery_days"] = 20.0
+
+    result = optimize_outfit(candidates, 200.0, 7.0)
+
+    assert result["unfilled"] == ["category-1"]
+    assert all(set(o["items"]) == {"category-0"} for o in result["outfits"])
+
+
+def test_no_bundle_fits_budget(use_numpy):
+    candidates = build_candidates(3, 4)
+
+    assert optimize_outfit(candidates, 5.0, 30.0)["outfits"] == []
+
+
+def test_rejects_negative_alternatives():
+    with pytest.raises(ValueError):
+        optimize_outfit(build_candidates(1, 2), 100.0, 7.0, alternatives=-1)
@@ -0,0 +1,65 @@
+"""
+llm_extractor/partial_json.py: fields of a streamed JSON object are reported as soon as
+their value is complete, whatever the chunk boundaries.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import json
+
+import pytest
+
+from app.data.llm_extractor.partial_json import PartialJSONObject
+
+DOCUMENT = {
+    "item": "linen shirt",
+    "budget": 40,
+    "colors": ["black", "navy"],
+    "style": {"fit": "slim"},
+    "size": None,
+    "escaped": 'say "hi", {ok}',
+}
+
+
+def test_fields_complete_as_they_stream():
+    parser = PartialJSONObject()
+
+    assert parser.feed('```json\n{"item": "lin') == {}
+    assert parser.feed('en shirt", "budget": 4') == {"item": "linen shirt"}
+    # A number is only complete once the next character arrives.
+    assert parser.feed("0") == {}
+    assert parser.feed(', "colors": ["bl') == {"budget": 40}
+    assert parser.feed('ack"]}\n```') == {"colors": ["black"]}
+    assert parser.fields == {"item": "linen shirt", "budget": 40, "colors": ["black"]}
+    assert parser.closed
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_any_chunking_gives_the_whole_object(size):
+    text = "Here you go: " + json.dumps(DOCUMENT, indent=2)
+    parser = PartialJSONObject()
+    reported = {}
+    for start in range(0, len(text), size):
+        completed = parser.feed(text[start : start + size])
+        assert not set(completed) & set(reported)
+        reported.update(completed)
+
+    assert reported == DOCUMENT
+    assert parser.fields == DOCUMENT
+    assert parser.closed
+
+
+def test_text_after_the_object_is_ignored():
+    parser = PartialJSONObject()
+
+    assert parser.feed('{"a": 1} and {"b": 2}') == {"a": 1}
+    assert parser.feed(', "c": 3}') == {}
+    assert parser.fields == {"a": 1}
+
+
+def test_unterminated_object_stays_open():
+    parser = PartialJSONObject()
+    parser.feed('{"a": "x", "b": [1, 2')
+
+    assert parser.fields == {"a": "x"}
+    assert not parser.closed
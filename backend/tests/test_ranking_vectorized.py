@@ -0,0 +1,49 @@
+"""
+ranking_vectorized.rank_category gives the same entries (order, scores, decompositions,
+why_local) as the Python path: calculate_style_match + score_product, then a sort.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services import ranking_vectorized
+from app.services.ranking_service import _rank_python, get_weights
+from app.services.ranking_vectorized import rank_category
+from benchmarks.bench_ranking_vectorized import PERSONA, build_products, rank_loop
+
+pytestmark = pytest.mark.skipif(not ranking_vectorized.HAS_NUMPY, reason="numpy is not installed")
+
+BUDGET, MAX_DAYS = 150.0, 7.0
+
+
+@pytest.mark.parametrize("preferences", [[], ["budget"], ["Fast Delivery", "My Style"]])
+@pytest.mark.parametrize("n", [1, 50, 1000])
+def test_full_ranking_matches_python_loop(preferences, n):
+    weights = get_weights(preferences)
+
+    expected = rank_loop(build_products(n), weights, BUDGET, MAX_DAYS)
+
+    assert rank_category(build_products(n), PERSONA, weights, BUDGET, MAX_DAYS) == expected
+
+
+@pytest.mark.parametrize("offset,limit", [(0, 10), (5, 20), (990, 20), (2000, 5)])
+def test_page_matches_python_selection(offset, limit):
+    weights = get_weights(["budget"])
+    expected = rank_loop(build_products(1000), weights, BUDGET, MAX_DAYS)
+
+    page = rank_category(build_products(1000), PERSONA, weights, BUDGET, MAX_DAYS, offset, limit)
+
+    assert page == expected[offset : offset + limit]
+    assert page == _rank_python(build_products(1000), PERSONA, weights, BUDGET, MAX_DAYS, offset, limit)
+
+
+def test_sets_preference_match_like_the_loop():
+    weights = get_weights([])
+    looped = build_products(100)
+    rank_loop(looped, weights, BUDGET, MAX_DAYS)
+    vectorized = build_products(100)
+
+    rank_category(vectorized, PERSONA, weights, BUDGET, MAX_DAYS)
+
+    assert [p["preference_match"] for p in vectorized] == [p["preference_match"] for p in looped]
@@ -0,0 +1,86 @@
+"""
+llm_extractor/rules.py: the rule-based first pass and the confidence that decides
+whether the extractor can skip the LLM.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+
+from app.data.llm_extractor.rules import REQUIRED_FIELDS, rule_extract
+
+
+@pytest.mark.parametrize(
+    "prompt,budget",
+    [
+        ("jeans for $40", "$40"),
+        ("jeans for £40", "£40"),
+        ("jeans for 50€", "50€"),
+        ("jeans for 100 EUR", "100 EUR"),
+        ("jeans for 50 DT", "50 DT"),
+        ("jeans for 30 dollars", "30 dollars"),
+        ("jeans with a budget of 60", "$60"),
+        ("jeans under 50", "$50"),
+        ("jeans", ""),
+    ],
+)
+def test_budget_keeps_the_currency_as_written(prompt, budget):
+    assert rule_extract(prompt).data["budget"] == budget
+
+
+def test_bare_under_amount_is_not_confident():
+    result = rule_extract("jeans under 50")
+
+    assert result.confidence["budget"] < rule_extract("jeans for $50").confidence["budget"]
+    assert "budget" not in result.confident_fields(0.8)
+
+
+@pytest.mark.parametrize(
+    "prompt,deadline",
+    [
+        ("jeans in 3 days", "3 days"),
+        ("jeans within 1 week", "1 week"),
+        ("jeans in 1 day", "1 day"),
+        ("jeans in 2 weeks", "2 weeks"),
+        ("jeans en 4 jours", "4 days"),
+        ("jeans by friday", "by friday"),
+        ("jeans", ""),
+    ],
+)
+def test_deadline(prompt, deadline):
+    assert rule_extract(prompt).data["deadline"] == deadline
+
+
+def test_complete_prompt_needs_no_llm():
+    result = rule_extract("t-shirt for women size L under 30 dollars in 2 weeks")
+
+    assert result.data["item"] == "t-shirt"
+    assert result.data["target"] == "women"
+    assert result.data["size"] == "L"
+    assert result.missing_fields(0.8) == []
+    assert result.is_complete(0.8)
+    assert set(REQUIRED_FIELDS) <= set(result.confident_fields(0.8))
+
+
+def test_missing_fields_are_listed():
+    result = rule_extract("jeans under 50 by friday")
+
+    assert not result.is_complete(0.8)
+    assert set(result.missing_fields(0.8)) == {"budget", "target", "size"}
+
+
+def test_unknown_qualifier_lowers_item_confidence():
+    result = rule_extract("a waterproof jacket")
+
+    assert result.data["item"] == "jacket"
+    assert result.leftover == ["waterproof"]
+    assert result.confidence["item"] < rule_extract("a jacket").confidence["item"]
+    assert "item" not in result.confident_fields(0.8)
+
+
+def test_colors_and_size_label():
+    result = rule_extract("black linen shirt for men size M")
+
+    assert result.data["colors"] == ["black"]
+    assert result.data["size"] == "M"
+    assert result.confidence["size"] == 1.0